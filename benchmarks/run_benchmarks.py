@@ -0,0 +1,203 @@
+"""Time the ingestion stages on synthetic course trees and compare against stored baselines.
+
+Usage (from the repository root):
+
+    python -m benchmarks.run_benchmarks --save benchmarks/baselines/local.json
+    python -m benchmarks.run_benchmarks --compare benchmarks/baselines/local.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.synthetic import (
+    TreeSize,
+    make_dl_coursera_course,
+    make_manual_upload_course,
+    make_week_split,
+)
+from crawlers.dl_coursera.standardize_metadata import parse_and_standardize
+from crawlers.manual_upload.standardize_metadata import parse_course
+from crawlers.metadata_io import write_course_metadata
+from crawlers.process_all_transcripts import process_all_transcripts
+
+
+logger = logging.getLogger(__name__)
+
+BASELINE_FORMAT_VERSION = 1
+
+
+def time_runs(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Run func `repeat` times and return min/median/max wall time in seconds."""
+    timings: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return {
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "max_s": max(timings),
+        "runs": repeat,
+    }
+
+
+def run_benchmarks(work_dir: str, size: TreeSize, split_items: int, pages_per_item: int, repeat: int) -> dict:
+    """Generate the synthetic inputs under work_dir and time every stage."""
+    results: Dict[str, dict] = {}
+
+    dl_base = os.path.join(work_dir, "crawled_data", "dl_coursera")
+    crawl = make_dl_coursera_course(dl_base, "bench-course", size)
+    results["dl_coursera.parse_and_standardize"] = time_runs(
+        lambda: parse_and_standardize(crawl, dl_base), repeat
+    )
+
+    provider_path = os.path.join(work_dir, "crawled_data", "manual_upload", "bench-provider")
+    course_path = make_manual_upload_course(provider_path, "bench-course", size)
+    results["manual_upload.parse_course"] = time_runs(lambda: parse_course(course_path), repeat)
+
+    metadata = parse_course(course_path)
+    metadata_file = os.path.join(work_dir, "crawled_metadata", "bench-course.json")
+    write_course_metadata(
+        {k: v for k, v in metadata.items() if k != "modules"}, metadata["modules"], metadata_file
+    )
+    output_dir = os.path.join(work_dir, "outputs", "structured_transcripts")
+    results["process_all_transcripts.full"] = time_runs(
+        lambda: process_all_transcripts(metadata_file, output_dir, force=True), repeat
+    )
+    results["process_all_transcripts.unchanged"] = time_runs(
+        lambda: process_all_transcripts(metadata_file, output_dir), repeat
+    )
+
+    try:
+        from utils.split_week_slides import split_week_slides
+    except ImportError as e:
+        logger.warning("Skipping split_week_slides benchmark: %s", e)
+    else:
+        week_dir = os.path.join(work_dir, "weeks", "week-01")
+        instructions_path = make_week_split(week_dir, split_items, pages_per_item)
+        results["split_week_slides"] = time_runs(
+            lambda: split_week_slides(week_dir, "week.pdf", instructions_path), repeat
+        )
+
+    return results
+
+
+def compare(current: dict, baseline: dict, tolerance: float, min_seconds: float = 0.0) -> List[str]:
+    """Return one line per benchmark whose median regressed by more than tolerance.
+
+    Benchmarks whose baseline median is below min_seconds are reported but
+    never count as regressions: at that scale run-to-run noise alone exceeds
+    any sensible tolerance.
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            logger.info("%-40s new", name)
+            continue
+        ratio = result["median_s"] / previous["median_s"] if previous["median_s"] else float("inf")
+        if previous["median_s"] < min_seconds:
+            logger.info(
+                "%-40s %8.4fs vs %8.4fs (below --min-seconds, not compared)",
+                name, result["median_s"], previous["median_s"],
+            )
+            continue
+        logger.info(
+            "%-40s %8.4fs vs %8.4fs (x%.2f)", name, result["median_s"], previous["median_s"], ratio
+        )
+        if ratio > 1 + tolerance:
+            regressions.append(f"{name}: x{ratio:.2f} slower than baseline")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the ingestion stages on synthetic course trees.")
+    parser.add_argument("--modules", type=int, default=4)
+    parser.add_argument("--lessons", type=int, default=5, help="Lessons per module")
+    parser.add_argument("--items", type=int, default=6, help="Items per lesson")
+    parser.add_argument("--cues", type=int, default=200, help="Cues (or lines) per transcript")
+    parser.add_argument("--split-items", type=int, default=15, help="Items per week PDF")
+    parser.add_argument("--pages-per-item", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--work-dir", help="Directory for generated inputs (default: a temporary directory)")
+    parser.add_argument("--save", help="Write results as a JSON baseline to this path")
+    parser.add_argument("--compare", help="Compare against a JSON baseline; exit 1 on regressions")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown of the median before a benchmark counts as a regression (default: 0.25)",
+    )
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=0.01,
+        help="Only compare benchmarks whose baseline median is at least this long (default: 0.01)",
+    )
+    args = parser.parse_args(argv)
+
+    # Stage modules log at INFO per course/module; keep the report readable
+    logging.getLogger().setLevel(logging.WARNING)
+    logger.setLevel(logging.INFO)
+
+    size = TreeSize(
+        modules=args.modules,
+        lessons_per_module=args.lessons,
+        items_per_lesson=args.items,
+        cues_per_transcript=args.cues,
+    )
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="course-crawler-bench-")
+    try:
+        results = run_benchmarks(work_dir, size, args.split_items, args.pages_per_item, args.repeat)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "format_version": BASELINE_FORMAT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "parameters": {
+            **asdict(size),
+            "split_items": args.split_items,
+            "pages_per_item": args.pages_per_item,
+        },
+        "results": results,
+    }
+
+    for name, result in results.items():
+        logger.info("%-40s median %8.4fs (min %8.4fs)", name, result["median_s"], result["min_s"])
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        logger.info("Baseline saved to %s", args.save)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("parameters") != report["parameters"]:
+            logger.warning("Baseline was recorded with different parameters: %s", baseline.get("parameters"))
+        regressions = compare(report, baseline, args.tolerance, args.min_seconds)
+        for line in regressions:
+            logger.error(line)
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""Generators for synthetic course trees, transcripts and PDFs used by the benchmarks."""
+
+import json
+import os
+import random
+from dataclasses import dataclass
+from typing import List
+
+
+WORDS = (
+    "security key encryption network protocol attack model data learning federated "
+    "privacy client server gradient update training privacy bandwidth lecture course "
+    "example system function value module lesson review summary question answer"
+).split()
+
+
+@dataclass
+class TreeSize:
+    modules: int = 4
+    lessons_per_module: int = 5
+    items_per_lesson: int = 6
+    cues_per_transcript: int = 200
+    video_bytes: int = 4096
+
+
+def _sentence(rng: random.Random, words: int = 10) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _srt_timestamp(ms: int) -> str:
+    hours, rest = divmod(ms, 3_600_000)
+    minutes, rest = divmod(rest, 60_000)
+    seconds, millis = divmod(rest, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{millis:03d}"
+
+
+def write_srt(path: str, cues: int, seed: int = 0) -> None:
+    """Write an SRT transcript with `cues` two-line cues of 2.5s each."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(cues):
+            start, end = i * 2500, i * 2500 + 2400
+            f.write(f"{i + 1}\n{_srt_timestamp(start)} --> {_srt_timestamp(end)}\n")
+            f.write(f"{_sentence(rng)}\n{_sentence(rng, 6)}\n\n")
+
+
+def write_timestamped_txt(path: str, lines: int, seed: int = 0) -> None:
+    """Write a plain text transcript whose lines start with "m:ss" timestamps."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(lines):
+            minutes, seconds = divmod(i * 5, 60)
+            f.write(f"{minutes}:{seconds:02d} {_sentence(rng)}\n")
+
+
+def write_pdf(path: str, pages: int) -> None:
+    """Write a minimal valid PDF with `pages` pages, each showing its page number."""
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # page tree, filled in below
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for page in range(1, pages + 1):
+        stream = f"BT /F1 24 Tf 72 720 Td (Slide {page}) Tj ET".encode("ascii")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>".encode("ascii")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def _slug(kind: str, index: int) -> str:
+    return f"{kind}-{index + 1}-{WORDS[index % len(WORDS)]}"
+
+
+def make_dl_coursera_course(base_path: str, course_slug: str, size: TreeSize, seed: int = 0) -> dict:
+    """Create a dl_coursera-style tree under base_path and return its crawl JSON.
+
+    Folders follow the "NN@slug" convention parse_and_standardize matches
+    against; each item gets a video, an SRT transcript and a webpage.
+    """
+    crawl = {"slug": course_slug, "name": course_slug.replace("-", " ").title(), "modules": []}
+    for m in range(size.modules):
+        module = {"slug": _slug("topic", m), "name": f"Topic {m + 1}", "lessons": []}
+        for l in range(size.lessons_per_module):
+            lesson = {"slug": _slug("lesson", l), "name": f"Lesson {l + 1}", "items": []}
+            for i in range(size.items_per_lesson):
+                item = {"slug": _slug("item", i), "name": f"Item {i + 1}"}
+                lesson["items"].append(item)
+                item_dir = os.path.join(
+                    base_path, course_slug,
+                    f"{m + 1:02d}@{module['slug'][:40]}",
+                    f"{l + 1:02d}@{lesson['slug'][:40]}",
+                    f"{i + 1:02d}@{item['slug'][:40]}",
+                )
+                os.makedirs(item_dir, exist_ok=True)
+                write_srt(os.path.join(item_dir, "01@.srt"), size.cues_per_transcript, seed + i)
+                with open(os.path.join(item_dir, "01@.mp4"), "wb") as f:
+                    f.write(b"\0" * size.video_bytes)
+                with open(os.path.join(item_dir, "01@.html"), "w", encoding="utf-8") as f:
+                    f.write(f"<html><body>{item['name']}</body></html>")
+            module["lessons"].append(lesson)
+        crawl["modules"].append(module)
+
+    with open(os.path.join(base_path, f"{course_slug}.crawl.json"), "w") as f:
+        json.dump(crawl, f)
+    return crawl
+
+
+def make_manual_upload_course(provider_path: str, course_slug: str, size: TreeSize, seed: int = 0) -> str:
+    """Create a manual_upload-style course directory and return its path.
+
+    Items alternate between SRT and timestamped TXT transcripts, and every
+    third item has extra notes.
+    """
+    course_path = os.path.join(provider_path, course_slug)
+    for m in range(size.modules):
+        for l in range(size.lessons_per_module):
+            for i in range(size.items_per_lesson):
+                item_dir = os.path.join(
+                    course_path,
+                    f"{m + 1:02d}@{_slug('topic', m)}",
+                    f"{l + 1:02d}@{_slug('lesson', l)}",
+                    f"{i + 1:02d}@{_slug('item', i)}",
+                )
+                os.makedirs(item_dir, exist_ok=True)
+                if i % 2:
+                    write_timestamped_txt(os.path.join(item_dir, f"{i + 1}. Item.txt"), size.cues_per_transcript, seed + i)
+                else:
+                    write_srt(os.path.join(item_dir, f"{i + 1}. Item.srt"), size.cues_per_transcript, seed + i)
+                with open(os.path.join(item_dir, "video.mp4"), "wb") as f:
+                    f.write(b"\0" * size.video_bytes)
+                if i % 3 == 0:
+                    notes_dir = os.path.join(item_dir, "extra-notes")
+                    os.makedirs(notes_dir, exist_ok=True)
+                    with open(os.path.join(notes_dir, "notes.md"), "w", encoding="utf-8") as f:
+                        f.write(f"# Notes\n\n{_sentence(random.Random(seed + i))}\n")
+    return course_path
+
+
+def make_week_split(week_dir: str, items: int, pages_per_item: int) -> str:
+    """Create a week PDF with split instructions for `items` items; returns the instructions path."""
+    os.makedirs(week_dir, exist_ok=True)
+    write_pdf(os.path.join(week_dir, "week.pdf"), items * pages_per_item)
+    instructions = {
+        "week_pdf": "week.pdf",
+        "items": [
+            {
+                "item_dir": f"{i + 1:02d}@{_slug('item', i)}",
+                "start": i * pages_per_item + 1,
+                "end": (i + 1) * pages_per_item,
+            }
+            for i in range(items)
+        ],
+    }
+    instructions_path = os.path.join(week_dir, "split_instructions.json")
+    with open(instructions_path, "w") as f:
+        json.dump(instructions, f, indent=2)
+    return instructions_path
@@ -0,0 +1,484 @@
+import os
+import sys
+import glob
+import json
+import sqlite3
+import argparse
+import logging
+from pathlib import Path
+
+try:
+    from crawlers import metrics
+    from crawlers.metadata_io import open_course_metadata
+except ImportError:  # executed as a script: python crawlers/catalog.py
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from crawlers import metrics
+    from crawlers.metadata_io import open_course_metadata
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger(__name__)
+
+# Rows written before the running transaction is committed (at a course boundary)
+BATCH_ROWS = 20000
+
+# Bumped when the tables change; the catalog is derived from the metadata
+# files, so an older one is dropped and rebuilt by the next update()
+SCHEMA_VERSION = 2
+SOURCES = ("manual_upload", "dl_coursera")
+
+# A course's source is the crawler that produced it (one of SOURCES) and
+# its provider the manual_upload provider directory (NULL for dl_coursera).
+# Every row carries its course id, for per-course cleanup and queries, and
+# the generation of the course update that last wrote it: rows left with
+# an older generation after an update no longer exist in the metadata.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS courses (
+    id INTEGER PRIMARY KEY,
+    metadata_file TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL,
+    provider TEXT,
+    course_slug TEXT NOT NULL,
+    course_name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    generation INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS modules (
+    id INTEGER PRIMARY KEY,
+    course_id INTEGER NOT NULL REFERENCES courses(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    module_slug TEXT NOT NULL,
+    module_name TEXT NOT NULL,
+    generation INTEGER NOT NULL,
+    UNIQUE (course_id, module_slug)
+);
+CREATE TABLE IF NOT EXISTS lessons (
+    id INTEGER PRIMARY KEY,
+    course_id INTEGER NOT NULL REFERENCES courses(id) ON DELETE CASCADE,
+    module_id INTEGER NOT NULL REFERENCES modules(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    lesson_slug TEXT NOT NULL,
+    lesson_name TEXT NOT NULL,
+    generation INTEGER NOT NULL,
+    UNIQUE (module_id, lesson_slug)
+);
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    course_id INTEGER NOT NULL REFERENCES courses(id) ON DELETE CASCADE,
+    lesson_id INTEGER NOT NULL REFERENCES lessons(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    slug TEXT NOT NULL,
+    transformed_slug TEXT NOT NULL,
+    path TEXT NOT NULL,
+    generation INTEGER NOT NULL,
+    UNIQUE (lesson_id, transformed_slug)
+);
+CREATE TABLE IF NOT EXISTS content (
+    item_id INTEGER NOT NULL REFERENCES items(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    course_id INTEGER NOT NULL REFERENCES courses(id) ON DELETE CASCADE,
+    content_type TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    extension TEXT NOT NULL,
+    sha256 TEXT,
+    generation INTEGER NOT NULL,
+    PRIMARY KEY (item_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS courses_slug ON courses (course_slug);
+CREATE INDEX IF NOT EXISTS lessons_course ON lessons (course_id);
+CREATE INDEX IF NOT EXISTS items_course ON items (course_id);
+CREATE INDEX IF NOT EXISTS content_course ON content (course_id);
+CREATE INDEX IF NOT EXISTS content_type_size ON content (content_type, size);
+CREATE INDEX IF NOT EXISTS content_sha256 ON content (sha256) WHERE sha256 IS NOT NULL;
+"""
+
+_UPSERT_COURSE = """
+INSERT INTO courses (metadata_file, source, provider, course_slug, course_name, size, mtime_ns, generation)
+VALUES (?, ?, ?, ?, ?, ?, ?, 1)
+ON CONFLICT (metadata_file) DO UPDATE SET
+    source = excluded.source, provider = excluded.provider,
+    course_slug = excluded.course_slug, course_name = excluded.course_name,
+    size = excluded.size, mtime_ns = excluded.mtime_ns, generation = courses.generation + 1
+RETURNING id, generation
+"""
+_UPSERT_MODULE = """
+INSERT INTO modules (course_id, position, module_slug, module_name, generation) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (course_id, module_slug) DO UPDATE SET
+    position = excluded.position, module_name = excluded.module_name, generation = excluded.generation
+RETURNING id
+"""
+_UPSERT_LESSON = """
+INSERT INTO lessons (course_id, module_id, position, lesson_slug, lesson_name, generation)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (module_id, lesson_slug) DO UPDATE SET
+    position = excluded.position, lesson_name = excluded.lesson_name, generation = excluded.generation
+RETURNING id
+"""
+_UPSERT_ITEM = """
+INSERT INTO items (course_id, lesson_id, position, name, slug, transformed_slug, path, generation)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (lesson_id, transformed_slug) DO UPDATE SET
+    position = excluded.position, name = excluded.name, slug = excluded.slug,
+    path = excluded.path, generation = excluded.generation
+RETURNING id
+"""
+_UPSERT_CONTENT = """
+INSERT INTO content (item_id, position, course_id, content_type, file_name, path, size, extension, sha256, generation)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (item_id, position) DO UPDATE SET
+    content_type = excluded.content_type, file_name = excluded.file_name, path = excluded.path,
+    size = excluded.size, extension = excluded.extension, sha256 = excluded.sha256,
+    generation = excluded.generation
+"""
+
+# Columns returned by the content and item queries
+_ITEM_COLUMNS = """
+    co.source, co.provider, co.course_slug, m.module_slug, l.lesson_slug,
+    i.transformed_slug AS item_slug, i.name AS item_name, i.path AS item_path
+"""
+_ITEM_JOINS = """
+    JOIN lessons AS l ON l.id = i.lesson_id
+    JOIN modules AS m ON m.id = l.module_id
+    JOIN courses AS co ON co.id = i.course_id
+"""
+_ITEM_ORDER = "co.course_slug, co.source, co.provider, m.position, l.position, i.position"
+
+def course_source(metadata_file, source=None):
+    """
+    (source, provider) of a metadata file.
+
+    Without a source from the caller it is inferred from the layout of
+    crawled_metadata/: dl_coursera/<course>.json, else <provider>/<course>.json
+    from manual_upload.
+    """
+    parent = os.path.basename(os.path.dirname(os.path.abspath(metadata_file)))
+    if source is None:
+        source = "dl_coursera" if parent == "dl_coursera" else "manual_upload"
+    return source, parent if source == "manual_upload" else None
+
+class CourseCatalog:
+    """
+    SQLite catalog of the courses, modules, lessons, items and content
+    described by standardized metadata files.
+
+    update() upserts each course whose metadata file changed (by size and
+    mtime) and drops the rows that are no longer in it, writing in
+    transactions of about BATCH_ROWS rows. The query methods answer
+    cross-course questions from the indexed tables.
+    """
+
+    def __init__(self, catalog_path):
+        self.catalog_path = catalog_path
+        if os.path.dirname(catalog_path):
+            os.makedirs(os.path.dirname(catalog_path), exist_ok=True)
+        # Transactions are managed explicitly, see update()
+        self.conn = sqlite3.connect(catalog_path, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.conn.executescript(
+                "DROP TABLE IF EXISTS content; DROP TABLE IF EXISTS items; DROP TABLE IF EXISTS lessons;"
+                "DROP TABLE IF EXISTS modules; DROP TABLE IF EXISTS courses;"
+                f"PRAGMA user_version = {SCHEMA_VERSION};"
+            )
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _update_course(self, metadata_file, batch_rows, source=None):
+        """Upsert one metadata file; returns the rows written, or None if it is unchanged."""
+        metadata_file = os.path.abspath(metadata_file)
+        st = os.stat(metadata_file)
+        known = self.conn.execute(
+            "SELECT size, mtime_ns FROM courses WHERE metadata_file = ?", (metadata_file,)
+        ).fetchone()
+        if known is not None and tuple(known) == (st.st_size, st.st_mtime_ns):
+            return None
+
+        header, modules = open_course_metadata(metadata_file)
+        source, provider = course_source(metadata_file, source)
+        course_id, generation = self.conn.execute(_UPSERT_COURSE, (
+            metadata_file, source, provider, header["course_slug"], header["course_name"],
+            st.st_size, st.st_mtime_ns
+        )).fetchone()
+
+        rows = 1
+        content_rows = []
+        for module_position, module in enumerate(modules):
+            (module_id,) = self.conn.execute(_UPSERT_MODULE, (
+                course_id, module_position, module["module_slug"], module["module_name"], generation
+            )).fetchone()
+            rows += 1
+            for lesson_position, lesson in enumerate(module["lessons"]):
+                (lesson_id,) = self.conn.execute(_UPSERT_LESSON, (
+                    course_id, module_id, lesson_position, lesson["lesson_slug"], lesson["lesson_name"],
+                    generation
+                )).fetchone()
+                rows += 1
+                for item_position, item in enumerate(lesson["items"]):
+                    (item_id,) = self.conn.execute(_UPSERT_ITEM, (
+                        course_id, lesson_id, item_position, item["name"], item["slug"],
+                        item["transformed_slug"], item["path"], generation
+                    )).fetchone()
+                    rows += 1
+                    for content_position, content in enumerate(item["content"]):
+                        content_rows.append((
+                            item_id, content_position, course_id, content["content_type"],
+                            content["file_name"], content["path"], content["size"], content["extension"],
+                            content.get("sha256"), generation
+                        ))
+                    if len(content_rows) >= batch_rows:
+                        self.conn.executemany(_UPSERT_CONTENT, content_rows)
+                        rows += len(content_rows)
+                        content_rows = []
+        self.conn.executemany(_UPSERT_CONTENT, content_rows)
+        rows += len(content_rows)
+
+        # Children first, so the cascades find nothing left to do
+        for table in ("content", "items", "lessons", "modules"):
+            self.conn.execute(f"DELETE FROM {table} WHERE course_id = ? AND generation < ?", (course_id, generation))
+        return rows
+
+    def update(self, metadata_files, batch_rows=BATCH_ROWS, source=None):
+        """
+        Bring the catalog in line with the given metadata files.
+
+        source names the crawler that wrote them (see course_source; by
+        default it is inferred from each file's directory).
+
+        Unchanged files are skipped. A file that cannot be read is logged
+        and left as it was in the catalog; the others are still updated.
+        Returns {"updated", "unchanged", "failed": [(path, error)]}.
+        """
+        if source is not None and source not in SOURCES:
+            raise ValueError(f"Unknown source {source!r}, expected one of {', '.join(SOURCES)}")
+        summary = {"updated": 0, "unchanged": 0, "failed": []}
+        pending = 0
+        self.conn.execute("BEGIN")
+        try:
+            for metadata_file in metadata_files:
+                self.conn.execute("SAVEPOINT course")
+                try:
+                    with metrics.timer("catalog_course"):
+                        rows = self._update_course(metadata_file, batch_rows, source)
+                except (OSError, ValueError, KeyError, TypeError) as e:
+                    self.conn.execute("ROLLBACK TO course")
+                    self.conn.execute("RELEASE course")
+                    summary["failed"].append((metadata_file, f"{type(e).__name__}: {e}"))
+                    logger.error(f"Failed to catalog {metadata_file}: {e}")
+                    continue
+                self.conn.execute("RELEASE course")
+
+                if rows is None:
+                    summary["unchanged"] += 1
+                    continue
+                summary["updated"] += 1
+                metrics.inc("catalog_rows", rows)
+                pending += rows
+                if pending >= batch_rows:
+                    self.conn.execute("COMMIT")
+                    self.conn.execute("BEGIN")
+                    pending = 0
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        logger.info(
+            f"Catalog updated: {summary['updated']} courses updated, {summary['unchanged']} unchanged, "
+            f"{len(summary['failed'])} failed"
+        )
+        return summary
+
+    def remove_missing(self):
+        """Drop the courses whose metadata file no longer exists; returns how many."""
+        missing = [
+            (row["id"],) for row in self.conn.execute("SELECT id, metadata_file FROM courses")
+            if not os.path.exists(row["metadata_file"])
+        ]
+        if missing:
+            self.conn.execute("BEGIN")
+            self.conn.executemany("DELETE FROM courses WHERE id = ?", missing)
+            self.conn.execute("COMMIT")
+        return len(missing)
+
+    def courses(self):
+        """Every course with its item count, content count and total content bytes."""
+        rows = self.conn.execute(
+            """
+            SELECT co.source, co.provider, co.course_slug, co.course_name, co.metadata_file,
+                   (SELECT COUNT(*) FROM items AS i WHERE i.course_id = co.id) AS items,
+                   COUNT(c.item_id) AS files, COALESCE(SUM(c.size), 0) AS bytes
+            FROM courses AS co
+            LEFT JOIN content AS c ON c.course_id = co.id
+            GROUP BY co.id
+            ORDER BY co.course_slug, co.source, co.provider
+            """
+        )
+        return [dict(row) for row in rows]
+
+    def find_content(self, content_type=None, min_size=None, max_size=None, extension=None,
+                     course_slug=None, limit=None):
+        """
+        Content entries matching every given filter, largest first.
+
+        Each result has the course/module/lesson/item slugs, the item name
+        and path, and the content's own fields.
+        """
+        where, params = [], []
+        for clause, value in (
+            ("c.content_type = ?", content_type),
+            ("c.size >= ?", min_size),
+            ("c.size <= ?", max_size),
+            ("c.extension = ?", extension),
+            ("co.course_slug = ?", course_slug),
+        ):
+            if value is not None:
+                where.append(clause)
+                params.append(value)
+        sql = f"""
+            SELECT {_ITEM_COLUMNS}, c.content_type, c.file_name, c.path, c.size, c.extension, c.sha256
+            FROM content AS c
+            JOIN items AS i ON i.id = c.item_id
+            {_ITEM_JOINS}
+            {"WHERE " + " AND ".join(where) if where else ""}
+            ORDER BY c.size DESC, c.path
+        """
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def items_missing(self, content_type, course_slug=None, limit=None):
+        """Items without any content entry of content_type, in course order."""
+        params = [content_type]
+        sql = f"""
+            SELECT {_ITEM_COLUMNS}
+            FROM items AS i
+            {_ITEM_JOINS}
+            WHERE NOT EXISTS (
+                SELECT 1 FROM content AS c WHERE c.item_id = i.id AND c.content_type = ?
+            )
+        """
+        if course_slug is not None:
+            sql += " AND co.course_slug = ?"
+            params.append(course_slug)
+        sql += f" ORDER BY {_ITEM_ORDER}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def totals(self, course_slug=None):
+        """{content type: {"files": count, "bytes": total size}} over all or one course."""
+        sql = "SELECT c.content_type, COUNT(*) AS files, SUM(c.size) AS bytes FROM content AS c"
+        params = []
+        if course_slug is not None:
+            sql += " JOIN courses AS co ON co.id = c.course_id WHERE co.course_slug = ?"
+            params.append(course_slug)
+        sql += " GROUP BY c.content_type ORDER BY c.content_type"
+        return {row["content_type"]: {"files": row["files"], "bytes": row["bytes"]}
+                for row in self.conn.execute(sql, params)}
+
+def add_catalog_arguments(parser):
+    parser.add_argument(
+        '--catalog',
+        type=str,
+        default=None,
+        help="Also upsert the standardized courses into the SQLite catalog at this path."
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the SQLite catalog of standardized courses.")
+    parser.add_argument(
+        '--catalog_file',
+        type=str,
+        default='outputs/catalog.sqlite',
+        help="Path to the catalog database (default: outputs/catalog.sqlite)."
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    update_parser = subparsers.add_parser('update', help="Upsert new and changed metadata files.")
+    update_parser.add_argument(
+        'metadata_files',
+        type=str,
+        nargs='*',
+        help="Standardized metadata JSON files (default: every JSON file under crawled_metadata/)."
+    )
+    metrics.add_cli_arguments(update_parser)
+
+    subparsers.add_parser('courses', help="List the catalogued courses.")
+
+    content_parser = subparsers.add_parser('content', help="Find content entries, largest first.")
+    content_parser.add_argument('--content_type', type=str, default=None, help="e.g. transcript, video, slides.")
+    content_parser.add_argument('--min_size', type=int, default=None, help="Minimum size in bytes.")
+    content_parser.add_argument('--max_size', type=int, default=None, help="Maximum size in bytes.")
+    content_parser.add_argument('--course', type=str, default=None, help="Only this course slug.")
+    content_parser.add_argument('--limit', type=int, default=50, help="Maximum number of results (default: 50).")
+
+    missing_parser = subparsers.add_parser('missing', help="Find items without a given content type.")
+    missing_parser.add_argument('content_type', type=str, help="e.g. slides or transcript.")
+    missing_parser.add_argument('--course', type=str, default=None, help="Only this course slug.")
+    missing_parser.add_argument('--limit', type=int, default=None, help="Maximum number of results.")
+
+    args = parser.parse_args()
+    if args.command == 'update':
+        metrics.enable_from_args(args)
+
+    try:
+        with CourseCatalog(args.catalog_file) as catalog:
+            if args.command == 'update':
+                # content_hash.py keeps its cache under crawled_metadata/ by default
+                metadata_files = args.metadata_files or sorted(
+                    path for path in glob.glob('crawled_metadata/**/*.json', recursive=True)
+                    if os.path.basename(path) != 'content_hashes.json'
+                )
+                catalog.update(metadata_files)
+                removed = catalog.remove_missing()
+                if removed:
+                    logger.info(f"Removed {removed} courses whose metadata file is gone")
+            elif args.command == 'courses':
+                for course in catalog.courses():
+                    location = "/".join(part for part in (course['source'], course['provider']) if part)
+                    print(
+                        f"{location}/{course['course_slug']}: {course['items']} items, "
+                        f"{course['files']} files, {course['bytes']} bytes"
+                    )
+            elif args.command == 'content':
+                for entry in catalog.find_content(
+                    content_type=args.content_type, min_size=args.min_size, max_size=args.max_size,
+                    course_slug=args.course, limit=args.limit
+                ):
+                    print(f"{entry['size']:>14} {entry['content_type']:<12} {entry['path']}")
+            else:
+                for item in catalog.items_missing(args.content_type, course_slug=args.course, limit=args.limit):
+                    print(
+                        f"{item['course_slug']}/{item['module_slug']}/{item['lesson_slug']}/{item['item_slug']}"
+                        f" {item['item_path']}"
+                    )
+    except FileNotFoundError as e:
+        logger.error(f"File not found: {e}")
+    except json.JSONDecodeError as e:
+        logger.error(f"JSON decoding error: {e}")
+    except Exception as e:
+        logger.exception(f"An unexpected error occurred: {e}")
+    finally:
+        if args.command == 'update':
+            metrics.write_from_args(args)
@@ -0,0 +1,296 @@
+import os
+import sys
+import json
+import mmap
+import glob
+import hashlib
+import argparse
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    from crawlers import metrics
+    from crawlers.metadata_io import open_course_metadata
+except ImportError:  # executed as a script: python crawlers/content_hash.py
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from crawlers import metrics
+    from crawlers.metadata_io import open_course_metadata
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger(__name__)
+
+# Files at least this large are hashed through a memory map, smaller ones in blocks
+MMAP_THRESHOLD = 8 << 20
+BLOCK_SIZE = 1 << 20
+
+# Content entries of these types get a "sha256" field when hashing is enabled
+HASHED_CONTENT_TYPES = ("video", "document", "slides", "transcript", "extra-notes")
+
+def hash_content_file(file_path):
+    """
+    Return the SHA-256 hex digest of a file.
+
+    Large files are hashed from a memory map in one call, which lets
+    hashlib release the GIL for the whole file, so several threads hash
+    in parallel.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+        else:
+            for block in iter(lambda: f.read(BLOCK_SIZE), b''):
+                digest.update(block)
+    metrics.inc("bytes_read", size)
+    return digest.hexdigest()
+
+class HashCache:
+    """
+    Content hashes keyed by path, valid while the file's size and mtime match.
+
+    Stored as JSON at cache_path (if given) so later runs only hash new or
+    changed files. Safe to use from several threads.
+    """
+
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.hits = self.misses = 0
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f).get("files", {})
+            except json.JSONDecodeError:
+                logger.warning(f"Ignoring unreadable hash cache: {cache_path}")
+
+    def hash(self, file_path):
+        """Return the file's SHA-256, from the cache when its size and mtime are unchanged."""
+        st = os.stat(file_path)
+        metrics.inc("files_statted")
+        key = os.path.abspath(file_path)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            with self._lock:
+                self.hits += 1
+            return entry["sha256"]
+
+        sha256 = hash_content_file(file_path)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha256}
+        return sha256
+
+    def save(self):
+        if not self.cache_path:
+            return
+        if os.path.dirname(self.cache_path):
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"files": self._entries}, f, sort_keys=True)
+        os.replace(tmp_path, self.cache_path)
+        logger.debug(f"Hash cache saved: {self.cache_path} ({self.hits} hits, {self.misses} hashed)")
+
+def _module_content(module):
+    for lesson in module["lessons"]:
+        for item in lesson["items"]:
+            for content in item["content"]:
+                if content["content_type"] in HASHED_CONTENT_TYPES:
+                    yield content
+
+def iter_hashed_modules(modules, cache, workers=4):
+    """
+    Add a "sha256" field to the media content of each module as it passes.
+
+    The files of a module are hashed in parallel before it is yielded, so
+    this wraps the standardizers' module generators without buffering the
+    course. Content that already has a hash is left as is; unreadable
+    files are logged and left without one.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for module in modules:
+            contents = [content for content in _module_content(module) if not content.get("sha256")]
+            futures = [executor.submit(cache.hash, content["path"]) for content in contents]
+            for content, future in zip(contents, futures):
+                try:
+                    content["sha256"] = future.result()
+                except OSError as e:
+                    logger.warning(f"Could not hash {content['path']}: {e}")
+            yield module
+
+def add_hash_arguments(parser):
+    """Add the --hash_content/--hash_cache/--hash_workers options to a standardizer's parser."""
+    parser.add_argument(
+        '--hash_content',
+        action='store_true',
+        help="Record a sha256 field for every video, document, slide and transcript file."
+    )
+    parser.add_argument(
+        '--hash_cache',
+        type=str,
+        default='crawled_metadata/content_hashes.json',
+        help="Cache of content hashes keyed by path, size and mtime (default: crawled_metadata/content_hashes.json)."
+    )
+    parser.add_argument(
+        '--hash_workers',
+        type=int,
+        default=4,
+        help="Number of files hashed in parallel (default: 4)."
+    )
+
+def iter_metadata_files(metadata_files, cache, workers=4):
+    """
+    Yield (sha256, size, path) for the hashed content of the given metadata files.
+
+    Entries written without --hash_content are hashed now (through the cache).
+    Files that cannot be read are skipped.
+    """
+    for metadata_file in metadata_files:
+        _, modules = open_course_metadata(metadata_file)
+        for module in iter_hashed_modules(modules, cache, workers):
+            for content in _module_content(module):
+                if content.get("sha256"):
+                    yield content["sha256"], content["size"], content["path"]
+
+def find_duplicates(metadata_files, cache, workers=4):
+    """
+    Group the content of the given metadata files by hash.
+
+    Returns a report with one group per hash shared by more than one path,
+    largest reclaimable space first, and the total reclaimable bytes
+    (copies already hard-linked together count once).
+    """
+    paths_by_hash = {}
+    for sha256, size, path in iter_metadata_files(metadata_files, cache, workers):
+        group = paths_by_hash.setdefault(sha256, {"sha256": sha256, "size": size, "paths": []})
+        if path not in group["paths"]:
+            group["paths"].append(path)
+
+    groups = [group for group in paths_by_hash.values() if len(group["paths"]) > 1]
+    for group in groups:
+        group["paths"].sort()
+        # Paths that are already hard links of each other share one copy
+        copies = set()
+        for path in group["paths"]:
+            try:
+                st = os.stat(path)
+                copies.add((st.st_dev, st.st_ino))
+            except OSError:
+                pass
+        group["reclaimable"] = group["size"] * max(0, len(copies) - 1)
+    groups.sort(key=lambda group: (-group["reclaimable"], group["sha256"]))
+    return {"groups": groups, "reclaimable_bytes": sum(group["reclaimable"] for group in groups)}
+
+def hardlink_duplicates(report):
+    """
+    Replace every duplicate in the report with a hard link to the group's first path.
+
+    Files already linked, on another filesystem or changed since they were
+    hashed (different size) are left alone. Each link is made under a
+    temporary name and renamed over the duplicate. Returns (linked, bytes reclaimed).
+    """
+    linked = reclaimed = 0
+    for group in report["groups"]:
+        keep = group["paths"][0]
+        try:
+            keep_st = os.stat(keep)
+        except OSError as e:
+            logger.warning(f"Skipping group {group['sha256']}: {e}")
+            continue
+        for path in group["paths"][1:]:
+            try:
+                st = os.stat(path)
+                if st.st_ino == keep_st.st_ino and st.st_dev == keep_st.st_dev:
+                    continue
+                if st.st_dev != keep_st.st_dev or st.st_size != keep_st.st_size:
+                    logger.warning(f"Not linking {path}: different filesystem or size")
+                    continue
+                tmp_path = f"{path}.dedup.tmp"
+                os.link(keep, tmp_path)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.error(f"Failed to link {path} to {keep}: {e}")
+                continue
+            linked += 1
+            reclaimed += st.st_size
+    return linked, reclaimed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report (and optionally hard-link) duplicate media across courses.")
+    parser.add_argument(
+        'metadata_files',
+        type=str,
+        nargs='*',
+        help="Standardized metadata JSON files (default: every JSON file under crawled_metadata/)."
+    )
+    parser.add_argument(
+        '--hash_cache',
+        type=str,
+        default='crawled_metadata/content_hashes.json',
+        help="Cache of content hashes keyed by path, size and mtime (default: crawled_metadata/content_hashes.json)."
+    )
+    parser.add_argument(
+        '--hash_workers',
+        type=int,
+        default=4,
+        help="Number of files hashed in parallel (default: 4)."
+    )
+    parser.add_argument(
+        '--report_file',
+        type=str,
+        default=None,
+        help="Also write the duplicate report as JSON to this path."
+    )
+    parser.add_argument(
+        '--hardlink',
+        action='store_true',
+        help="Replace duplicates with hard links to one copy."
+    )
+    metrics.add_cli_arguments(parser)
+
+    args = parser.parse_args()
+    metrics.enable_from_args(args)
+
+    try:
+        metadata_files = args.metadata_files or sorted(
+            path for path in glob.glob('crawled_metadata/**/*.json', recursive=True)
+            if os.path.abspath(path) != os.path.abspath(args.hash_cache)
+        )
+        cache = HashCache(args.hash_cache)
+        report = find_duplicates(metadata_files, cache, args.hash_workers)
+        cache.save()
+
+        for group in report["groups"]:
+            logger.info(f"{group['sha256'][:12]} {group['size']:>14} bytes x{len(group['paths'])}")
+            for path in group["paths"]:
+                logger.info(f"    {path}")
+        logger.info(
+            f"{len(report['groups'])} duplicate groups, {report['reclaimable_bytes']} bytes reclaimable"
+        )
+        if args.report_file:
+            with open(args.report_file, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=4)
+
+        if args.hardlink:
+            linked, reclaimed = hardlink_duplicates(report)
+            logger.info(f"Linked {linked} duplicates, reclaimed {reclaimed} bytes")
+    except FileNotFoundError as e:
+        logger.error(f"File not found: {e}")
+    except json.JSONDecodeError as e:
+        logger.error(f"JSON decoding error: {e}")
+    except Exception as e:
+        logger.exception(f"An unexpected error occurred: {e}")
+    finally:
+        metrics.write_from_args(args)
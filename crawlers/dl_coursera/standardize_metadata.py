@@ -1,10 +1,29 @@
 import argparse
 import os
 import json
-import re
 import logging
+import sys
+from functools import partial
 from pathlib import Path
 
+try:
+    from crawlers import metrics
+    from crawlers.catalog import CourseCatalog, add_catalog_arguments
+    from crawlers.content_hash import HashCache, add_hash_arguments, iter_hashed_modules
+    from crawlers.metadata_io import write_course_metadata
+    from crawlers.models import Content, Course, Item, Lesson, Module
+    from crawlers.scan_state import ScanState
+    from crawlers.slide_text import SIDECAR_SUFFIX
+except ImportError:  # executed as a script: python crawlers/dl_coursera/standardize_metadata.py
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+    from crawlers import metrics
+    from crawlers.catalog import CourseCatalog, add_catalog_arguments
+    from crawlers.content_hash import HashCache, add_hash_arguments, iter_hashed_modules
+    from crawlers.metadata_io import write_course_metadata
+    from crawlers.models import Content, Course, Item, Lesson, Module
+    from crawlers.scan_state import ScanState
+    from crawlers.slide_text import SIDECAR_SUFFIX
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,  # Default level; switch to DEBUG to see more logs
@@ -13,74 +32,154 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def parse_and_standardize(data, base_path):
+def parse_and_standardize(data, base_path, match_report=None):
     """
     Process course data, match with folder structure, and collect standardized metadata.
+
+    Each lesson directory is scanned once and items are resolved against that
+    index. If match_report is a dict, it is filled with the "unmatched" and
+    "ambiguous" item slugs (as lists of (lesson path, item slug) pairs).
     """
-    logger.info("Starting to parse and standardize course data.")
-    
-    course_hierarchy = {
+    return {
+        **course_header(data),
+        "modules": list(iter_standardized_modules(data, base_path, match_report))
+    }
+
+def course_header(data):
+    """Course-level metadata taken from the crawl JSON."""
+    return {
         "course_slug": data.get("slug", "unknown-course"),
-        "course_name": data.get("name", "unknown-course"),
-        "modules": []
+        "course_name": data.get("name", "unknown-course")
     }
 
+def build_course(data, base_path, match_report=None):
+    """
+    Build the typed model (see crawlers.models) of a crawled course.
+
+    Items are matched to their folders up front, but each item's content
+    is only collected when it is first accessed.
+    """
+    return Course(
+        **course_header(data),
+        modules=list(iter_module_models(data, base_path, match_report))
+    )
+
+def iter_standardized_modules(data, base_path, match_report=None, before_module=None, state=None):
+    """
+    Yield each standardized module as soon as its lessons have been matched,
+    so the course can be streamed to disk with metadata_io.write_course_metadata.
+
+    before_module, if given, is called with each module's directory before
+    its lessons are scanned. With a scan_state.ScanState, lesson and item
+    directories unchanged since the previous run are not scanned again.
+    """
+    for module in iter_module_models(data, base_path, match_report, before_module, state):
+        yield module.to_dict()
+
+def load_content_models(item_path, state=None):
+    if state is not None:
+        previous = state.item_content(item_path)
+        if previous is not None:
+            return [Content.from_dict(content) for content in previous]
+    scanned = []
+    content = collect_content_metadata(item_path, scanned)
+    if state is not None:
+        state.record_item(item_path, scanned, [metadata["path"] for metadata in content])
+    return [Content.from_dict(metadata) for metadata in content]
+
+def _lesson_index(lesson_path, state):
+    if state is not None:
+        folders = state.listing(lesson_path)
+        if folders is not None:
+            return folders, {folder.lower(): folder for folder in folders}
+    lesson_index = index_lesson_directory(lesson_path)
+    if state is not None and lesson_index is not None:
+        state.record_listing(lesson_path, lesson_index[0])
+    return lesson_index
+
+def iter_module_models(data, base_path, match_report=None, before_module=None, state=None):
+    """
+    Yield each module as a crawlers.models.Module once its items have been matched.
+
+    Item content is loaded lazily with collect_content_metadata; see
+    iter_standardized_modules for the arguments.
+    """
+    logger.info("Starting to parse and standardize course data.")
+    if match_report is None:
+        match_report = {}
+    match_report.setdefault("unmatched", [])
+    match_report.setdefault("ambiguous", [])
+    course_slug = course_header(data)["course_slug"]
+
     transform_slug = lambda index, slug: f"{index+1:02d}@{slug[:40]}"
 
     # Iterate through modules
     for module_i, module in enumerate(data.get("modules", [])):
         transformed_module_slug = transform_slug(module_i, module.get("slug", "unknown-module"))
         logger.info(f"Processing module: {module.get('name', 'unknown-module')}")
+        if before_module is not None:
+            before_module(os.path.join(base_path, course_slug, transformed_module_slug))
 
-        module_data = {
-            "module_name": module.get("name", "unknown-module"),
-            "module_slug": transformed_module_slug,
-            "lessons": []
-        }
+        module_data = Module(
+            module_name=module.get("name", "unknown-module"),
+            module_slug=transformed_module_slug,
+        )
 
         # Iterate through lessons
         for lesson_i, lesson in enumerate(module.get("lessons", [])):
             transformed_lesson_slug = transform_slug(lesson_i, lesson.get("slug", "unknown-lesson"))
             logger.debug(f"Processing lesson: {lesson.get('name', 'unknown-lesson')}")
 
-            lesson_data = {
-                "lesson_name": lesson.get("name", "unknown-lesson"),
-                "lesson_slug": transformed_lesson_slug,
-                "items": []
-            }
+            lesson_data = Lesson(
+                lesson_name=lesson.get("name", "unknown-lesson"),
+                lesson_slug=transformed_lesson_slug,
+            )
+
+            lesson_path = os.path.join(
+                base_path, course_slug, transformed_module_slug, transformed_lesson_slug
+            )
+            lesson_index = _lesson_index(lesson_path, state)
 
             # Iterate through items
             for item_i, item in enumerate(lesson.get("items", [])):
                 transformed_item_slug = transform_slug(item_i, item.get("slug", "unknown-item"))
                 logger.debug(f"Processing item: {item.get('name', 'unknown-item')}")
 
-                item_path = find_file_in_directory(
-                    base_path, course_hierarchy["course_slug"], 
-                    transformed_module_slug, transformed_lesson_slug, transformed_item_slug
+                item_path, candidates = resolve_item_path(lesson_path, lesson_index, transformed_item_slug)
+                if lesson_index is not None and not candidates:
+                    match_report["unmatched"].append((lesson_path, transformed_item_slug))
+                elif len(candidates) > 1:
+                    match_report["ambiguous"].append((lesson_path, transformed_item_slug))
+
+                item_data = Item(
+                    name=item.get("name", "unknown-item"),
+                    slug=item.get("slug", "unknown-item"),
+                    transformed_slug=transformed_item_slug,
+                    path=item_path,
+                    content_loader=partial(load_content_models, item_path, state)
                 )
 
-                content_metadata = collect_content_metadata(item_path)
+                lesson_data.items.append(item_data)
 
-                item_data = {
-                    "name": item.get("name", "unknown-item"),
-                    "slug": item.get("slug", "unknown-item"),
-                    "transformed_slug": transformed_item_slug,
-                    "path": item_path,
-                    "content": content_metadata
-                }
+            module_data.lessons.append(lesson_data)
 
-                lesson_data["items"].append(item_data)
+        yield module_data
 
-            module_data["lessons"].append(lesson_data)
-
-        course_hierarchy["modules"].append(module_data)
+    if match_report["unmatched"] or match_report["ambiguous"]:
+        logger.warning(
+            f"{len(match_report['unmatched'])} items without a folder, "
+            f"{len(match_report['ambiguous'])} items partially matching several folders."
+        )
+        for lesson_path, item_slug in match_report["ambiguous"]:
+            logger.warning(f"Ambiguous item folder for {item_slug} in {lesson_path}")
 
     logger.info("Finished parsing and standardizing course data.")
-    return course_hierarchy
 
-def collect_content_metadata(item_path):
+def collect_content_metadata(item_path, scanned=None):
     """
     Collect metadata for each content type within the item folder.
+
+    The directories walked are appended to scanned, if given.
     """
     logger.debug(f"Collecting content metadata from: {item_path}")
     content = []
@@ -90,9 +189,13 @@ def collect_content_metadata(item_path):
         return content
 
     for root, _, files in os.walk(item_path):
+        metrics.inc("directories_scanned")
+        if scanned is not None:
+            scanned.append(root)
         for file in files:
             file_path = os.path.join(root, file)
             content_type = determine_content_type(file)
+            metrics.inc("files_statted")
 
             metadata = {
                 "content_type": content_type,
@@ -110,17 +213,64 @@ def determine_content_type(file_name):
     """
     Determine the content type based on the file extension.
     """
-    if file_name.endswith(('.mp4', '.avi', '.mov')):
+    if file_name.endswith(SIDECAR_SUFFIX):
+        return 'slide-text'
+    elif file_name.endswith(('.mp4', '.avi', '.mov')):
         return 'video'
     elif file_name.endswith(('.pdf', '.doc', '.docx')):
         return 'document'
     elif file_name.endswith(('.html', '.htm')):
         return 'webpage'
-    elif file_name.endswith(('.srt', '.txt')):
+    elif file_name.endswith(('.srt', '.txt', '.vtt')):
         return 'transcript'
     else:
         return 'other'
 
+def index_lesson_directory(lesson_path):
+    """
+    Scan a lesson directory once and index its item folders.
+
+    Returns (folder names in listing order, {lowercased folder name: folder name}),
+    or None if the lesson directory does not exist.
+    """
+    try:
+        with os.scandir(lesson_path) as entries:
+            folders = [entry.name for entry in entries if entry.is_dir()]
+        metrics.inc("directories_scanned")
+    except FileNotFoundError:
+        logger.error(f"Lesson path not found: {lesson_path}")
+        return None
+
+    return folders, {folder.lower(): folder for folder in folders}
+
+def resolve_item_path(lesson_path, lesson_index, item_slug):
+    """
+    Resolve an item slug against a lesson index.
+
+    An exact (case-insensitive) folder name is a single dict lookup. Only
+    when there is none are the folders scanned for names containing the
+    slug, the first one in listing order being used.
+    Returns (item path or a "not found" marker, matching folder names).
+    """
+    if lesson_index is None:
+        return f"Path not found: {lesson_path}", []
+
+    folders, by_slug = lesson_index
+    normalized_slug = item_slug.lower()
+    folder = by_slug.get(normalized_slug)
+    if folder is not None:
+        candidates = [folder]
+    else:
+        candidates = [folder for folder in folders if normalized_slug in folder.lower()]
+        if not candidates:
+            logger.warning(f"Item folder not found for: {item_slug}")
+            return f"File not found for: {item_slug}", candidates
+        folder = candidates[0]
+
+    item_path = os.path.join(lesson_path, folder)
+    logger.debug(f"Found item path: {item_path}")
+    return item_path, candidates
+
 def find_file_in_directory(base_path, course_slug, module_slug, lesson_slug, item_slug):
     """
     Search for the correct file in the local folder structure.
@@ -128,18 +278,8 @@ def find_file_in_directory(base_path, course_slug, module_slug, lesson_slug, ite
     lesson_path = os.path.join(base_path, course_slug, module_slug, lesson_slug)
     logger.debug(f"Looking for item path: {lesson_path}")
 
-    if not os.path.exists(lesson_path):
-        logger.error(f"Lesson path not found: {lesson_path}")
-        return f"Path not found: {lesson_path}"
-
-    for folder in os.listdir(lesson_path):
-        if re.search(rf"(\d+@)?{re.escape(item_slug)}", folder, re.IGNORECASE):
-            item_path = os.path.join(lesson_path, folder)
-            logger.debug(f"Found item path: {item_path}")
-            return item_path
-
-    logger.warning(f"Item folder not found for: {item_slug}")
-    return f"File not found for: {item_slug}"
+    item_path, _ = resolve_item_path(lesson_path, index_lesson_directory(lesson_path), item_slug)
+    return item_path
 
 if __name__ == "__main__":
 
@@ -165,22 +305,49 @@ if __name__ == "__main__":
         default=os.path.join(default_output_dir, 'dl_coursera/uol-cm2025-computer-security.json'),
         help="Path to the output JSON file."
     )
+    parser.add_argument(
+        '--compact',
+        action='store_true',
+        help="Write non-indented metadata JSON (uses orjson when installed)."
+    )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help="Reuse the previous output for directories unchanged since the last run."
+    )
+    add_hash_arguments(parser)
+    add_catalog_arguments(parser)
+    metrics.add_cli_arguments(parser)
 
     args = parser.parse_args()
+    metrics.enable_from_args(args)
+    hash_cache = HashCache(args.hash_cache) if args.hash_content else None
 
     try:
         logger.info(f"Loading JSON file: {args.json_file}")
         with open(args.json_file, 'r') as f:
             data = json.load(f)
 
-        course_data = parse_and_standardize(data, Path(args.json_file).parent)
-
-        logger.info(f"Saving standardized data to: {args.output_file}")
-        output_directory = os.path.dirname(args.output_file)
-        os.makedirs(output_directory, exist_ok=True)
-
-        with open(args.output_file, 'w') as f:
-            json.dump(course_data, f, indent=4)
+        state = None
+        if args.incremental:
+            state = ScanState.load(args.output_file, {"hashed": hash_cache is not None})
+
+        logger.info(f"Streaming standardized data to: {args.output_file}")
+        modules = iter_standardized_modules(data, Path(args.json_file).parent, state=state)
+        if hash_cache is not None:
+            modules = iter_hashed_modules(modules, hash_cache, args.hash_workers)
+        with metrics.timer("standardize_course"):
+            write_course_metadata(
+                course_header(data),
+                modules,
+                args.output_file,
+                compact=args.compact,
+            )
+        if state is not None:
+            state.save(args.output_file)
+        if args.catalog:
+            with CourseCatalog(args.catalog) as catalog:
+                catalog.update([args.output_file], source="dl_coursera")
 
         logger.info("Process completed successfully.")
 
@@ -190,3 +357,7 @@ if __name__ == "__main__":
         logger.error(f"JSON decoding error: {e}")
     except Exception as e:
         logger.exception(f"An unexpected error occurred: {e}")
+    finally:
+        if hash_cache is not None:
+            hash_cache.save()
+        metrics.write_from_args(args)
@@ -1,28 +1,169 @@
 import os
+import glob
 import json
 import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 import logging
 
+try:
+    from crawlers import metrics
+    from crawlers.catalog import CourseCatalog, add_catalog_arguments
+    from crawlers.content_hash import HashCache, add_hash_arguments, iter_hashed_modules
+    from crawlers.metadata_io import write_course_metadata
+    from crawlers.models import Content, Course, Item, Lesson, Module
+    from crawlers.scan_state import ScanState
+    from crawlers.slide_text import SIDECAR_SUFFIX
+except ImportError:  # executed as a script: python crawlers/manual_upload/standardize_metadata.py
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+    from crawlers import metrics
+    from crawlers.catalog import CourseCatalog, add_catalog_arguments
+    from crawlers.content_hash import HashCache, add_hash_arguments, iter_hashed_modules
+    from crawlers.metadata_io import write_course_metadata
+    from crawlers.models import Content, Course, Item, Lesson, Module
+    from crawlers.scan_state import ScanState
+    from crawlers.slide_text import SIDECAR_SUFFIX
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def parse_course(course_path):
+def _scan_sorted(path):
+    """List a directory once, sorted by name; DirEntry caches type and stat info."""
+    metrics.inc("directories_scanned")
+    with os.scandir(path) as entries:
+        return sorted(entries, key=lambda entry: entry.name)
+
+
+def _content_entry(content_type, entry, path, extension):
+    metrics.inc("files_statted")
+    return Content(
+        content_type=content_type,
+        file_name=entry.name,
+        path=path,
+        size=entry.stat().st_size,
+        extension=extension
+    )
+
+
+def course_header(course_path):
+    """Course-level metadata derived from the course directory name."""
     course_slug = os.path.basename(course_path.strip("/"))
     course_name = course_slug.replace("-", " ").title()
 
-    metadata = {
+    return {
         "course_slug": course_slug,
-        "course_name": course_name,
-        "modules": []
+        "course_name": course_name
     }
 
+
+def parse_course(course_path):
+    return {**course_header(course_path), "modules": list(iter_course_modules(course_path))}
+
+
+def build_course(course_path):
+    """
+    Build the typed model (see crawlers.models) of a course directory.
+
+    Modules, lessons and items are scanned up front; each item directory
+    is only listed when its content is first accessed.
+    """
+    return Course(**course_header(course_path), modules=list(iter_module_models(course_path)))
+
+
+def iter_course_modules(course_path, before_module=None, state=None):
+    """
+    Yield each module's metadata as soon as its directory has been scanned.
+
+    before_module, if given, is called with each module's path before the
+    module is scanned (the fused pipeline waits there for slide splitting).
+    With a scan_state.ScanState, unchanged directories and items are taken
+    from the previous run instead of being listed again.
+    """
+    for module in iter_module_models(course_path, before_module, state):
+        yield module.to_dict()
+
+
+def _child_directories(path, state):
+    """Sorted subdirectory names of path, reused from the previous scan when unchanged."""
+    if state is not None:
+        children = state.listing(path)
+        if children is not None:
+            return children
+    children = [entry.name for entry in _scan_sorted(path) if entry.is_dir()]
+    if state is not None:
+        state.record_listing(path, children)
+    return children
+
+
+def _load_item_content(item_path, state):
+    if state is not None:
+        previous = state.item_content(item_path)
+        if previous is not None:
+            return [Content.from_dict(content) for content in previous]
+    scanned = []
+    content = collect_item_content(item_path, scanned)
+    if state is not None:
+        state.record_item(item_path, scanned, [entry.path for entry in content])
+    return content
+
+
+def collect_item_content(item_path, scanned=None):
+    """
+    List an item directory (and its extra-notes folder) as Content entries.
+
+    The directories listed are appended to scanned, if given.
+    """
+    content = []
+    notes_entry = None
+    if scanned is not None:
+        scanned.append(item_path)
+    for file_entry in _scan_sorted(item_path):
+        file_name = file_entry.name
+        file_path = os.path.join(item_path, file_name)
+        lower_name = file_name.lower()
+        if lower_name.endswith((".txt", ".srt", ".vtt")):
+            ext = os.path.splitext(file_name)[1].lower()
+            content.append(_content_entry("transcript", file_entry, file_path, ext))
+        elif lower_name.endswith(".mp4"):
+            content.append(_content_entry("video", file_entry, file_path, ".mp4"))
+        elif lower_name == "slides.pdf":
+            content.append(_content_entry("slides", file_entry, file_path, ".pdf"))
+        elif lower_name == "slides.pdf" + SIDECAR_SUFFIX:
+            content.append(_content_entry("slide-text", file_entry, file_path, ".jsonl"))
+        elif file_name == "extra-notes" and file_entry.is_dir():
+            notes_entry = file_entry
+
+    # Collect extra notes from optional subfolder "extra-notes" (e.g., .md files)
+    if notes_entry is not None:
+        notes_dir = os.path.join(item_path, "extra-notes")
+        if scanned is not None:
+            scanned.append(notes_dir)
+        for note_entry in _scan_sorted(notes_dir):
+            lower_name = note_entry.name.lower()
+            if lower_name.endswith((".md", ".txt", ".pdf")):
+                file_path = os.path.join(notes_dir, note_entry.name)
+                ext = os.path.splitext(note_entry.name)[1].lower()
+                content.append(_content_entry("extra-notes", note_entry, file_path, ext))
+
+    return content
+
+
+def iter_module_models(course_path, before_module=None, state=None):
+    """
+    Yield each module as a crawlers.models.Module once its directory has been scanned.
+
+    Item content is listed lazily with collect_item_content; see
+    iter_course_modules for before_module and state.
+    """
     # Iterate through module directories
-    for module_dir in sorted(os.listdir(course_path)):
+    for module_dir in _child_directories(course_path, state):
         module_path = os.path.join(course_path, module_dir)
-        if not os.path.isdir(module_path):
-            continue
+        if before_module is not None:
+            before_module(module_path)
 
         # Extract module name and slug
         module_slug, module_name_raw = module_dir.split("@", 1)
@@ -31,10 +172,8 @@ def parse_course(course_path):
         lessons = []
 
         # Iterate through lesson directories in the module
-        for lesson_dir in sorted(os.listdir(module_path)):
+        for lesson_dir in _child_directories(module_path, state):
             lesson_path = os.path.join(module_path, lesson_dir)
-            if not os.path.isdir(lesson_path):
-                continue
 
             # Extract lesson name and slug
             lesson_slug_id, lesson_name_raw = lesson_dir.split("@", 1)
@@ -44,112 +183,160 @@ def parse_course(course_path):
             items = []
 
             # Iterate through item directories in the lesson
-            for item_dir in sorted(os.listdir(lesson_path)):
+            for item_dir in _child_directories(lesson_path, state):
                 item_path = os.path.join(lesson_path, item_dir)
-                if not os.path.isdir(item_path):
-                    continue
 
                 # Extract item name and slug
                 item_slug_id, item_name_raw = item_dir.split("@", 1)
                 item_name = item_name_raw.replace("-", " ").title()
                 item_full_slug = f"{item_slug_id}@{item_name_raw}"
 
-                # Collect content within the item directory
-                content = []
-                for file_name in sorted(os.listdir(item_path)):
-                    file_path = os.path.join(item_path, file_name)
-                    lower_name = file_name.lower()
-                    if lower_name.endswith((".txt", ".srt")):
-                        ext = os.path.splitext(file_name)[1].lower()
-                        content.append({
-                            "content_type": "transcript",
-                            "file_name": file_name,
-                            "path": file_path,
-                            "size": os.path.getsize(file_path),
-                            "extension": ext
-                        })
-                    elif lower_name.endswith(".mp4"):
-                        content.append({
-                            "content_type": "video",
-                            "file_name": file_name,
-                            "path": file_path,
-                            "size": os.path.getsize(file_path),
-                            "extension": ".mp4"
-                        })
-                    elif lower_name == "slides.pdf":
-                        content.append({
-                            "content_type": "slides",
-                            "file_name": file_name,
-                            "path": file_path,
-                            "size": os.path.getsize(file_path),
-                            "extension": ".pdf"
-                        })
-
-                # Collect extra notes from optional subfolder "extra-notes" (e.g., .md files)
-                notes_dir = os.path.join(item_path, "extra-notes")
-                if os.path.isdir(notes_dir):
-                    for file_name in sorted(os.listdir(notes_dir)):
-                        lower_name = file_name.lower()
-                        if lower_name.endswith((".md", ".txt", ".pdf")):
-                            file_path = os.path.join(notes_dir, file_name)
-                            ext = os.path.splitext(file_name)[1].lower()
-                            content.append({
-                                "content_type": "extra-notes",
-                                "file_name": file_name,
-                                "path": file_path,
-                                "size": os.path.getsize(file_path),
-                                "extension": ext
-                            })
-
-                # Build item metadata
-                items.append({
-                    "name": item_name,
-                    "slug": item_name_raw,
-                    "transformed_slug": item_full_slug,
-                    "path": item_path,
-                    "content": content
-                })
+                # Build item metadata; its directory is listed on first access
+                items.append(Item(
+                    name=item_name,
+                    slug=item_name_raw,
+                    transformed_slug=item_full_slug,
+                    path=item_path,
+                    content_loader=partial(_load_item_content, item_path, state)
+                ))
 
             # Append lesson metadata
-            lessons.append({
-                "lesson_name": lesson_name,
-                "lesson_slug": full_lesson_slug,
-                "items": items
-            })
-
-        # Append module metadata
-        metadata["modules"].append({
-            "module_name": module_name,
-            "module_slug": f"{module_slug}@{module_name_raw}",
-            "lessons": lessons
-        })
-
-    return metadata
-
-
-def parse_provider(provider_path, output_base_path):
-    provider_slug = os.path.basename(provider_path.strip("/"))
-    provider_name = provider_slug.replace("-", " ").title()
-
-    # Iterate through courses under the provider
-    for course_dir in sorted(os.listdir(provider_path)):
-        course_path = os.path.join(provider_path, course_dir)
-        if not os.path.isdir(course_path):
-            continue
-
-        # Parse the course metadata
-        logger.info(f"Processing course: {course_dir}")
-        course_metadata = parse_course(course_path)
-
-        # Save course metadata to the appropriate path
+            lessons.append(Lesson(
+                lesson_name=lesson_name,
+                lesson_slug=full_lesson_slug,
+                items=items
+            ))
+
+        # Emit module metadata
+        yield Module(
+            module_name=module_name,
+            module_slug=f"{module_slug}@{module_name_raw}",
+            lessons=lessons
+        )
+
+
+def standardize_course(course_path, output_dir, compact=False, hash_cache=None, hash_workers=4,
+                       incremental=False, rescan=None):
+    """
+    Parse one course and stream its metadata to disk, one module at a time.
+
+    With a content_hash.HashCache, media entries also get a "sha256" field.
+    With incremental, directories unchanged since the previous run are not
+    listed again and their entries are copied from the previous metadata
+    file (see scan_state.ScanState); rescan lists directories to scan anyway.
+    The file is renamed into place once complete. Returns (output file, item count).
+    """
+    logger.info(f"Processing course: {os.path.basename(course_path)}")
+    header = course_header(course_path)
+    output_file = os.path.join(output_dir, f"{header['course_slug']}.json")
+    state = None
+    if incremental:
+        state = ScanState.load(output_file, {"hashed": hash_cache is not None})
+        state.invalidate(rescan or [])
+    item_count = 0
+
+    def counted_modules():
+        nonlocal item_count
+        modules = iter_course_modules(course_path, state=state)
+        if hash_cache is not None:
+            modules = iter_hashed_modules(modules, hash_cache, hash_workers)
+        for module in modules:
+            item_count += sum(len(lesson["items"]) for lesson in module["lessons"])
+            yield module
+
+    # Save course metadata to the appropriate path
+    with metrics.timer("standardize_course"):
+        write_course_metadata(header, counted_modules(), output_file, compact=compact)
+    if state is not None:
+        state.save(output_file)
+
+    logger.info(f"Metadata saved to: {output_file}")
+    return output_file, item_count
+
+
+def _list_subdirectories(path):
+    return [entry.path for entry in _scan_sorted(path) if entry.is_dir()]
+
+
+def _timed_standardize_course(course_path, output_dir, compact, hash_cache=None, hash_workers=4,
+                              incremental=False):
+    started = time.perf_counter()
+    try:
+        _, item_count = standardize_course(course_path, output_dir, compact, hash_cache, hash_workers,
+                                           incremental)
+        error = None
+    except Exception as e:
+        logger.exception(f"Failed to standardize course {course_path}: {e}")
+        item_count, error = 0, e
+    return started, time.perf_counter(), item_count, error
+
+
+def standardize_providers(provider_paths, output_base_path, workers=1, compact=False, hash_cache=None,
+                          hash_workers=4, incremental=False):
+    """
+    Standardize every course of the given providers.
+
+    Courses are independent, so with workers > 1 they are handled by a
+    thread pool; at most `workers` courses touch the filesystem at once.
+    A failing course is logged and counted without stopping the others.
+    The courses share hash_cache and incremental (see standardize_course).
+    Returns one summary dict per provider (courses, items, failed, seconds).
+    """
+    jobs = []
+    for provider_path in provider_paths:
+        provider_slug = os.path.basename(provider_path.strip("/"))
         output_dir = os.path.join(output_base_path, provider_slug)
-        os.makedirs(output_dir, exist_ok=True)
-        output_file = os.path.join(output_dir, f"{course_metadata['course_slug']}.json")
-
-        with open(output_file, "w") as f:
-            json.dump(course_metadata, f, indent=4)
-
-        logger.info(f"Metadata saved to: {output_file}")
+        for course_path in _list_subdirectories(provider_path):
+            jobs.append((provider_slug, course_path, output_dir))
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = list(executor.map(
+            _timed_standardize_course,
+            [course_path for _, course_path, _ in jobs],
+            [output_dir for _, _, output_dir in jobs],
+            [compact] * len(jobs),
+            [hash_cache] * len(jobs),
+            [hash_workers] * len(jobs),
+            [incremental] * len(jobs),
+        ))
+
+    summaries = {}
+    for provider_path in provider_paths:
+        provider_slug = os.path.basename(provider_path.strip("/"))
+        summaries[provider_slug] = {
+            "provider": provider_slug, "courses": 0, "items": 0, "failed": 0, "seconds": 0.0
+        }
+
+    spans = {}
+    for (provider_slug, _, _), (started, finished, item_count, error) in zip(jobs, results):
+        summary = summaries[provider_slug]
+        summary["courses"] += 1
+        summary["items"] += item_count
+        summary["failed"] += error is not None
+        first, last = spans.get(provider_slug, (started, finished))
+        spans[provider_slug] = (min(first, started), max(last, finished))
+
+    for provider_slug, (first, last) in spans.items():
+        summaries[provider_slug]["seconds"] = last - first
+
+    return list(summaries.values())
+
+
+def parse_provider(provider_path, output_base_path, workers=1, compact=False, hash_cache=None,
+                   incremental=False):
+    """Standardize all courses under one provider; returns its summary."""
+    return standardize_providers([provider_path], output_base_path, workers, compact, hash_cache,
+                                 incremental=incremental)[0]
+
+
+def log_summary_table(summaries):
+    """Log a per-provider table of course count, item count and wall time."""
+    logger.info(f"{'provider':<30} {'courses':>8} {'items':>8} {'failed':>7} {'seconds':>9}")
+    for summary in summaries:
+        logger.info(
+            f"{summary['provider']:<30} {summary['courses']:>8} {summary['items']:>8} "
+            f"{summary['failed']:>7} {summary['seconds']:>9.2f}"
+        )
 
 
 if __name__ == "__main__":
@@ -171,18 +358,46 @@ if __name__ == "__main__":
         default=default_output_dir,
         help="Path to the output directory for metadata."
     )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help="Number of courses to standardize concurrently (default: 1)."
+    )
+    parser.add_argument(
+        '--compact',
+        action='store_true',
+        help="Write non-indented metadata JSON (uses orjson when installed)."
+    )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help="Reuse the previous metadata for directories unchanged since the last run."
+    )
+    add_hash_arguments(parser)
+    add_catalog_arguments(parser)
+    metrics.add_cli_arguments(parser)
 
     args = parser.parse_args()
+    metrics.enable_from_args(args)
+    hash_cache = HashCache(args.hash_cache) if args.hash_content else None
 
     try:
         logger.info(f"Processing directory: {args.input_dir}")
-        for provider_dir in sorted(os.listdir(args.input_dir)):
-            provider_path = os.path.join(args.input_dir, provider_dir)
-            if not os.path.isdir(provider_path):
-                continue
-
-            logger.info(f"Processing provider: {provider_dir}")
-            parse_provider(provider_path, args.output_dir)
+        provider_paths = _list_subdirectories(args.input_dir)
+        logger.info(f"Processing providers: {', '.join(os.path.basename(p) for p in provider_paths)}")
+        summaries = standardize_providers(
+            provider_paths, args.output_dir, workers=args.workers, compact=args.compact,
+            hash_cache=hash_cache, hash_workers=args.hash_workers, incremental=args.incremental
+        )
+        log_summary_table(summaries)
+
+        if args.catalog:
+            with CourseCatalog(args.catalog) as catalog:
+                catalog.update(sorted(
+                    path for provider_path in provider_paths
+                    for path in glob.glob(os.path.join(args.output_dir, os.path.basename(provider_path), "*.json"))
+                ), source="manual_upload")
 
         logger.info("Process completed successfully.")
 
@@ -192,3 +407,7 @@ if __name__ == "__main__":
         logger.error(f"JSON decoding error: {e}")
     except Exception as e:
         logger.exception(f"An unexpected error occurred: {e}")
+    finally:
+        if hash_cache is not None:
+            hash_cache.save()
+        metrics.write_from_args(args)
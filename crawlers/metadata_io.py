@@ -0,0 +1,184 @@
+import os
+import re
+import json
+import logging
+import threading
+
+try:
+    from crawlers import metrics
+except ImportError:  # executed as a script from within crawlers/
+    import metrics
+
+try:
+    import orjson
+except ImportError:  # optional faster backend for compact output
+    orjson = None
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+def dumps_compact(obj):
+    """Serialize without indentation, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, separators=(",", ":"))
+
+def _dumps_nested(obj, depth):
+    """Serialize obj as json.dump(..., indent=4) would at the given nesting depth."""
+    return json.dumps(obj, indent=4).replace("\n", "\n" + "    " * depth)
+
+def write_course_metadata(header, modules, output_file, compact=False):
+    """
+    Write course metadata, streaming modules as they are produced.
+
+    header holds the course-level keys (course_slug, course_name) and modules
+    may be any iterable, e.g. a generator yielding each module once it has
+    been scanned. The indented layout is byte-identical to
+    json.dump(course, f, indent=4); compact=True writes a single line.
+    The file is written next to output_file and renamed into place.
+    Returns the number of modules written.
+    """
+    output_dir = os.path.dirname(output_file)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    tmp_file = f"{output_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    count = 0
+    try:
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            if compact:
+                f.write("{")
+                for key, value in header.items():
+                    f.write(f"{json.dumps(key)}:{dumps_compact(value)},")
+                f.write('"modules":[')
+                for module in modules:
+                    f.write(dumps_compact(module) if count == 0 else "," + dumps_compact(module))
+                    count += 1
+                f.write("]}")
+            else:
+                f.write("{")
+                for key, value in header.items():
+                    f.write(f"\n    {json.dumps(key)}: {_dumps_nested(value, 1)},")
+                f.write('\n    "modules": [')
+                for module in modules:
+                    f.write("\n        " if count == 0 else ",\n        ")
+                    f.write(_dumps_nested(module, 2))
+                    count += 1
+                f.write("\n    ]\n}" if count else "]\n}")
+            if metrics.enabled():
+                metrics.inc("bytes_written", f.tell())
+        os.replace(tmp_file, output_file)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+
+    logger.debug(f"Metadata with {count} modules saved to: {output_file}")
+    return count
+
+class _StreamDecoder:
+    """Decode JSON values one at a time from a text file, refilling a buffer as needed."""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _read_more(self):
+        if self.eof:
+            return False
+        # Grow reads with the pending buffer so a large value is not re-decoded too often
+        chunk = self.f.read(max(self.chunk_size, len(self.buf) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._read_more():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buf, self.pos)
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._read_more():
+                    continue
+                raise
+            # A number ending exactly at the buffer edge may continue in the next chunk
+            if end == len(self.buf) and self._read_more():
+                continue
+            self.pos = end
+            return obj
+
+def open_course_metadata(metadata_file, chunk_size=1 << 16):
+    """
+    Read course metadata incrementally.
+
+    Returns (header, modules): header holds the course-level keys that precede
+    "modules" in the file (both standardizers write course_slug and
+    course_name first), and modules is an iterator that decodes one module at
+    a time, so the whole hierarchy is never held in memory. The file is
+    closed once modules is exhausted or closed.
+    """
+    f = open(metadata_file, "r", encoding="utf-8")
+    try:
+        stream = _StreamDecoder(f, chunk_size)
+        header = {}
+        stream.expect("{")
+        has_modules = False
+        while stream.peek() != "}":
+            if header:
+                stream.expect(",")
+            key = stream.value()
+            stream.expect(":")
+            if key == "modules":
+                has_modules = True
+                break
+            header[key] = stream.value()
+    except BaseException:
+        f.close()
+        raise
+
+    def iter_modules():
+        with f:
+            if not has_modules:
+                return
+            stream.expect("[")
+            first = True
+            while stream.peek() != "]":
+                if not first:
+                    stream.expect(",")
+                first = False
+                yield stream.value()
+            stream.expect("]")
+
+    return header, iter_modules()
+
+def load_course_metadata(metadata_file):
+    """Load a whole course metadata file written in either layout."""
+    header, modules = open_course_metadata(metadata_file)
+    return {**header, "modules": list(modules)}
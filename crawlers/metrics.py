@@ -0,0 +1,183 @@
+import os
+import sys
+import json
+import time
+import threading
+
+# Run-wide counters and stage timers shared by the standardizers, the
+# transcript pipeline and the slide splitter. Everything is a no-op until
+# enable() is called, so instrumented code pays one flag check when off.
+#
+# Counters used across the tree:
+#   directories_scanned, files_statted, bytes_read, bytes_written,
+#   directories_reused, transcripts_parsed, segments_emitted, pages_split,
+#   pages_extracted, watch_events, catalog_rows
+PROMETHEUS_PREFIX = "course_crawler"
+
+_enabled = False
+_lock = threading.Lock()
+_counters = {}
+_timers = {}
+_started = None
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class _StageTimer:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.name, time.perf_counter() - self.started)
+        return False
+
+def enable():
+    """Start collecting metrics for this process."""
+    global _enabled, _started
+    _enabled = True
+    if _started is None:
+        _started = time.time()
+
+def enabled():
+    return _enabled
+
+def reset():
+    """Drop everything collected so far and switch collection off."""
+    global _enabled, _started
+    with _lock:
+        _counters.clear()
+        _timers.clear()
+    _enabled = False
+    _started = None
+
+def inc(name, value=1):
+    """Add value to a counter."""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def observe(name, seconds):
+    """Record one timing of a stage."""
+    if not _enabled:
+        return
+    with _lock:
+        count, total, longest = _timers.get(name, (0, 0.0, 0.0))
+        _timers[name] = (count + 1, total + seconds, max(longest, seconds))
+
+def timer(name):
+    """Context manager timing a stage; a shared no-op object when disabled."""
+    return _StageTimer(name) if _enabled else _NULL_TIMER
+
+def snapshot():
+    """Return a picklable copy of the counters and timers."""
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "timers": {name: list(values) for name, values in _timers.items()},
+        }
+
+def diff(after, before):
+    """Metrics collected between two snapshots, e.g. by one job in a worker process."""
+    counters = {
+        name: value - before["counters"].get(name, 0)
+        for name, value in after["counters"].items()
+        if value != before["counters"].get(name, 0)
+    }
+    timers = {}
+    for name, (count, total, longest) in after["timers"].items():
+        previous = before["timers"].get(name, (0, 0.0, 0.0))
+        if count != previous[0]:
+            timers[name] = [count - previous[0], total - previous[1], longest]
+    return {"counters": counters, "timers": timers}
+
+def merge(delta):
+    """Fold metrics reported by a worker process into this process."""
+    if not _enabled or not delta:
+        return
+    with _lock:
+        for name, value in delta["counters"].items():
+            _counters[name] = _counters.get(name, 0) + value
+        for name, (count, total, longest) in delta["timers"].items():
+            previous = _timers.get(name, (0, 0.0, 0.0))
+            _timers[name] = (previous[0] + count, previous[1] + total, max(previous[2], longest))
+
+def as_dict():
+    """The per-run metrics document written by write_json."""
+    data = snapshot()
+    return {
+        "started": _started,
+        "finished": time.time(),
+        "argv": sys.argv,
+        "counters": dict(sorted(data["counters"].items())),
+        "timers": {
+            name: {"count": count, "total_s": total, "max_s": longest}
+            for name, (count, total, longest) in sorted(data["timers"].items())
+        },
+    }
+
+def to_prometheus():
+    """Render the metrics in the Prometheus text exposition format."""
+    data = snapshot()
+    lines = []
+    for name, value in sorted(data["counters"].items()):
+        metric = f"{PROMETHEUS_PREFIX}_{name}_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+    if data["timers"]:
+        metric = f"{PROMETHEUS_PREFIX}_stage_seconds"
+        lines.append(f"# TYPE {metric} summary")
+        for name, (count, total, _) in sorted(data["timers"].items()):
+            lines.append(f'{metric}_sum{{stage="{name}"}} {total:.6f}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+def _write_atomic(path, text):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def write_json(path):
+    _write_atomic(path, json.dumps(as_dict(), indent=4))
+
+def write_prometheus(path):
+    _write_atomic(path, to_prometheus())
+
+def add_cli_arguments(parser):
+    """Add the shared --metrics_file/--prometheus_file options to a script's parser."""
+    parser.add_argument(
+        '--metrics_file',
+        type=str,
+        default=None,
+        help="Collect run metrics and write them as JSON to this path."
+    )
+    parser.add_argument(
+        '--prometheus_file',
+        type=str,
+        default=None,
+        help="Collect run metrics and write them in Prometheus text format to this path."
+    )
+
+def enable_from_args(args):
+    if args.metrics_file or args.prometheus_file:
+        enable()
+
+def write_from_args(args):
+    if args.metrics_file:
+        write_json(args.metrics_file)
+    if args.prometheus_file:
+        write_prometheus(args.prometheus_file)
@@ -0,0 +1,198 @@
+import sys
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, List, Optional
+
+try:
+    from crawlers.metadata_io import open_course_metadata, write_course_metadata
+except ImportError:  # executed as a script from within crawlers/
+    from metadata_io import open_course_metadata, write_course_metadata
+
+# Typed, slotted model of the standardized course metadata.
+#
+# Every class converts to and from the dicts of the current JSON schema
+# (to_dict/from_dict), so code can move to the model piecemeal. Slotted
+# instances carry no per-object __dict__, and the few distinct content types
+# and extensions are interned, which keeps large catalogs small in memory.
+
+@dataclass(slots=True)
+class Content:
+    content_type: str
+    file_name: str
+    path: str
+    size: int
+    extension: str
+    sha256: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Content":
+        return cls(
+            content_type=sys.intern(data["content_type"]),
+            file_name=data["file_name"],
+            path=data["path"],
+            size=data["size"],
+            extension=sys.intern(data["extension"]),
+            sha256=data.get("sha256"),
+        )
+
+    def to_dict(self) -> dict:
+        data = {
+            "content_type": self.content_type,
+            "file_name": self.file_name,
+            "path": self.path,
+            "size": self.size,
+            "extension": self.extension,
+        }
+        if self.sha256 is not None:
+            data["sha256"] = self.sha256
+        return data
+
+@dataclass(slots=True)
+class Item:
+    """
+    One course item. Its content list is filled on first access.
+
+    content_loader, if given, is called (once) the first time .content is
+    read; items built by the standardizers use it to scan the item
+    directory only when needed. release_content() drops a loaded list so
+    it is re-read on the next access.
+    """
+    name: str
+    slug: str
+    transformed_slug: str
+    path: str
+    content_loader: Optional[Callable[[], List[Content]]] = field(default=None, repr=False, compare=False)
+    _content: Optional[List[Content]] = field(default=None, init=False, repr=False)
+
+    @property
+    def content(self) -> List[Content]:
+        if self._content is None:
+            self._content = self.content_loader() if self.content_loader is not None else []
+        return self._content
+
+    @content.setter
+    def content(self, content: List[Content]) -> None:
+        self._content = content
+
+    @property
+    def content_loaded(self) -> bool:
+        return self._content is not None
+
+    def release_content(self) -> None:
+        if self.content_loader is not None:
+            self._content = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Item":
+        # Converted right away: keeping the dicts for later would hold them
+        # (and then the slotted copies too) for the item's whole lifetime
+        item = cls(
+            name=data["name"],
+            slug=data["slug"],
+            transformed_slug=data["transformed_slug"],
+            path=data["path"],
+        )
+        item.content = [Content.from_dict(content) for content in data["content"]]
+        return item
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "slug": self.slug,
+            "transformed_slug": self.transformed_slug,
+            "path": self.path,
+            "content": [content.to_dict() for content in self.content],
+        }
+
+@dataclass(slots=True)
+class Lesson:
+    lesson_name: str
+    lesson_slug: str
+    items: List[Item] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Lesson":
+        return cls(
+            lesson_name=data["lesson_name"],
+            lesson_slug=data["lesson_slug"],
+            items=[Item.from_dict(item) for item in data["items"]],
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "lesson_name": self.lesson_name,
+            "lesson_slug": self.lesson_slug,
+            "items": [item.to_dict() for item in self.items],
+        }
+
+@dataclass(slots=True)
+class Module:
+    module_name: str
+    module_slug: str
+    lessons: List[Lesson] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Module":
+        return cls(
+            module_name=data["module_name"],
+            module_slug=data["module_slug"],
+            lessons=[Lesson.from_dict(lesson) for lesson in data["lessons"]],
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "module_name": self.module_name,
+            "module_slug": self.module_slug,
+            "lessons": [lesson.to_dict() for lesson in self.lessons],
+        }
+
+    def iter_items(self) -> Iterator[Item]:
+        for lesson in self.lessons:
+            yield from lesson.items
+
+@dataclass(slots=True)
+class Course:
+    course_slug: str
+    course_name: str
+    modules: List[Module] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Course":
+        return cls(
+            course_slug=data["course_slug"],
+            course_name=data["course_name"],
+            modules=[Module.from_dict(module) for module in data["modules"]],
+        )
+
+    def header(self) -> dict:
+        return {"course_slug": self.course_slug, "course_name": self.course_name}
+
+    def to_dict(self) -> dict:
+        return {**self.header(), "modules": [module.to_dict() for module in self.modules]}
+
+    def iter_items(self) -> Iterator[Item]:
+        for module in self.modules:
+            yield from module.iter_items()
+
+    def save(self, output_file: str, compact: bool = False) -> int:
+        """Stream the course to output_file in the current schema (see metadata_io)."""
+        return write_course_metadata(
+            self.header(), (module.to_dict() for module in self.modules), output_file, compact=compact
+        )
+
+def modules_from_dicts(modules: Iterable[dict]) -> Iterator[Module]:
+    for module in modules:
+        yield Module.from_dict(module)
+
+def load_course(metadata_file: str) -> Course:
+    """
+    Load a standardized metadata file into the model.
+
+    Modules are decoded and converted one at a time, so the intermediate
+    dicts of the whole course are never held at once.
+    """
+    header, modules = open_course_metadata(metadata_file)
+    return Course(
+        course_slug=header["course_slug"],
+        course_name=header["course_name"],
+        modules=list(modules_from_dicts(modules)),
+    )
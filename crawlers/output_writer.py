@@ -0,0 +1,108 @@
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from crawlers import metrics
+except ImportError:  # executed as a script from within crawlers/
+    import metrics
+
+logger = logging.getLogger(__name__)
+
+def move_files(directory, files):
+    """
+    Rename {file name: staged path} into an existing directory.
+
+    The staged files are complete and on the same filesystem, so readers
+    never see a partially written output.
+    """
+    for file_name, staged_path in files.items():
+        os.replace(staged_path, os.path.join(directory, file_name))
+
+def discard_files(files):
+    """Remove whichever of the staged files in {file name: staged path} are left."""
+    for staged_path in files.values():
+        try:
+            os.remove(staged_path)
+        except FileNotFoundError:
+            pass
+
+class OutputWriter:
+    """
+    Bounded pool of threads moving output files into place in the background.
+
+    Producers stream each output to a staged temporary (see
+    process_all_transcripts.render_transcript), so only paths are queued.
+    submit() returns as soon as they are; once max_pending directories are
+    waiting it blocks, so producers cannot run ahead of the filesystem
+    without bound. Each directory is always handled by the same thread, so
+    writes to one directory happen in submission order and never
+    interleave: the last submitted set of files wins as a whole.
+    Directories are created once per run (sibling items only need their
+    own leaf directory) and the staged files are renamed into them.
+    Failures are collected rather than raised; close() waits for
+    everything queued and returns them as (tag, error) pairs.
+    """
+
+    def __init__(self, workers=4, max_pending=32):
+        # One single-threaded queue per worker; a directory always maps to the same one
+        self._executors = [
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"output-writer-{i}") for i in range(max(1, workers))
+        ]
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._created_dirs = set()
+        self.errors = []
+
+    def submit(self, directory, files, tag=None):
+        """Queue {file name: staged path} to be moved into directory, creating it if needed."""
+        self._slots.acquire()
+        try:
+            executor = self._executors[hash(directory) % len(self._executors)]
+            executor.submit(self._write, directory, files, tag)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _ensure_directory(self, directory):
+        with self._lock:
+            if directory in self._created_dirs:
+                return
+            parent_known = os.path.dirname(directory) in self._created_dirs
+        if parent_known:
+            try:
+                os.mkdir(directory)
+            except FileExistsError:
+                pass
+        else:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            while directory and directory not in self._created_dirs:
+                self._created_dirs.add(directory)
+                directory = os.path.dirname(directory)
+
+    def _write(self, directory, files, tag):
+        try:
+            with metrics.timer("write_outputs"):
+                self._ensure_directory(directory)
+                move_files(directory, files)
+        except Exception as e:
+            logger.debug(f"Failed to write {directory}: {e}")
+            discard_files(files)
+            with self._lock:
+                self.errors.append((tag or directory, f"{type(e).__name__}: {e}"))
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Wait for every queued write and return the (tag, error) pairs of the failed ones."""
+        for executor in self._executors:
+            executor.shutdown(wait=True)
+        return list(self.errors)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
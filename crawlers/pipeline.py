@@ -0,0 +1,352 @@
+import os
+import sys
+import json
+import queue
+import argparse
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    from crawlers import metrics
+    from crawlers.metadata_io import write_course_metadata
+    from crawlers.process_all_transcripts import process_course_transcripts
+    from crawlers.scan_state import ScanState
+    from crawlers.dl_coursera import standardize_metadata as dl_coursera
+    from crawlers.manual_upload import standardize_metadata as manual_upload
+except ImportError:  # executed as a script: python crawlers/pipeline.py
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from crawlers import metrics
+    from crawlers.metadata_io import write_course_metadata
+    from crawlers.process_all_transcripts import process_course_transcripts
+    from crawlers.scan_state import ScanState
+    from crawlers.dl_coursera import standardize_metadata as dl_coursera
+    from crawlers.manual_upload import standardize_metadata as manual_upload
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger(__name__)
+
+# Modules standardized ahead of the transcript stage
+MODULE_QUEUE_SIZE = 2
+
+_END = object()
+
+class _SlideSplitter:
+    """
+    Splits the week PDFs of a course in the background.
+
+    wait_for(module_path) blocks until every week whose directory contains,
+    or lies inside, the module has been split, so the module's slides.pdf
+    files exist before the standardizer scans it.
+    """
+
+    def __init__(self, course_path, workers, instructions_name, output_filename):
+        # PyPDF2 is only needed when slides are split
+        from utils.split_week_slides import find_week_jobs, _split_week_job
+
+        self.output_filename = output_filename
+        self.collect_metrics = workers > 1 and metrics.enabled()
+        self.jobs = find_week_jobs(course_path, instructions_name, output_filename)
+        logger.info(f"Found {len(self.jobs)} week instruction files under {course_path}")
+
+        if workers > 1:
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending = [
+            (job, self.executor.submit(_split_week_job, job, output_filename, False, self.collect_metrics))
+            for job in self.jobs
+        ]
+        self.results = []
+
+    def wait_for(self, module_path=None):
+        module_path = os.path.abspath(module_path) if module_path else None
+        remaining = []
+        for job, future in self.pending:
+            week_dir = job.week_dir_path
+            if module_path is None or _contains(week_dir, module_path) or _contains(module_path, week_dir):
+                self._collect(future.result())
+            else:
+                remaining.append((job, future))
+        self.pending = remaining
+
+    def _collect(self, result):
+        if self.collect_metrics:
+            metrics.merge(result.metrics)
+        if result.error is not None:
+            logger.error(f"Failed to split slides in {result.job.week_dir_path}: {result.error}")
+        else:
+            logger.info(
+                f"Split {result.job.week_pdf_filename}: {result.pages} pages, {len(result.written_paths)} files"
+            )
+        self.results.append(result)
+
+    def close(self):
+        try:
+            self.wait_for()
+        finally:
+            self.executor.shutdown()
+
+def _contains(parent, path):
+    return path == parent or path.startswith(parent.rstrip(os.sep) + os.sep)
+
+def run_pipeline(header, iter_modules, metadata_file, output_base_dir, workers=1, compact=False,
+                 force=False, binary_store=False, search_index=None, splitter=None, scan_state=None,
+                 archive=False):
+    """
+    Standardize a course and format its transcripts in one pass.
+
+    iter_modules(before_module) must return the standardizer's module
+    generator. A background thread streams the modules to metadata_file
+    while handing each one to the transcript stage through a small queue,
+    so directory scanning, JSON writing and transcript formatting overlap.
+    The outputs are the same files the separate scripts write. A
+    scan_state.ScanState given to the standardizer is saved next to
+    metadata_file once the metadata is complete. If standardizing fails,
+    the error is raised inside the transcript stage, which then leaves the
+    course's manifest, archive, store and index as they were.
+
+    Returns the transcript summary with "slides" (the WeekResults, if a
+    splitter was given) added.
+    """
+    modules = queue.Queue(maxsize=MODULE_QUEUE_SIZE)
+    cancelled = threading.Event()
+    failure = []
+    before_module = splitter.wait_for if splitter is not None else None
+
+    def handoff(module_iter):
+        for module in module_iter:
+            # Stop producing if the transcript stage gave up
+            while True:
+                if cancelled.is_set():
+                    raise RuntimeError("transcript stage stopped")
+                try:
+                    modules.put(module, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            yield module
+
+    def standardize():
+        try:
+            with metrics.timer("standardize_course"):
+                write_course_metadata(header, handoff(iter_modules(before_module)), metadata_file, compact=compact)
+            if scan_state is not None:
+                scan_state.save(metadata_file)
+            logger.info(f"Metadata saved to: {metadata_file}")
+        except BaseException as e:
+            failure.append(e)
+        finally:
+            # Nobody reads the queue once the transcript stage has stopped
+            while not cancelled.is_set():
+                try:
+                    modules.put(_END, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+    def received_modules():
+        while True:
+            module = modules.get()
+            if module is _END:
+                if failure:
+                    # A partial course must not look complete to the transcript stage
+                    raise failure[0]
+                return
+            yield module
+
+    producer = threading.Thread(target=standardize, name="standardize", daemon=True)
+    producer.start()
+    try:
+        summary = process_course_transcripts(
+            header["course_slug"], received_modules(), output_base_dir,
+            workers=workers, force=force, binary_store=binary_store, search_index=search_index,
+            overlap=True, archive=archive
+        )
+    except BaseException:
+        cancelled.set()
+        raise
+    finally:
+        producer.join()
+        if splitter is not None:
+            splitter.close()
+
+    if failure:
+        raise failure[0]
+    summary["slides"] = splitter.results if splitter is not None else []
+    return summary
+
+def _load_scan_state(metadata_file, incremental, rescan):
+    if not incremental:
+        return None
+    state = ScanState.load(metadata_file, {"hashed": False})
+    state.invalidate(rescan or [])
+    return state
+
+def run_manual_upload(course_path, metadata_dir, output_base_dir, workers=1, compact=False, force=False,
+                      binary_store=False, search_index=None, split_slides=False,
+                      instructions_name="split_instructions.json", slides_filename="slides.pdf",
+                      incremental=False, rescan=None, archive=False):
+    """
+    Pipeline for one manual_upload course directory.
+
+    The metadata is written to <metadata_dir>/<provider>/<course>.json, as
+    manual_upload/standardize_metadata.py does. With split_slides, week PDFs
+    are split first (in the background) so the new slides are picked up.
+    With incremental, directories unchanged since the previous run (and not
+    listed in rescan) are not scanned again.
+    """
+    course_path = os.path.abspath(course_path)
+    header = manual_upload.course_header(course_path)
+    provider_slug = os.path.basename(os.path.dirname(course_path))
+    metadata_file = os.path.join(metadata_dir, provider_slug, f"{header['course_slug']}.json")
+    state = _load_scan_state(metadata_file, incremental, rescan)
+
+    splitter = None
+    if split_slides:
+        splitter = _SlideSplitter(course_path, workers, instructions_name, slides_filename)
+    return run_pipeline(
+        header,
+        lambda before_module: manual_upload.iter_course_modules(course_path, before_module, state),
+        metadata_file, output_base_dir,
+        workers=workers, compact=compact, force=force, binary_store=binary_store,
+        search_index=search_index, splitter=splitter, scan_state=state, archive=archive
+    )
+
+def run_dl_coursera(json_file, metadata_file, output_base_dir, workers=1, compact=False, force=False,
+                    binary_store=False, search_index=None, split_slides=False,
+                    instructions_name="split_instructions.json", slides_filename="slides.pdf",
+                    incremental=False, rescan=None, archive=False):
+    """
+    Pipeline for one dl_coursera crawl JSON; its course folder sits next to the JSON file.
+
+    See run_manual_upload for incremental and rescan.
+    """
+    with open(json_file, 'r') as f:
+        data = json.load(f)
+    header = dl_coursera.course_header(data)
+    base_path = Path(json_file).parent
+    state = _load_scan_state(metadata_file, incremental, rescan)
+
+    splitter = None
+    if split_slides:
+        splitter = _SlideSplitter(
+            os.path.join(base_path, header["course_slug"]), workers, instructions_name, slides_filename
+        )
+    return run_pipeline(
+        header,
+        lambda before_module: dl_coursera.iter_standardized_modules(
+            data, base_path, before_module=before_module, state=state
+        ),
+        metadata_file, output_base_dir,
+        workers=workers, compact=compact, force=force, binary_store=binary_store,
+        search_index=search_index, splitter=splitter, scan_state=state, archive=archive
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Standardize a course, split its slides and format its transcripts in one pass."
+    )
+    subparsers = parser.add_subparsers(dest='source', required=True)
+
+    manual_parser = subparsers.add_parser('manual_upload', help="A course directory of manually uploaded data.")
+    manual_parser.add_argument('course_path', type=str, help="Path to crawled_data/manual_upload/<provider>/<course>.")
+    manual_parser.add_argument(
+        '--metadata_dir',
+        type=str,
+        default='crawled_metadata',
+        help="Metadata is written to <metadata_dir>/<provider>/<course>.json (default: crawled_metadata)."
+    )
+
+    dl_parser = subparsers.add_parser('dl_coursera', help="A course crawled with dl_coursera.")
+    dl_parser.add_argument('json_file', type=str, help="Path to the .crawl.json file.")
+    dl_parser.add_argument(
+        '--metadata_file',
+        type=str,
+        default=None,
+        help="Output metadata JSON (default: crawled_metadata/dl_coursera/<course>.json)."
+    )
+
+    for subparser in (manual_parser, dl_parser):
+        subparser.add_argument(
+            '--output_base_dir',
+            type=str,
+            default=None,
+            help="Base directory for structured transcripts (default: outputs/structured_transcripts/<source>)."
+        )
+        subparser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help="Worker processes for transcript formatting and slide splitting (default: 1)."
+        )
+        subparser.add_argument(
+            '--compact',
+            action='store_true',
+            help="Write non-indented metadata JSON (uses orjson when installed)."
+        )
+        subparser.add_argument(
+            '--force',
+            action='store_true',
+            help="Rebuild every transcript, ignoring the manifest of previous runs."
+        )
+        subparser.add_argument(
+            '--binary_store',
+            action='store_true',
+            help="Also pack the course's transcripts into a memory-mappable transcripts.bin."
+        )
+        subparser.add_argument(
+            '--search_index',
+            type=str,
+            default=None,
+            help="Update the full-text index at this path with the processed course."
+        )
+        subparser.add_argument(
+            '--archive',
+            action='store_true',
+            help="Pack the course's outputs into one transcripts.pack instead of per-item files."
+        )
+        subparser.add_argument(
+            '--split_slides',
+            action='store_true',
+            help="Split week PDFs according to their split_instructions.json first (requires PyPDF2)."
+        )
+        subparser.add_argument(
+            '--incremental',
+            action='store_true',
+            help="Reuse the previous metadata for directories unchanged since the last run."
+        )
+        metrics.add_cli_arguments(subparser)
+
+    args = parser.parse_args()
+    metrics.enable_from_args(args)
+    output_base_dir = args.output_base_dir or os.path.join('outputs/structured_transcripts', args.source)
+    options = dict(
+        workers=args.workers, compact=args.compact, force=args.force, binary_store=args.binary_store,
+        search_index=args.search_index, split_slides=args.split_slides, incremental=args.incremental,
+        archive=args.archive
+    )
+
+    try:
+        if args.source == 'manual_upload':
+            run_manual_upload(args.course_path, args.metadata_dir, output_base_dir, **options)
+        else:
+            metadata_file = args.metadata_file or os.path.join(
+                'crawled_metadata/dl_coursera', Path(args.json_file).name.replace('.crawl.json', '.json')
+            )
+            run_dl_coursera(args.json_file, metadata_file, output_base_dir, **options)
+        logger.info("Pipeline completed successfully.")
+    except FileNotFoundError as e:
+        logger.error(f"File not found: {e}")
+    except json.JSONDecodeError as e:
+        logger.error(f"JSON decoding error: {e}")
+    except Exception as e:
+        logger.exception(f"An unexpected error occurred: {e}")
+    finally:
+        metrics.write_from_args(args)
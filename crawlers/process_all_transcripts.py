@@ -1,10 +1,40 @@
 import os
+import sys
 import json
 import argparse
 import logging
-import re
+import shutil
+import tempfile
+from collections import deque
+from contextlib import ExitStack
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from transcript_formatter import parse_srt, generate_json_format, generate_txt_format
+
+try:
+    from crawlers import metrics
+    from crawlers.content_hash import hash_content_file
+    from crawlers.metadata_io import open_course_metadata
+    from crawlers.output_writer import OutputWriter
+    from crawlers.transcript_archive import ARCHIVE_FILE_NAME, TranscriptArchive, TranscriptArchiveWriter
+    from crawlers.transcript_chunks import (
+        CHUNK_FILE_NAME, CHUNK_UNITS, TranscriptChunker, chunking_key, write_chunk_lines
+    )
+    from crawlers.transcript_formatter import FORMATTER_VERSION, iter_transcript_segments, write_all_formats
+    from crawlers.transcript_search import TranscriptIndex
+    from crawlers.transcript_store import STORE_FILE_NAME, TranscriptStoreWriter
+except ImportError:  # executed as a script: python crawlers/process_all_transcripts.py
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from crawlers import metrics
+    from crawlers.content_hash import hash_content_file
+    from crawlers.metadata_io import open_course_metadata
+    from crawlers.output_writer import OutputWriter
+    from crawlers.transcript_archive import ARCHIVE_FILE_NAME, TranscriptArchive, TranscriptArchiveWriter
+    from crawlers.transcript_chunks import (
+        CHUNK_FILE_NAME, CHUNK_UNITS, TranscriptChunker, chunking_key, write_chunk_lines
+    )
+    from crawlers.transcript_formatter import FORMATTER_VERSION, iter_transcript_segments, write_all_formats
+    from crawlers.transcript_search import TranscriptIndex
+    from crawlers.transcript_store import STORE_FILE_NAME, TranscriptStoreWriter
 
 # Configure logging
 logging.basicConfig(
@@ -14,67 +44,424 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def create_output_path(base_output_dir, course_slug, module_slug, lesson_slug, item_slug):
-    """Create directory structure based on course metadata."""
-    path = os.path.join(base_output_dir, course_slug, module_slug, lesson_slug, item_slug)
-    Path(path).mkdir(parents=True, exist_ok=True)
-    logger.debug(f"Created output path: {path}")
-    return path
+# Written to <output_base_dir>/<course_slug>/ to drive incremental rebuilds
+MANIFEST_FILE_NAME = "transcripts.manifest.json"
 
-def process_all_transcripts(metadata_file, output_base_dir):
-    """Process all transcripts from the metadata JSON file."""
-    logger.info(f"Loading metadata from: {metadata_file}")
+# Background writer for transcript outputs: threads, and items queued before submit blocks
+WRITER_THREADS = 4
+WRITER_MAX_PENDING = 32
 
-    with open(metadata_file, 'r', encoding='utf-8') as f:
-        metadata = json.load(f)
+def iter_transcript_jobs(metadata, output_base_dir):
+    """
+    Yield one job per transcript in the metadata, in course order.
 
+    Each job is a plain dict so it can be shipped to worker processes.
+    """
     course_slug = metadata['course_slug']
-    logger.debug(f"Processing course: {course_slug}")
 
     for module in metadata['modules']:
-        module_slug = module['module_slug']
-        logger.info(f"Processing module: {module_slug}")
-
         for lesson in module['lessons']:
-            lesson_slug = lesson['lesson_slug']
-            logger.debug(f"Processing lesson: {lesson_slug}")
-
             for item in lesson['items']:
-                item_slug = item['transformed_slug']
-                logger.debug(f"Processing item: {item_slug}")
-
                 for content in item['content']:
                     if content['content_type'] == 'transcript':
-                        transcript_path = content['path']
-                        logger.debug(f"Processing transcript: {transcript_path}")
+                        yield {
+                            "output_base_dir": output_base_dir,
+                            "course_slug": course_slug,
+                            "module_slug": module['module_slug'],
+                            "lesson_slug": lesson['lesson_slug'],
+                            "item_slug": item['transformed_slug'],
+                            "transcript_path": content['path'],
+                        }
 
-                        if transcript_path.endswith('srt'):
-                            # Parse the transcript and generate outputs
-                            segments = parse_srt(transcript_path)
-                        elif transcript_path.endswith('txt'):
-                            # Parse the transcript and generate outputs
-                            with open(transcript_path, 'r', encoding='utf-8') as f:
-                                segments = []
-                                for line in f.readlines():
-                                    # Remove the initial timestamp using regex
-                                    stripped_text = re.sub(r'^\d{1,2}:\d{2}\s*', '', line.strip())
-                                    segments.append({"text": stripped_text})
+def _chunked(segments, job, chunk_file):
+    """Pass segments through while writing the job's chunks to chunk_file."""
+    chunking = job["chunking"]
+    chunker = TranscriptChunker(
+        chunking["size"], chunking["overlap"], chunking["unit"],
+        ids={key: job[key] for key in ("course_slug", "module_slug", "lesson_slug", "item_slug")}
+    )
+    for segment in segments:
+        write_chunk_lines(chunk_file, chunker.add(segment))
+        yield segment
+    write_chunk_lines(chunk_file, chunker.finish())
 
-                        output_path = create_output_path(
-                            output_base_dir, course_slug, module_slug, lesson_slug, item_slug
-                        )
+def _staged_file(staging_dir, files, file_name):
+    """Open a new, uniquely named temporary in staging_dir for files[file_name]."""
+    fd, path = tempfile.mkstemp(suffix=".tmp", dir=staging_dir)
+    files[file_name] = path
+    return open(fd, 'w', encoding='utf-8')
 
-                        output_json = os.path.join(output_path, 'transcript.json')
-                        output_txt = os.path.join(output_path, 'transcript.txt')
+def render_transcript(job):
+    """
+    Parse one transcript and stream its JSON and TXT outputs to staged files.
 
-                        # Generate both JSON and TXT formats
-                        generate_json_format(segments, output_json)
-                        generate_txt_format(segments, output_txt)
+    If the job has chunking settings, the JSON Lines chunk file is written
+    in the same pass. The files are temporaries in job["staging_dir"], on
+    the same filesystem as the outputs, so the caller only renames them
+    into place (see OutputWriter). Returns (output directory,
+    {file name: staged path}, segment count).
+    """
+    transcript_path = job["transcript_path"]
+    logger.debug(f"Processing transcript: {transcript_path}")
+
+    output_path = os.path.join(
+        job["output_base_dir"], job["course_slug"], job["module_slug"],
+        job["lesson_slug"], job["item_slug"]
+    )
 
-                        logger.debug(f"Saved JSON: {output_json}")
-                        logger.debug(f"Saved TXT: {output_txt}")
+    files = {}
+    try:
+        with ExitStack() as stack:
+            json_f = stack.enter_context(_staged_file(job["staging_dir"], files, 'transcript.json'))
+            txt_f = stack.enter_context(_staged_file(job["staging_dir"], files, 'transcript.txt'))
+            outputs = [json_f, txt_f]
+
+            # Stream the transcript straight into every format in one pass
+            segments = iter_transcript_segments(transcript_path)
+            if job.get("chunking"):
+                chunk_f = stack.enter_context(_staged_file(job["staging_dir"], files, CHUNK_FILE_NAME))
+                outputs.append(chunk_f)
+                segments = _chunked(segments, job, chunk_f)
+            with metrics.timer("format_transcript"):
+                segment_count = write_all_formats(segments, json_f, txt_f)
+            if metrics.enabled():
+                metrics.inc("bytes_written", sum(f.tell() for f in outputs))
+    except BaseException:
+        for path in files.values():
+            _remove_quietly(path)
+        raise
+    return output_path, files, segment_count
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def load_manifest(manifest_path):
+    """Load the per-course transcript manifest, or an empty one if there is none yet."""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f).get("transcripts", {})
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError:
+        logger.warning(f"Ignoring unreadable manifest: {manifest_path}")
+        return {}
+
+def save_manifest(manifest_path, entries):
+    """Atomically write the per-course transcript manifest."""
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"transcripts": entries}, f, indent=4, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+    logger.debug(f"Manifest saved: {manifest_path}")
+
+def _output_names(job):
+    names = ['transcript.json', 'transcript.txt']
+    if job.get("chunking"):
+        names.append(CHUNK_FILE_NAME)
+    return names
+
+def _outputs_exist(job):
+    if job.get("archive"):
+        # Checked against the previous archive by the parent
+        return job.get("archived", False)
+    output_path = os.path.join(
+        job["output_base_dir"], job["course_slug"], job["module_slug"],
+        job["lesson_slug"], job["item_slug"]
+    )
+    return all(os.path.exists(os.path.join(output_path, name)) for name in _output_names(job))
 
-    logger.info("All transcripts processed successfully.")
+def _same_settings(previous, job):
+    """Whether the manifest entry was built with the current formatter and chunk settings."""
+    return (previous.get("formatter_version") == FORMATTER_VERSION
+            and previous.get("chunking") == chunking_key(job.get("chunking")))
+
+def _is_unchanged_on_disk(job):
+    """Cheap check: same size, mtime and settings as the manifest entry."""
+    previous = job.get("previous")
+    if not previous or not _same_settings(previous, job):
+        return False
+    try:
+        st = os.stat(job["transcript_path"])
+        metrics.inc("files_statted")
+    except OSError:
+        return False
+    return (st.st_size == previous.get("size")
+            and st.st_mtime_ns == previous.get("mtime_ns")
+            and _outputs_exist(job))
+
+def _run_job(job):
+    """
+    Run render_transcript and capture the outcome instead of raising.
+
+    Keeps one bad transcript from aborting the rest of the course, and lets
+    worker processes report back to the parent, which does the logging.
+    The staged files are returned as result["outputs"] for the parent's
+    OutputWriter. A transcript whose content hash matches the manifest is
+    not rebuilt, even if its mtime changed.
+    """
+    if not job.get("collect_metrics"):
+        return _run_job_unmetered(job)
+
+    # In a worker process: measure this job alone and ship it back to the parent
+    metrics.enable()
+    before = metrics.snapshot()
+    result = _run_job_unmetered(job)
+    result["metrics"] = metrics.diff(metrics.snapshot(), before)
+    return result
+
+def _run_job_unmetered(job):
+    try:
+        st = os.stat(job["transcript_path"])
+        metrics.inc("files_statted")
+        fingerprint = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha256": hash_content_file(job["transcript_path"]),
+            "formatter_version": FORMATTER_VERSION,
+        }
+        if job.get("chunking"):
+            fingerprint["chunking"] = chunking_key(job["chunking"])
+        previous = job.get("previous") or {}
+        if (previous.get("sha256") == fingerprint["sha256"]
+                and _same_settings(previous, job)
+                and _outputs_exist(job)):
+            return {"segments": 0, "error": None, "skipped": True, "fingerprint": fingerprint}
+
+        output_path, files, segments = render_transcript(job)
+        return {
+            "segments": segments, "error": None, "skipped": False, "fingerprint": fingerprint,
+            "outputs": (output_path, files),
+        }
+    except Exception as e:
+        return {"segments": 0, "error": f"{type(e).__name__}: {e}", "skipped": False, "fingerprint": None}
+
+def build_transcript_store(jobs, store_path):
+    """
+    Pack the segments of every job into one binary store (see transcript_store).
+
+    Items are keyed "module_slug/lesson_slug/item_slug" and keep the
+    parsers' millisecond timings. Sources are re-read with the streaming parsers.
+    """
+    with TranscriptStoreWriter(store_path) as writer:
+        for job in jobs:
+            writer.add_item(store_key(job), iter_transcript_segments(job["transcript_path"]))
+    logger.info(f"Transcript store saved: {store_path}")
+
+def store_key(job):
+    return f"{job['module_slug']}/{job['lesson_slug']}/{job['item_slug']}"
+
+def process_all_transcripts(metadata_file, output_base_dir, workers=1, force=False, binary_store=False,
+                            search_index=None, chunking=None, archive=False):
+    """
+    Process all transcripts from the metadata JSON file.
+
+    With workers > 1 the per-transcript work is fanned out to a process pool.
+    Results are still logged in course order.
+
+    A manifest in the course's output directory records each source
+    transcript's size, mtime, content hash and the formatter version. Items
+    whose inputs are unchanged are skipped unless force is set.
+
+    With binary_store, the course's transcripts are also packed into
+    <output_base_dir>/<course_slug>/transcripts.bin for memory-mapped reads
+    (rebuilt only when some transcript changed or the store is missing).
+    With search_index, the course is then (incrementally) added to the
+    full-text index at that path (see transcript_search).
+
+    With chunking ({"size", "overlap", "unit"}, unit "chars" or "tokens"),
+    each item also gets a transcript.chunks.jsonl of overlapping, timed
+    windows for embedding jobs (see transcript_chunks).
+
+    With archive, the per-item files are not written; instead each course's
+    outputs are packed into <output_base_dir>/<course_slug>/transcripts.pack,
+    read back one file at a time with transcript_archive.TranscriptArchive.
+    Unchanged items are copied over from the previous archive. The search
+    index reads the per-item files, so it cannot be combined with archive.
+
+    Returns a summary with the number of transcripts rebuilt and skipped,
+    and the (path, error) pairs that failed.
+    """
+    logger.info(f"Loading metadata from: {metadata_file}")
+
+    # Modules are decoded one at a time; only the small job dicts are kept
+    header, modules = open_course_metadata(metadata_file)
+    return process_course_transcripts(
+        header['course_slug'], modules, output_base_dir,
+        workers=workers, force=force, binary_store=binary_store, search_index=search_index,
+        chunking=chunking, archive=archive
+    )
+
+def process_course_transcripts(course_slug, modules, output_base_dir, workers=1, force=False,
+                               binary_store=False, search_index=None, overlap=False, chunking=None,
+                               archive=False):
+    """
+    Format the transcripts of a course whose modules arrive as an iterable.
+
+    Jobs are dispatched as soon as their module is produced, so a streaming
+    producer (the metadata reader, or a standardizer in the fused pipeline)
+    overlaps with formatting. At most a few jobs per worker are in flight;
+    results are handled in course order. With workers == 1 the work runs
+    inline, or on one background thread if overlap is set. Output files
+    are written by a bounded background OutputWriter (or, with archive, to
+    the course archive in course order); write failures are reported with
+    the other failures once it has flushed.
+    See process_all_transcripts for the manifest, store, index, chunking
+    and archive options.
+    """
+    logger.debug(f"Processing course: {course_slug}")
+    if chunking:
+        TranscriptChunker(chunking["size"], chunking["overlap"], chunking["unit"])  # validate up front
+    if archive and search_index:
+        raise ValueError("search_index reads the per-item transcript files, which archive mode does not write")
+    manifest_path = os.path.join(output_base_dir, course_slug, MANIFEST_FILE_NAME)
+    previous_entries = {} if force else load_manifest(manifest_path)
+
+    archive_path = os.path.join(output_base_dir, course_slug, ARCHIVE_FILE_NAME)
+    previous_archive = None
+    if archive and not force and os.path.exists(archive_path):
+        try:
+            previous_archive = TranscriptArchive(archive_path)
+        except ValueError as e:
+            logger.warning(f"Rebuilding unreadable archive: {e}")
+
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    elif overlap:
+        executor = ThreadPoolExecutor(max_workers=1)
+    else:
+        executor = None
+    max_in_flight = max(1, workers) * 4
+
+    summary = {"processed": 0, "skipped": 0, "failed": []}
+    entries = {}
+    jobs = []
+    in_flight = deque()
+    current_module = None
+
+    def handle(job, outcome):
+        nonlocal current_module
+        if job["module_slug"] != current_module:
+            current_module = job["module_slug"]
+            logger.info(f"Processing module: {current_module}")
+
+        if outcome is None:
+            result = {"error": None, "skipped": True, "fingerprint": job["previous"]}
+        elif isinstance(outcome, Future):
+            result = outcome.result()
+            if job.get("collect_metrics"):
+                metrics.merge(result.get("metrics"))
+        else:
+            result = outcome
+
+        if result["error"] is not None:
+            summary["failed"].append((job["transcript_path"], result["error"]))
+            logger.error(f"Failed to process {job['transcript_path']}: {result['error']}")
+            if archive_writer is not None and job["archived"]:
+                # Keep the last good outputs, as the per-item files would be kept
+                archive_writer.copy_item(previous_archive, store_key(job))
+            return
+
+        entries[job["transcript_path"]] = result["fingerprint"]
+        if archive_writer is not None:
+            if result.get("outputs") is not None:
+                archive_writer.add_item(store_key(job), result["outputs"][1])
+            else:
+                archive_writer.copy_item(previous_archive, store_key(job))
+        elif result.get("outputs") is not None:
+            writer.submit(*result["outputs"], tag=job["transcript_path"])
+        if result["skipped"]:
+            summary["skipped"] += 1
+            logger.debug(f"Unchanged, skipped: {job['transcript_path']}")
+        else:
+            summary["processed"] += 1
+            logger.debug(f"Processed {job['transcript_path']} ({result['segments']} segments)")
+
+    writer = OutputWriter(workers=WRITER_THREADS, max_pending=WRITER_MAX_PENDING)
+    archive_writer = TranscriptArchiveWriter(archive_path) if archive else None
+    staging_dir = None
+    completed = False
+    try:
+        metadata = {"course_slug": course_slug, "modules": modules}
+        for job in iter_transcript_jobs(metadata, output_base_dir):
+            jobs.append(job)
+            job["previous"] = previous_entries.get(job["transcript_path"])
+            job["chunking"] = chunking
+            if archive:
+                job["archive"] = True
+                job["archived"] = (previous_archive is not None
+                                   and previous_archive.has_files(store_key(job), _output_names(job)))
+
+            if _is_unchanged_on_disk(job):
+                in_flight.append((job, None))
+            else:
+                if staging_dir is None:
+                    # Staged next to the outputs, so moving them into place is a rename
+                    course_dir = os.path.join(output_base_dir, course_slug)
+                    os.makedirs(course_dir, exist_ok=True)
+                    staging_dir = tempfile.mkdtemp(prefix=".staging-", dir=course_dir)
+                job["staging_dir"] = staging_dir
+                if executor is None:
+                    in_flight.append((job, _run_job(job)))
+                else:
+                    job["collect_metrics"] = workers > 1 and metrics.enabled()
+                    in_flight.append((job, executor.submit(_run_job, job)))
+
+            # Backpressure: handle the oldest results before queueing more work
+            while len(in_flight) > max_in_flight:
+                handle(*in_flight.popleft())
+
+        while in_flight:
+            handle(*in_flight.popleft())
+        completed = True
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        write_errors = writer.close()
+        if archive_writer is not None:
+            if completed and jobs:
+                archive_writer.close()
+                logger.info(f"Transcript archive saved: {archive_path}")
+            else:
+                archive_writer.abort()
+        if previous_archive is not None:
+            previous_archive.close()
+        if staging_dir is not None:
+            # Only leftovers of failed or abandoned items remain
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    for transcript_path, error in write_errors:
+        entries.pop(transcript_path, None)
+        summary["processed"] -= 1
+        summary["failed"].append((transcript_path, error))
+        logger.error(f"Failed to write outputs of {transcript_path}: {error}")
+
+    if jobs:
+        save_manifest(manifest_path, entries)
+
+    if binary_store and jobs:
+        store_path = os.path.join(output_base_dir, course_slug, STORE_FILE_NAME)
+        if summary["processed"] or summary["failed"] or force or not os.path.exists(store_path):
+            built = [job for job in jobs if job["transcript_path"] in entries]
+            build_transcript_store(built, store_path)
+
+    if search_index:
+        with TranscriptIndex(search_index) as index:
+            index.update_course(output_base_dir, course_slug)
+
+    logger.info(
+        f"Rebuilt {summary['processed']} transcripts, skipped {summary['skipped']} unchanged."
+    )
+    if summary["failed"]:
+        logger.warning(f"{len(summary['failed'])} transcripts failed:")
+        for transcript_path, error in summary["failed"]:
+            logger.warning(f"  {transcript_path}: {error}")
+    else:
+        logger.info("All transcripts processed successfully.")
+    return summary
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Process and format transcripts from metadata.")
@@ -103,15 +490,72 @@ if __name__ == "__main__":
         default='outputs/structured_transcripts/deeplearning',
         help="Base directory to store structured transcripts (default: outputs/structured_transcripts/deeplearning)."
     )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help="Number of worker processes used to format transcripts (default: 1)."
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help="Rebuild every transcript, ignoring the manifest of previous runs."
+    )
+    parser.add_argument(
+        '--binary_store',
+        action='store_true',
+        help="Also pack the course's transcripts into a memory-mappable transcripts.bin."
+    )
+    parser.add_argument(
+        '--search_index',
+        type=str,
+        default=None,
+        help="Update the full-text index at this path with the processed course."
+    )
+    parser.add_argument(
+        '--archive',
+        action='store_true',
+        help="Pack each course's outputs into one transcripts.pack instead of per-item files."
+    )
+    parser.add_argument(
+        '--chunk_size',
+        type=int,
+        default=None,
+        help="Also write transcript.chunks.jsonl per item, with chunks of up to this many units."
+    )
+    parser.add_argument(
+        '--chunk_overlap',
+        type=int,
+        default=0,
+        help="Units of overlap carried from one chunk into the next (default: 0)."
+    )
+    parser.add_argument(
+        '--chunk_unit',
+        choices=CHUNK_UNITS,
+        default='chars',
+        help="Measure chunks in characters or whitespace-separated tokens (default: chars)."
+    )
+    metrics.add_cli_arguments(parser)
 
     args = parser.parse_args()
+    metrics.enable_from_args(args)
 
     try:
         logger.info(f"Starting transcript processing with metadata: {args.metadata_file}")
-        process_all_transcripts(args.metadata_file, args.output_base_dir)
+        process_all_transcripts(
+            args.metadata_file, args.output_base_dir,
+            workers=args.workers, force=args.force, binary_store=args.binary_store,
+            search_index=args.search_index,
+            chunking=args.chunk_size and {
+                "size": args.chunk_size, "overlap": args.chunk_overlap, "unit": args.chunk_unit
+            },
+            archive=args.archive
+        )
     except FileNotFoundError as e:
         logger.error(f"File not found: {e}")
     except json.JSONDecodeError as e:
         logger.error(f"Invalid JSON format: {e}")
     except Exception as e:
         logger.exception(f"An unexpected error occurred: {e}")
+    finally:
+        metrics.write_from_args(args)
@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import logging
+
+try:
+    from crawlers import metrics
+    from crawlers.metadata_io import open_course_metadata
+except ImportError:  # executed as a script from within crawlers/
+    import metrics
+    from metadata_io import open_course_metadata
+
+logger = logging.getLogger(__name__)
+
+# Saved next to the metadata file; not .json so metadata globs skip it
+STATE_SUFFIX = ".scanstate"
+STATE_VERSION = 2
+
+# Directories modified this close to (or after) the start of the previous
+# scan may have changed within the same timestamp tick, so they are rescanned
+RACY_WINDOW_NS = 2_000_000_000
+
+def _signature(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_nlink]
+
+def _file_signature(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+class ScanState:
+    """
+    Directory signatures from the previous standardization of a course.
+
+    A directory whose mtime and link count (the number of subdirectories)
+    are unchanged since the last scan still has the same entries. Its
+    listing is therefore reused. An item is reused, with its content taken
+    from the previous metadata file, if every directory its content came
+    from is unchanged and every content file still has its recorded size
+    and mtime (a file rewritten in place does not touch its directory).
+    Callers that know of changes these checks cannot see, such as a copy
+    that preserved mtimes, pass them to invalidate().
+
+    Only what is looked up or recorded in this run is saved, so directories
+    that disappeared drop out of the state.
+    """
+
+    def __init__(self, options=None):
+        self.options = options or {}
+        self.started_ns = time.time_ns()
+        self._previous_started_ns = 0
+        self._previous_listings = {}
+        self._previous_items = {}
+        self._previous_content = {}
+        self._invalidated = ()
+        self._listings = {}
+        self._items = {}
+
+    @classmethod
+    def load(cls, metadata_file, options=None):
+        """State for metadata_file, or an empty one if there is no usable previous run."""
+        state = cls(options)
+        try:
+            with open(metadata_file + STATE_SUFFIX, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return state
+        if saved.get("version") != STATE_VERSION or saved.get("options") != state.options:
+            logger.info(f"Previous scan of {metadata_file} used other settings; rescanning everything")
+            return state
+
+        state._previous_started_ns = saved["started_ns"]
+        state._previous_listings = saved["listings"]
+        state._previous_items = saved["items"]
+        try:
+            _, modules = open_course_metadata(metadata_file)
+            for module in modules:
+                for lesson in module["lessons"]:
+                    for item in lesson["items"]:
+                        state._previous_content[item["path"]] = item["content"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError) as e:
+            logger.warning(f"Not reusing unreadable metadata {metadata_file}: {e}")
+            state._previous_content = {}
+        return state
+
+    def invalidate(self, paths):
+        """Force the given directories (and everything below them) to be rescanned."""
+        self._invalidated = tuple(os.path.join(os.path.abspath(path), "") for path in paths)
+
+    def _unchanged(self, path, signature):
+        if signature is None or signature[0] >= self._previous_started_ns - RACY_WINDOW_NS:
+            return False
+        if self._invalidated and os.path.join(os.path.abspath(path), "").startswith(self._invalidated):
+            return False
+        try:
+            return _signature(path) == signature
+        except OSError:
+            return False
+
+    def listing(self, path):
+        """The previous subdirectory names of path if it is unchanged, else None."""
+        previous = self._previous_listings.get(path)
+        if previous is None or not self._unchanged(path, previous["signature"]):
+            return None
+        self._listings[path] = previous
+        metrics.inc("directories_reused")
+        return previous["children"]
+
+    def record_listing(self, path, children):
+        try:
+            self._listings[path] = {"signature": _signature(path), "children": list(children)}
+        except OSError:
+            pass
+
+    def _file_unchanged(self, path, signature):
+        if signature[1] >= self._previous_started_ns - RACY_WINDOW_NS:
+            return False
+        try:
+            metrics.inc("files_statted")
+            return _file_signature(path) == signature
+        except OSError:
+            return False
+
+    def item_content(self, item_path):
+        """The previous content entries (dicts) of an unchanged item, else None."""
+        previous = self._previous_items.get(item_path)
+        content = self._previous_content.get(item_path)
+        if previous is None or content is None:
+            return None
+        if not all(self._unchanged(path, signature) for path, signature in previous["directories"].items()):
+            return None
+        if not all(self._file_unchanged(path, signature) for path, signature in previous["files"].items()):
+            return None
+        self._items[item_path] = previous
+        metrics.inc("directories_reused", len(previous["directories"]))
+        return content
+
+    def record_item(self, item_path, directories, files=()):
+        """Remember the directories an item's content was collected from, and its content files."""
+        try:
+            self._items[item_path] = {
+                "directories": {path: _signature(path) for path in directories},
+                "files": {path: _file_signature(path) for path in files},
+            }
+        except OSError:
+            self._items.pop(item_path, None)
+
+    def save(self, metadata_file):
+        state_file = metadata_file + STATE_SUFFIX
+        tmp_file = f"{state_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": STATE_VERSION,
+                "options": self.options,
+                "started_ns": self.started_ns,
+                "listings": self._listings,
+                "items": self._items,
+            }, f)
+        os.replace(tmp_file, state_file)
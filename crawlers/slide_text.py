@@ -0,0 +1,108 @@
+import os
+import sys
+import json
+import logging
+from pathlib import Path
+
+try:
+    from crawlers import metrics
+    from crawlers.content_hash import hash_content_file
+except ImportError:  # executed as a script from within crawlers/
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from crawlers import metrics
+    from crawlers.content_hash import hash_content_file
+
+logger = logging.getLogger(__name__)
+
+# Page text of a PDF is cached next to it as <name>.pages.jsonl: a header
+# line identifying the source PDF (its SHA-256, plus size and mtime so an
+# unchanged file is recognized without hashing it), then one
+# {"page": n, "text": ...} line per page, 1-based. The text is extracted by
+# utils/extract_slide_text.py (or split_week_slides.py --extract-text); this
+# module only reads and writes the sidecar, so it does not need PyPDF2.
+SIDECAR_SUFFIX = ".pages.jsonl"
+SIDECAR_VERSION = 1
+
+def sidecar_path(pdf_path):
+    return pdf_path + SIDECAR_SUFFIX
+
+def write_page_text(pdf_path, texts, source_sha256=None):
+    """
+    Write the text of each page of pdf_path to its sidecar; returns the sidecar path.
+
+    source_sha256 is computed if not given. The sidecar is renamed into
+    place once complete.
+    """
+    st = os.stat(pdf_path)
+    if source_sha256 is None:
+        source_sha256 = hash_content_file(pdf_path)
+    header = {
+        "version": SIDECAR_VERSION,
+        "source": os.path.basename(pdf_path),
+        "source_sha256": source_sha256,
+        "source_size": st.st_size,
+        "source_mtime_ns": st.st_mtime_ns,
+        "pages": len(texts),
+    }
+    path = sidecar_path(pdf_path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(header))
+        f.write("\n")
+        for page, text in enumerate(texts, 1):
+            f.write(json.dumps({"page": page, "text": text}))
+            f.write("\n")
+        metrics.inc("bytes_written", f.tell())
+    os.replace(tmp_path, path)
+    return path
+
+def read_sidecar_header(pdf_path):
+    """The header of pdf_path's sidecar, or None if there is no readable one."""
+    try:
+        with open(sidecar_path(pdf_path), 'r', encoding='utf-8') as f:
+            header = json.loads(f.readline())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if not isinstance(header, dict) or header.get("version") != SIDECAR_VERSION:
+        return None
+    return header
+
+def sidecar_is_current(pdf_path, header=None):
+    """
+    Whether the sidecar was extracted from the current contents of pdf_path.
+
+    The PDF is only hashed if its size matches but its mtime does not.
+    """
+    header = header or read_sidecar_header(pdf_path)
+    if header is None:
+        return False
+    try:
+        st = os.stat(pdf_path)
+    except FileNotFoundError:
+        return False
+    if st.st_size != header["source_size"]:
+        return False
+    if st.st_mtime_ns == header["source_mtime_ns"]:
+        return True
+    return hash_content_file(pdf_path) == header["source_sha256"]
+
+def iter_page_text(pdf_path, pages=None):
+    """
+    Yield (page number, text) from pdf_path's sidecar, reading one line at a time.
+
+    pages, if given, restricts the output to those page numbers. Raises
+    FileNotFoundError if the text has not been extracted.
+    """
+    wanted = set(pages) if pages is not None else None
+    with open(sidecar_path(pdf_path), 'r', encoding='utf-8') as f:
+        f.readline()  # header
+        for line in f:
+            entry = json.loads(line)
+            if wanted is None or entry["page"] in wanted:
+                yield entry["page"], entry["text"]
+
+def load_page_text(pdf_path, page):
+    """The text of one page (1-based) of pdf_path, from its sidecar."""
+    for _, text in iter_page_text(pdf_path, [page]):
+        return text
+    raise IndexError(f"{pdf_path} has no page {page}")
@@ -0,0 +1,182 @@
+import os
+import json
+import shutil
+import struct
+import logging
+
+try:
+    from crawlers import metrics
+except ImportError:  # executed as a script from within crawlers/
+    import metrics
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger(__name__)
+
+# File layout (all integers little-endian):
+#   header   magic, version, entry count, index offset, index size
+#   blobs    the files' UTF-8 bytes, back to back
+#   index    per file: key length (u16), UTF-8 key, blob offset (u64), blob length (u64)
+# Keys are "module_slug/lesson_slug/item_slug/file name". The header is
+# rewritten once the index has been appended, so the archive is written in
+# one sequential pass.
+ARCHIVE_MAGIC = b"CCTA"
+ARCHIVE_VERSION = 1
+ARCHIVE_FILE_NAME = "transcripts.pack"
+_HEADER = struct.Struct("<4sHHIQQ")
+_INDEX_ENTRY = struct.Struct("<QQ")
+_KEY_LENGTH = struct.Struct("<H")
+_COPY_BLOCK_SIZE = 1 << 20
+
+def _pread(fd, length, offset):
+    if hasattr(os, "pread"):
+        return os.pread(fd, length, offset)
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.read(fd, length)
+
+class TranscriptArchiveWriter:
+    """
+    Write the output files of many items into one archive.
+
+    Blobs are streamed to a temporary file next to archive_path as they are
+    added; close() appends the index and renames the archive into place.
+    """
+
+    def __init__(self, archive_path):
+        self.archive_path = archive_path
+        self.tmp_path = f"{archive_path}.tmp"
+        self.index = {}
+        os.makedirs(os.path.dirname(archive_path) or ".", exist_ok=True)
+        self._file = open(self.tmp_path, "wb")
+        self._file.write(b"\0" * _HEADER.size)
+
+    def _add(self, key, data):
+        # A repeated key points at its latest blob, as with the per-item files
+        self.index[key] = (self._file.tell(), len(data))
+        self._file.write(data)
+
+    def add_item(self, item_key, files):
+        """
+        Add an item's {file name: staged path} outputs, removing the staged files.
+
+        Each file is copied in blocks, so no output is held in memory whole.
+        """
+        for file_name, staged_path in files.items():
+            offset = self._file.tell()
+            with open(staged_path, "rb") as f:
+                shutil.copyfileobj(f, self._file, _COPY_BLOCK_SIZE)
+            self.index[f"{item_key}/{file_name}"] = (offset, self._file.tell() - offset)
+            os.remove(staged_path)
+
+    def copy_item(self, archive, item_key):
+        """Copy an item's files unchanged from another (open) TranscriptArchive."""
+        for file_name in archive.item_files(item_key):
+            self._add(f"{item_key}/{file_name}", archive.read(item_key, file_name))
+
+    def close(self):
+        index = bytearray()
+        for key, (offset, length) in self.index.items():
+            encoded = key.encode("utf-8")
+            index += _KEY_LENGTH.pack(len(encoded)) + encoded + _INDEX_ENTRY.pack(offset, length)
+        index_offset = self._file.tell()
+        self._file.write(index)
+        size = self._file.tell()
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(
+            ARCHIVE_MAGIC, ARCHIVE_VERSION, 0, len(self.index), index_offset, len(index)
+        ))
+        self._file.close()
+        os.replace(self.tmp_path, self.archive_path)
+        metrics.inc("bytes_written", size)
+        logger.debug(f"Transcript archive saved: {self.archive_path} ({len(self.index)} files)")
+
+    def abort(self):
+        """Discard the partial archive, leaving any previous one in place."""
+        self._file.close()
+        try:
+            os.remove(self.tmp_path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+class TranscriptArchive:
+    """
+    Random-access reader for an archive written by TranscriptArchiveWriter.
+
+    The index is loaded on open; each file is then fetched with one
+    positioned read at its offset. Safe to share between threads.
+    """
+
+    def __init__(self, archive_path):
+        self.archive_path = archive_path
+        self._fd = os.open(archive_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            header = _pread(self._fd, _HEADER.size, 0)
+            if len(header) < _HEADER.size:
+                raise ValueError(f"Truncated transcript archive: {archive_path}")
+            magic, version, _, entry_count, index_offset, index_size = _HEADER.unpack(header)
+            if magic != ARCHIVE_MAGIC or version != ARCHIVE_VERSION:
+                raise ValueError(f"Not a version {ARCHIVE_VERSION} transcript archive: {archive_path}")
+            index = _pread(self._fd, index_size, index_offset)
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+        self.index = {}
+        self._items = {}
+        pos = 0
+        for _ in range(entry_count):
+            (key_length,) = _KEY_LENGTH.unpack_from(index, pos)
+            pos += _KEY_LENGTH.size
+            key = index[pos:pos + key_length].decode("utf-8")
+            pos += key_length
+            self.index[key] = _INDEX_ENTRY.unpack_from(index, pos)
+            pos += _INDEX_ENTRY.size
+            item_key, file_name = key.rsplit("/", 1)
+            self._items.setdefault(item_key, []).append(file_name)
+
+    def keys(self):
+        """The item keys ("module_slug/lesson_slug/item_slug") in the archive."""
+        return self._items.keys()
+
+    def item_files(self, item_key):
+        return list(self._items.get(item_key, ()))
+
+    def has_files(self, item_key, file_names):
+        files = self._items.get(item_key, ())
+        return all(file_name in files for file_name in file_names)
+
+    def read(self, item_key, file_name="transcript.json"):
+        """Return the raw bytes of one item's file; KeyError if it is not archived."""
+        offset, length = self.index[f"{item_key}/{file_name}"]
+        metrics.inc("bytes_read", length)
+        return _pread(self._fd, length, offset)
+
+    def read_text(self, item_key, file_name="transcript.txt"):
+        return self.read(item_key, file_name).decode("utf-8")
+
+    def load_json(self, item_key, file_name="transcript.json"):
+        return json.loads(self.read(item_key, file_name))
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
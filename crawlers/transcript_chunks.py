@@ -0,0 +1,121 @@
+import re
+import json
+
+# Written next to transcript.json/transcript.txt when chunking is enabled
+CHUNK_FILE_NAME = "transcript.chunks.jsonl"
+
+CHUNK_UNITS = ("chars", "tokens")
+
+# Bump when the same settings would produce different chunks, so the
+# manifest (see chunking_key) rebuilds chunk files written by an older version
+CHUNKER_VERSION = 2
+
+# Whitespace-separated words; a tokenizer-free stand-in for model tokens
+WORD_PATTERN = re.compile(r"\S+")
+
+def _size_function(unit):
+    if unit == "chars":
+        return len
+    if unit == "tokens":
+        return lambda text: sum(1 for _ in WORD_PATTERN.finditer(text))
+    raise ValueError(f"Unknown chunk unit: {unit} (expected one of {', '.join(CHUNK_UNITS)})")
+
+def chunking_key(chunking):
+    """A short string identifying chunk settings, recorded in the manifest."""
+    if not chunking:
+        return None
+    return f"{chunking['unit']}:{chunking['size']}:{chunking['overlap']}:v{CHUNKER_VERSION}"
+
+class TranscriptChunker:
+    """
+    Groups a stream of segments into overlapping windows.
+
+    Chunks are made of whole segments: segments are added until the next
+    one would push the chunk past `size` (in characters or whitespace
+    tokens), and the next chunk starts with the trailing segments of the
+    previous one covering at least `overlap` units (but never all of them,
+    and only as many as fit in `size` next to the segment that follows).
+    A single segment larger than `size` becomes a chunk on its own. Every
+    chunk carries `ids` (course/module/lesson/item slugs), its segment
+    range and, when the segments have timings, start_ms/end_ms and the
+    matching timestamps.
+    """
+
+    def __init__(self, size, overlap=0, unit="chars", ids=None):
+        if size <= 0:
+            raise ValueError("Chunk size must be positive")
+        if not 0 <= overlap < size:
+            raise ValueError("Chunk overlap must be at least 0 and smaller than the chunk size")
+        self.size = size
+        self.overlap = overlap
+        self.measure = _size_function(unit)
+        # Segments are joined with a space, which only counts as a character
+        self.separator = 1 if unit == "chars" else 0
+        self.ids = ids or {}
+        self._window = []  # (segment index, segment, size)
+        self._window_size = 0
+        self._next_index = 0
+        self._emitted = 0
+        self._last_emitted_index = -1
+
+    def add(self, segment):
+        """Add the next segment; returns the chunks it completed (zero or one)."""
+        index, self._next_index = self._next_index, self._next_index + 1
+        size = self.measure(segment["text"])
+        chunks = []
+        if self._window and self._window_size + self.separator + size > self.size:
+            chunks.append(self._emit())
+            self._keep_overlap(size)
+        self._window.append((index, segment, size))
+        self._window_size += size + (self.separator if len(self._window) > 1 else 0)
+        return chunks
+
+    def finish(self):
+        """Return the final chunk, if any segments have not been emitted yet."""
+        if self._window and self._window[-1][0] > self._last_emitted_index:
+            return [self._emit()]
+        return []
+
+    def _keep_overlap(self, incoming_size):
+        kept, kept_size = [], 0
+        # Never carry the whole window over, so every chunk adds new segments
+        for entry in reversed(self._window[1:]):
+            if kept_size >= self.overlap:
+                break
+            kept.insert(0, entry)
+            kept_size += entry[2] + (self.separator if len(kept) > 1 else 0)
+        # The overlap gives way to the incoming segment: the next chunk must still fit in size
+        while kept and kept_size + self.separator + incoming_size > self.size:
+            dropped = kept.pop(0)
+            kept_size -= dropped[2] + (self.separator if kept else 0)
+        self._window, self._window_size = kept, kept_size
+
+    def _emit(self):
+        first, last = self._window[0], self._window[-1]
+        chunk = {
+            **self.ids,
+            "chunk": self._emitted,
+            "first_segment": first[0],
+            "last_segment": last[0],
+            "start_ms": first[1].get("start_ms"),
+            "end_ms": last[1].get("end_ms"),
+            "start_time": first[1].get("start_time"),
+            "end_time": last[1].get("end_time"),
+            "text": " ".join(s["text"] for _, s, _ in self._window if s["text"]),
+        }
+        self._emitted += 1
+        self._last_emitted_index = last[0]
+        return chunk
+
+def write_chunk_lines(f, chunks):
+    """Write chunks as JSON Lines."""
+    for chunk in chunks:
+        f.write(json.dumps(chunk))
+        f.write("\n")
+
+def iter_chunk_file(path):
+    """Stream the chunks of a transcript.chunks.jsonl file, one line at a time."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
@@ -1,9 +1,17 @@
+import os
 import re
+import html
 import json
+import itertools
 import argparse
 import logging
 from pathlib import Path
 
+try:
+    from crawlers import metrics
+except ImportError:  # executed as a script from within crawlers/
+    import metrics
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,  # Switch to DEBUG during development, INFO for production
@@ -12,47 +20,318 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def parse_srt(file_path):
-    """Parse an SRT file and extract segments with timestamps."""
+# Bump whenever the JSON/TXT output changes so incremental runs rebuild everything
+FORMATTER_VERSION = "3"
+
+# A cue's timing line, e.g. "00:01:02,345 --> 00:01:04,000"; groups 1 and 6
+# are the full timestamps, 2-5 and 7-10 their hour/minute/second/milli fields
+SRT_TIMING_PATTERN = re.compile(
+    r"^((\d{2}):(\d{2}):(\d{2}),(\d{3}))\s*-->\s*((\d{2}):(\d{2}):(\d{2}),(\d{3}))"
+)
+
+# Leading "m:ss" / "mm:ss" timestamp of a line in a plain text transcript
+TXT_TIMESTAMP_PATTERN = re.compile(r"^\d{1,2}:\d{2}\s*")
+
+# A WebVTT cue timing line; hours are optional, cue settings may follow
+VTT_TIMING_PATTERN = re.compile(
+    r"^((?:\d{2,}:)?\d{2}:\d{2}\.\d{3})[ \t]+-->[ \t]+((?:\d{2,}:)?\d{2}:\d{2}\.\d{3})"
+)
+VTT_TAG_PATTERN = re.compile(r"<[^>]*>")
+
+# Used to recognize a file's format from its first bytes
+SNIFF_BYTES = 4096
+SRT_SNIFF_PATTERN = re.compile(r"\A\s*(?:\d+[ \t]*\r?\n)?\d{2}:\d{2}:\d{2},\d{3}\s*-->")
+
+def _timing_ms(timing, first_group):
+    """Milliseconds from the numeric fields already captured by SRT_TIMING_PATTERN."""
+    hours, minutes, seconds, millis = timing.group(
+        first_group, first_group + 1, first_group + 2, first_group + 3
+    )
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(millis)
+
+def _build_srt_segment(block, start_line, last_sequence, file_path):
+    """
+    Turn the lines of one SRT cue into a segment.
+
+    Recovers cues that lost their sequence number by numbering them after the
+    previous cue; cues without a timing line are skipped with a warning.
+    """
+    if len(block) >= 2 and block[0].strip().isdigit() and SRT_TIMING_PATTERN.match(block[1]):
+        sequence = int(block[0].strip())
+        timing, text_lines = SRT_TIMING_PATTERN.match(block[1]), block[2:]
+    elif SRT_TIMING_PATTERN.match(block[0]):
+        sequence = last_sequence + 1
+        timing, text_lines = SRT_TIMING_PATTERN.match(block[0]), block[1:]
+        logger.warning(
+            f"Cue without sequence number at line {start_line} in {file_path}; "
+            f"numbering it {sequence}"
+        )
+    else:
+        logger.warning(f"Skipping malformed cue at line {start_line} in {file_path}")
+        return None
+
+    return {
+        "sequence": sequence,
+        "start_time": timing.group(1),
+        "end_time": timing.group(6),
+        "start_ms": _timing_ms(timing, 2),
+        "end_ms": _timing_ms(timing, 7),
+        "text": " ".join(text_lines).strip()
+    }
+
+def iter_srt_segments(file_path):
+    """
+    Stream segments from an SRT file, reading it line by line.
+
+    Cues are separated by blank lines. A cue that runs straight into the next
+    one (sequence and timing lines without a blank line in between) is split
+    where the new cue starts, so one broken cue never swallows the rest of the file.
+    """
     logger.debug(f"Attempting to parse SRT file: {file_path}")
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        f = open(file_path, 'r', encoding='utf-8-sig')
     except FileNotFoundError:
         logger.error(f"File not found: {file_path}")
-        return []
+        return
+
+    count = 0
+    last_sequence = 0
+    block, block_start = [], 0
+
+    def flush():
+        nonlocal count, last_sequence
+        segment = _build_srt_segment(block, block_start, last_sequence, file_path)
+        if segment is not None:
+            count += 1
+            last_sequence = segment["sequence"]
+        return segment
+
+    if metrics.enabled():
+        metrics.inc("bytes_read", os.fstat(f.fileno()).st_size)
+
+    with f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.rstrip('\r\n')
+
+            if not line.strip():
+                if block:
+                    segment = flush()
+                    if segment is not None:
+                        yield segment
+                    block = []
+                continue
+
+            # Missing blank line: "<n>" followed by a timing line inside a cue's text
+            if (len(block) > 2 and block[-1].strip().isdigit()
+                    and SRT_TIMING_PATTERN.match(line)):
+                next_sequence = block.pop()
+                segment = flush()
+                if segment is not None:
+                    yield segment
+                block, block_start = [next_sequence], line_number - 1
+
+            if not block:
+                block_start = line_number
+            block.append(line)
 
-    pattern = r"(\d+)\n(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})\n(.*?)(?:\n\n|\n*$)"
-    matches = re.findall(pattern, content, re.DOTALL)
+        if block:
+            segment = flush()
+            if segment is not None:
+                yield segment
 
-    segments = [
-        {
-            "sequence": int(match[0]),
-            "start_time": match[1],
-            "end_time": match[2],
-            "text": match[3].replace('\n', ' ').strip()
-        }
-        for match in matches
-    ]
+    metrics.inc("transcripts_parsed")
+    metrics.inc("segments_emitted", count)
+    logger.debug(f"Parsed {count} segments from {file_path}")
 
-    logger.debug(f"Parsed {len(segments)} segments from {file_path}")
-    return segments
+def parse_srt(file_path):
+    """Parse an SRT file and extract segments with timestamps."""
+    return list(iter_srt_segments(file_path))
+
+def ms_to_srt_timestamp(ms):
+    """Format integer milliseconds as an "HH:MM:SS,mmm" timestamp."""
+    hours, rest = divmod(ms, 3_600_000)
+    minutes, rest = divmod(rest, 60_000)
+    seconds, millis = divmod(rest, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{millis:03d}"
+
+def vtt_timestamp_to_ms(timestamp):
+    """Convert a WebVTT "[HH:]MM:SS.mmm" timestamp to integer milliseconds."""
+    *hours, minutes, rest = timestamp.split(":")
+    seconds, millis = rest.split(".")
+    return ((int(hours[0]) if hours else 0) * 3600 + int(minutes) * 60 + int(seconds)) * 1000 + int(millis)
+
+def iter_txt_segments(file_path):
+    """Stream segments from a plain text transcript, dropping leading timestamps."""
+    count = 0
+    strip_timestamp = TXT_TIMESTAMP_PATTERN.sub
+    with open(file_path, 'r', encoding='utf-8') as f:
+        if metrics.enabled():
+            metrics.inc("bytes_read", os.fstat(f.fileno()).st_size)
+        for line in f:
+            count += 1
+            yield {"text": strip_timestamp('', line.strip(), count=1)}
+    metrics.inc("transcripts_parsed")
+    metrics.inc("segments_emitted", count)
+
+def _build_vtt_segment(block, sequence):
+    """Turn the lines of one WebVTT block into a segment, or None for header/NOTE/STYLE blocks."""
+    for i, line in enumerate(block[:2]):
+        timing = VTT_TIMING_PATTERN.match(line)
+        if timing:
+            break
+    else:
+        return None
+
+    start_ms, end_ms = vtt_timestamp_to_ms(timing.group(1)), vtt_timestamp_to_ms(timing.group(2))
+    text = " ".join(VTT_TAG_PATTERN.sub("", line) for line in block[i + 1:])
+    return {
+        "sequence": sequence,
+        "start_time": ms_to_srt_timestamp(start_ms),
+        "end_time": ms_to_srt_timestamp(end_ms),
+        "start_ms": start_ms,
+        "end_ms": end_ms,
+        "text": html.unescape(text).strip()
+    }
+
+def iter_vtt_segments(file_path):
+    """
+    Stream segments from a WebVTT file, reading it line by line.
+
+    Segments have the same shape as SRT ones: timings are converted to
+    "HH:MM:SS,mmm" and milliseconds, cue identifiers are replaced by a
+    running sequence number, and markup tags are dropped from the text.
+    """
+    logger.debug(f"Attempting to parse WebVTT file: {file_path}")
+    count = 0
+    block = []
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        if metrics.enabled():
+            metrics.inc("bytes_read", os.fstat(f.fileno()).st_size)
+        if not f.readline().startswith("WEBVTT"):
+            raise ValueError(f"Missing WEBVTT header: {file_path}")
+
+        for line in itertools.chain(f, [""]):
+            line = line.rstrip('\r\n')
+            if line.strip():
+                block.append(line)
+                continue
+            if block:
+                segment = _build_vtt_segment(block, count + 1)
+                if segment is not None:
+                    count += 1
+                    yield segment
+                block = []
+
+    metrics.inc("transcripts_parsed")
+    metrics.inc("segments_emitted", count)
+    logger.debug(f"Parsed {count} segments from {file_path}")
+
+# name -> (file extensions, sniff(head text) -> bool, streaming parser); checked in order
+TRANSCRIPT_FORMATS = {}
+
+def register_transcript_format(name, extensions, sniff, parser):
+    """
+    Add a transcript format to the registry.
+
+    sniff gets the first SNIFF_BYTES of the file as text; formats are tried
+    in registration order and the extensions are only used when no sniffer
+    matches. parser(file_path) must return an iterable of segments.
+    """
+    TRANSCRIPT_FORMATS[name] = (tuple(extensions), sniff, parser)
+
+register_transcript_format("webvtt", (".vtt",), lambda head: head.startswith("WEBVTT"), iter_vtt_segments)
+register_transcript_format("srt", (".srt",), lambda head: SRT_SNIFF_PATTERN.match(head) is not None, iter_srt_segments)
+register_transcript_format("txt", (".txt",), lambda head: False, iter_txt_segments)
+
+def sniff_transcript_format(file_path):
+    """Return the registered format name of a transcript, from its first bytes or else its extension."""
+    with open(file_path, 'rb') as f:
+        head = f.read(SNIFF_BYTES).decode('utf-8', errors='ignore').lstrip('\ufeff')
+
+    for name, (_, sniff, _) in TRANSCRIPT_FORMATS.items():
+        if sniff(head):
+            return name
+    extension = os.path.splitext(file_path)[1].lower()
+    for name, (extensions, _, _) in TRANSCRIPT_FORMATS.items():
+        if extension in extensions:
+            return name
+    return None
+
+def iter_transcript_segments(file_path):
+    """Stream segments from a transcript in any registered format."""
+    name = sniff_transcript_format(file_path)
+    if name is None:
+        raise ValueError(f"Unsupported transcript format: {file_path}")
+    return TRANSCRIPT_FORMATS[name][2](file_path)
+
+def _write_json_segment(f, segment, first):
+    """Write one segment the way json.dump(..., indent=4) lays it out in the segments list."""
+    f.write("\n        " if first else ",\n        ")
+    f.write(json.dumps(segment, indent=4).replace("\n", "\n        "))
+
+def _write_json_footer(f, count):
+    f.write("\n    ]\n}" if count else "]\n}")
 
 def generate_json_format(segments, output_file):
-    """Generate a JSON file with transcript metadata."""
-    transcript_data = {"language": "en", "segments": segments}
+    """
+    Generate a JSON file with transcript metadata.
 
+    Segments may be any iterable (e.g. iter_srt_segments); they are written as
+    they arrive. Returns the number of segments written.
+    """
+    count = 0
     with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(transcript_data, f, indent=4)
+        f.write('{\n    "language": "en",\n    "segments": [')
+        for segment in segments:
+            _write_json_segment(f, segment, count == 0)
+            count += 1
+        _write_json_footer(f, count)
+        if metrics.enabled():
+            metrics.inc("bytes_written", f.tell())
     logger.debug(f"JSON transcript saved: {output_file}")
+    return count
 
 def generate_txt_format(segments, output_file):
-    """Generate a plain text transcript file."""
-    transcript_text = "\n".join([seg["text"] for seg in segments])
+    """
+    Generate a plain text transcript file.
 
+    Segments may be any iterable; returns the number of segments written.
+    """
+    count = 0
     with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(transcript_text)
+        for segment in segments:
+            f.write(segment["text"] if count == 0 else "\n" + segment["text"])
+            count += 1
+        if metrics.enabled():
+            metrics.inc("bytes_written", f.tell())
     logger.debug(f"Plain text transcript saved: {output_file}")
+    return count
+
+def write_all_formats(segments, json_f, txt_f):
+    """Write segments to open JSON and TXT text files in one pass; returns the segment count."""
+    count = 0
+    json_f.write('{\n    "language": "en",\n    "segments": [')
+    for segment in segments:
+        _write_json_segment(json_f, segment, count == 0)
+        txt_f.write(segment["text"] if count == 0 else "\n" + segment["text"])
+        count += 1
+    _write_json_footer(json_f, count)
+    return count
+
+def generate_all_formats(segments, output_json, output_txt):
+    """
+    Write the JSON and TXT transcripts in a single pass over segments.
+
+    Lets a streaming parser feed both outputs without materializing the
+    transcript. Returns the number of segments written.
+    """
+    with open(output_json, 'w', encoding='utf-8') as json_f, \
+            open(output_txt, 'w', encoding='utf-8') as txt_f:
+        count = write_all_formats(segments, json_f, txt_f)
+        if metrics.enabled():
+            metrics.inc("bytes_written", json_f.tell() + txt_f.tell())
+    logger.debug(f"Transcripts saved: {output_json}, {output_txt}")
+    return count
 
 if __name__ == "__main__":
     # Setup argument parser
@@ -80,11 +359,13 @@ if __name__ == "__main__":
 
     try:
         logger.debug(f"Processing SRT file: {args.input_file}")
-        segments = parse_srt(args.input_file)
+        segments = iter_srt_segments(args.input_file)
+        first_segment = next(segments, None)
 
-        if segments:
-            generate_json_format(segments, args.output_json)
-            generate_txt_format(segments, args.output_txt)
+        if first_segment is not None:
+            generate_all_formats(
+                itertools.chain([first_segment], segments), args.output_json, args.output_txt
+            )
             logger.debug("Transcript processing completed successfully.")
         else:
             logger.warning(f"No segments found in: {args.input_file}")
@@ -0,0 +1,227 @@
+import os
+import re
+import json
+import sqlite3
+import argparse
+import logging
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    course_slug TEXT NOT NULL,
+    module_slug TEXT NOT NULL,
+    lesson_slug TEXT NOT NULL,
+    item_slug TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    UNIQUE (course_slug, module_slug, lesson_slug, item_slug)
+);
+CREATE TABLE IF NOT EXISTS segments (
+    item_id INTEGER NOT NULL REFERENCES items(id) ON DELETE CASCADE,
+    segment INTEGER NOT NULL,
+    start_ms INTEGER,
+    end_ms INTEGER,
+    text TEXT NOT NULL,
+    PRIMARY KEY (item_id, segment)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    item_id INTEGER NOT NULL REFERENCES items(id) ON DELETE CASCADE,
+    segment INTEGER NOT NULL,
+    PRIMARY KEY (term, item_id, segment)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_item ON postings (item_id);
+"""
+
+def tokenize(text):
+    """Lowercased word tokens of a segment or query."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+def iter_structured_transcripts(output_base_dir, course_slug):
+    """Yield (module, lesson, item, transcript.json path) for one processed course."""
+    course_path = os.path.join(output_base_dir, course_slug)
+    for module in sorted(e.name for e in os.scandir(course_path) if e.is_dir()):
+        module_path = os.path.join(course_path, module)
+        for lesson in sorted(e.name for e in os.scandir(module_path) if e.is_dir()):
+            lesson_path = os.path.join(module_path, lesson)
+            for item in sorted(e.name for e in os.scandir(lesson_path) if e.is_dir()):
+                transcript_json = os.path.join(lesson_path, item, 'transcript.json')
+                if os.path.exists(transcript_json):
+                    yield module, lesson, item, transcript_json
+
+class TranscriptIndex:
+    """
+    On-disk inverted index over the output of process_all_transcripts.
+
+    Terms map to (item, segment) postings; items record the course, module,
+    lesson and item slugs and segments keep their timings and text, so a
+    query is answered from the index alone. Updates are incremental per item,
+    keyed on the size and mtime of each transcript.json.
+    """
+
+    def __init__(self, index_path):
+        self.index_path = index_path
+        if os.path.dirname(index_path):
+            os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        self.conn = sqlite3.connect(index_path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _index_item(self, item_id, transcript_json):
+        with open(transcript_json, 'r', encoding='utf-8') as f:
+            segments = json.load(f)["segments"]
+
+        segment_rows, posting_rows = [], []
+        for i, segment in enumerate(segments):
+            segment_rows.append((item_id, i, segment.get("start_ms"), segment.get("end_ms"), segment["text"]))
+            posting_rows.extend((term, item_id, i) for term in set(tokenize(segment["text"])))
+        self.conn.executemany("INSERT INTO segments VALUES (?, ?, ?, ?, ?)", segment_rows)
+        self.conn.executemany("INSERT INTO postings VALUES (?, ?, ?)", posting_rows)
+        return len(segments)
+
+    def update_course(self, output_base_dir, course_slug):
+        """
+        Bring one course in line with its processed transcripts.
+
+        New and changed items are (re)indexed, unchanged ones are left alone
+        and items that disappeared are dropped. Returns (indexed, unchanged, removed).
+        """
+        known = {
+            (module, lesson, item): (item_id, size, mtime_ns)
+            for item_id, module, lesson, item, size, mtime_ns in self.conn.execute(
+                "SELECT id, module_slug, lesson_slug, item_slug, size, mtime_ns "
+                "FROM items WHERE course_slug = ?", (course_slug,)
+            )
+        }
+
+        indexed = unchanged = 0
+        with self.conn:
+            for module, lesson, item, transcript_json in iter_structured_transcripts(output_base_dir, course_slug):
+                st = os.stat(transcript_json)
+                previous = known.pop((module, lesson, item), None)
+                if previous and previous[1:] == (st.st_size, st.st_mtime_ns):
+                    unchanged += 1
+                    continue
+                if previous:
+                    self.conn.execute("DELETE FROM items WHERE id = ?", (previous[0],))
+
+                item_id = self.conn.execute(
+                    "INSERT INTO items (course_slug, module_slug, lesson_slug, item_slug, path, size, mtime_ns) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (course_slug, module, lesson, item, transcript_json, st.st_size, st.st_mtime_ns)
+                ).lastrowid
+                self._index_item(item_id, transcript_json)
+                indexed += 1
+
+            self.conn.executemany(
+                "DELETE FROM items WHERE id = ?", [(item_id,) for item_id, _, _ in known.values()]
+            )
+
+        logger.info(
+            f"Indexed {course_slug}: {indexed} items updated, {unchanged} unchanged, {len(known)} removed"
+        )
+        return indexed, unchanged, len(known)
+
+    def update(self, output_base_dir, course_slugs=None):
+        """Update the given courses, or every course under output_base_dir."""
+        if course_slugs is None:
+            course_slugs = sorted(e.name for e in os.scandir(output_base_dir) if e.is_dir())
+        for course_slug in course_slugs:
+            self.update_course(output_base_dir, course_slug)
+
+    def search(self, query, limit=50):
+        """
+        Return the segments containing every term of the query.
+
+        Each hit carries the course/module/lesson/item slugs, the segment
+        number, its timings and text, in course order.
+        """
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return []
+
+        placeholders = ", ".join("?" for _ in terms)
+        rows = self.conn.execute(
+            f"""
+            SELECT i.course_slug, i.module_slug, i.lesson_slug, i.item_slug,
+                   s.segment, s.start_ms, s.end_ms, s.text
+            FROM (
+                SELECT item_id, segment FROM postings
+                WHERE term IN ({placeholders})
+                GROUP BY item_id, segment
+                HAVING COUNT(*) = ?
+            ) AS hits
+            JOIN items AS i ON i.id = hits.item_id
+            JOIN segments AS s ON s.item_id = hits.item_id AND s.segment = hits.segment
+            ORDER BY i.course_slug, i.module_slug, i.lesson_slug, i.item_slug, s.segment
+            LIMIT ?
+            """,
+            (*terms, len(terms), limit)
+        )
+        keys = ("course_slug", "module_slug", "lesson_slug", "item_slug", "segment", "start_ms", "end_ms", "text")
+        return [dict(zip(keys, row)) for row in rows]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the full-text index over processed transcripts.")
+    parser.add_argument(
+        '--index_file',
+        type=str,
+        default='outputs/transcript_index.sqlite',
+        help="Path to the index database (default: outputs/transcript_index.sqlite)."
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    update_parser = subparsers.add_parser('update', help="Index new and changed transcripts.")
+    update_parser.add_argument(
+        '--output_base_dir',
+        type=str,
+        default='outputs/structured_transcripts/deeplearning',
+        help="Base directory written by process_all_transcripts."
+    )
+    update_parser.add_argument(
+        '--course',
+        action='append',
+        help="Only update this course slug (repeatable; default: every course)."
+    )
+
+    query_parser = subparsers.add_parser('query', help="Find segments containing all query terms.")
+    query_parser.add_argument('query', type=str, help="Search terms.")
+    query_parser.add_argument('--limit', type=int, default=50, help="Maximum number of hits (default: 50).")
+
+    args = parser.parse_args()
+
+    try:
+        with TranscriptIndex(args.index_file) as index:
+            if args.command == 'update':
+                index.update(args.output_base_dir, args.course)
+            else:
+                for hit in index.search(args.query, args.limit):
+                    print(
+                        f"{hit['course_slug']}/{hit['module_slug']}/{hit['lesson_slug']}/{hit['item_slug']}"
+                        f" #{hit['segment']} [{hit['start_ms']}-{hit['end_ms']}] {hit['text']}"
+                    )
+    except FileNotFoundError as e:
+        logger.error(f"File not found: {e}")
+    except Exception as e:
+        logger.exception(f"An unexpected error occurred: {e}")
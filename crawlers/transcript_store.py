@@ -0,0 +1,194 @@
+import os
+import sys
+import mmap
+import struct
+import logging
+from array import array
+
+try:
+    from crawlers.transcript_timeline import TranscriptTimeline
+except ImportError:  # executed as a script from within crawlers/
+    from transcript_timeline import TranscriptTimeline
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger(__name__)
+
+# File layout (all integers little-endian):
+#   header   magic, version, item count, segment count, index size, text size
+#   index    per item: key length (u16), UTF-8 key, first segment (u32), segment count (u32)
+#   padding  to an 8-byte boundary
+#   start_ms int64[segment count]   (-1 when the transcript has no timing)
+#   end_ms   int64[segment count]
+#   offsets  uint64[segment count + 1] into the text blob
+#   text     UTF-8 segment texts, back to back
+STORE_MAGIC = b"CCTS"
+STORE_VERSION = 1
+STORE_FILE_NAME = "transcripts.bin"
+_HEADER = struct.Struct("<4sHHIQQQ")
+_INDEX_ENTRY = struct.Struct("<II")
+_KEY_LENGTH = struct.Struct("<H")
+
+def _pad8(size):
+    return -size % 8
+
+def _little_endian(values):
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+class TranscriptStoreWriter:
+    """
+    Collect the segments of many items and write them as one binary store.
+
+    Times and text offsets are kept in compact typed arrays until close(),
+    which writes the file next to its final path and renames it into place.
+    """
+
+    def __init__(self, store_path):
+        self.store_path = store_path
+        self.index = {}
+        self.start_ms = array("q")
+        self.end_ms = array("q")
+        self.offsets = array("Q", [0])
+        self.text = bytearray()
+
+    def add_item(self, key, segments):
+        """Append an item's segments (dicts with "text" and optional start_ms/end_ms)."""
+        first = len(self.start_ms)
+        for segment in segments:
+            self.start_ms.append(segment.get("start_ms", -1))
+            self.end_ms.append(segment.get("end_ms", -1))
+            self.text += segment["text"].encode("utf-8")
+            self.offsets.append(len(self.text))
+        # A repeated key points at its latest segments, as with the per-item files
+        self.index[key] = (first, len(self.start_ms) - first)
+        return len(self.start_ms) - first
+
+    def close(self):
+        index = bytearray()
+        for key, (first, count) in self.index.items():
+            encoded = key.encode("utf-8")
+            index += _KEY_LENGTH.pack(len(encoded)) + encoded + _INDEX_ENTRY.pack(first, count)
+        index += b"\0" * _pad8(_HEADER.size + len(index))
+
+        os.makedirs(os.path.dirname(self.store_path) or ".", exist_ok=True)
+        tmp_path = f"{self.store_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(
+                STORE_MAGIC, STORE_VERSION, 0, len(self.index), len(self.start_ms),
+                len(index), len(self.text)
+            ))
+            f.write(index)
+            _little_endian(self.start_ms).tofile(f)
+            _little_endian(self.end_ms).tofile(f)
+            _little_endian(self.offsets).tofile(f)
+            f.write(self.text)
+        os.replace(tmp_path, self.store_path)
+        logger.debug(
+            f"Transcript store saved: {self.store_path} "
+            f"({len(self.index)} items, {len(self.start_ms)} segments)"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+class TranscriptStore:
+    """
+    Memory-mapped reader for a store written by TranscriptStoreWriter.
+
+    Segments are returned by global index or by item key straight from the
+    mapped arrays; nothing is decoded until it is asked for.
+    """
+
+    def __init__(self, store_path):
+        self.store_path = store_path
+        with open(store_path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, item_count, segment_count, index_size, text_size = _HEADER.unpack_from(self._mm, 0)
+        if magic != STORE_MAGIC or version != STORE_VERSION:
+            self._mm.close()
+            raise ValueError(f"Not a version {STORE_VERSION} transcript store: {store_path}")
+
+        self.index = {}
+        pos = _HEADER.size
+        for _ in range(item_count):
+            (key_length,) = _KEY_LENGTH.unpack_from(self._mm, pos)
+            pos += _KEY_LENGTH.size
+            key = self._mm[pos:pos + key_length].decode("utf-8")
+            pos += key_length
+            self.index[key] = _INDEX_ENTRY.unpack_from(self._mm, pos)
+            pos += _INDEX_ENTRY.size
+
+        arrays_start = _HEADER.size + index_size
+        self._view = memoryview(self._mm)
+        self.start_ms = self._typed_view(arrays_start, segment_count, "q")
+        self.end_ms = self._typed_view(arrays_start + 8 * segment_count, segment_count, "q")
+        self.offsets = self._typed_view(arrays_start + 16 * segment_count, segment_count + 1, "Q")
+        self._text_start = arrays_start + 8 * (3 * segment_count + 1)
+
+    def _typed_view(self, start, count, typecode):
+        view = self._view[start:start + 8 * count]
+        if sys.byteorder == "little":
+            return view.cast(typecode)
+        values = array(typecode, view.tobytes())
+        values.byteswap()
+        return values
+
+    def __len__(self):
+        return len(self.start_ms)
+
+    def keys(self):
+        return self.index.keys()
+
+    def text(self, i):
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self._mm[self._text_start + start:self._text_start + end].decode("utf-8")
+
+    def segment(self, i):
+        """Return segment i as a dict; times are None for untimed transcripts."""
+        if not 0 <= i < len(self):
+            raise IndexError(f"Segment index out of range: {i}")
+        start_ms, end_ms = self.start_ms[i], self.end_ms[i]
+        return {
+            "start_ms": None if start_ms < 0 else start_ms,
+            "end_ms": None if end_ms < 0 else end_ms,
+            "text": self.text(i),
+        }
+
+    def item_range(self, key):
+        """Return the (first, count) global segment range of an item."""
+        return self.index[key]
+
+    def item_segments(self, key):
+        first, count = self.index[key]
+        return [self.segment(i) for i in range(first, first + count)]
+
+    def timeline(self, key):
+        """Return a TranscriptTimeline for time-window lookups within one item."""
+        return TranscriptTimeline(self.item_segments(key))
+
+    def close(self):
+        # Views into the map must be released before it can be closed
+        for name in ("start_ms", "end_ms", "offsets"):
+            values = getattr(self, name, None)
+            if isinstance(values, memoryview):
+                values.release()
+        self._view.release()
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
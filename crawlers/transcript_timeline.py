@@ -0,0 +1,45 @@
+import json
+from array import array
+from bisect import bisect_left, bisect_right
+
+class TranscriptTimeline:
+    """
+    Binary-search index over segment timings.
+
+    Built once from segments carrying start_ms/end_ms (untimed segments are
+    ignored); each lookup then costs O(log n + matches). Cues may overlap or
+    be out of order: segments are sorted by start, and a running maximum of
+    end times keeps the search for the first overlapping cue monotonic.
+    """
+
+    def __init__(self, segments):
+        timed = [s for s in segments if s.get("start_ms") is not None and s["start_ms"] >= 0]
+        timed.sort(key=lambda s: s["start_ms"])
+        self.segments = timed
+        self.starts = array("q", (s["start_ms"] for s in timed))
+        self.max_ends = array("q")
+        running = -1
+        for s in timed:
+            running = max(running, s["end_ms"])
+            self.max_ends.append(running)
+
+    @classmethod
+    def from_json(cls, transcript_json_path):
+        """Build a timeline from a transcript.json written by process_all_transcripts."""
+        with open(transcript_json_path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f)["segments"])
+
+    def __len__(self):
+        return len(self.segments)
+
+    def overlapping(self, start_ms, end_ms):
+        """Return the segments overlapping the half-open window [start_ms, end_ms)."""
+        # First segment that could still be running at start_ms
+        lo = bisect_right(self.max_ends, start_ms)
+        # Segments starting at or after end_ms cannot overlap
+        hi = bisect_left(self.starts, end_ms, lo)
+        return [s for s in self.segments[lo:hi] if s["end_ms"] > start_ms]
+
+    def at(self, ms):
+        """Return the segments being spoken at ms, e.g. "what was said at minute 12"."""
+        return self.overlapping(ms, ms + 1)
@@ -0,0 +1,405 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import argparse
+import logging
+import threading
+from pathlib import Path
+
+try:
+    from crawlers import metrics
+    from crawlers.pipeline import run_dl_coursera, run_manual_upload
+except ImportError:  # executed as a script: python crawlers/watch.py
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from crawlers import metrics
+    from crawlers.pipeline import run_dl_coursera, run_manual_upload
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger(__name__)
+
+# Partial downloads and temporary files never trigger a run
+IGNORED_SUFFIXES = (".tmp", ".part", ".crdownload", ".swp")
+
+# inotify(7) flags
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+class InotifyWatcher:
+    """
+    Recursive directory watcher on Linux inotify, through libc (no extra dependency).
+
+    New directories are watched as soon as they appear and are reported as
+    changed themselves, so files created before their watch was added are
+    not missed. A queue overflow reports the root, i.e. "rescan everything".
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._paths = {}
+        self._watch_tree(self.root)
+
+    def _watch_tree(self, top):
+        for directory, dirs, _ in os.walk(top):
+            wd = self._add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error == errno.ENOSPC:
+                    raise OSError(error, "inotify watch limit reached (fs.inotify.max_user_watches)")
+                continue  # removed while walking
+            self._paths[wd] = directory
+
+    def poll(self, timeout):
+        """Wait up to timeout seconds; return the set of changed paths (possibly empty)."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                name = data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length].rstrip(b"\0")
+                offset += _EVENT_HEADER.size + length
+
+                if mask & IN_Q_OVERFLOW:
+                    logger.warning("inotify queue overflowed; rescanning everything")
+                    changed.add(self.root)
+                    continue
+                if mask & IN_IGNORED:
+                    self._paths.pop(wd, None)
+                    continue
+                directory = self._paths.get(wd)
+                if directory is None:
+                    continue
+                path = os.path.join(directory, os.fsdecode(name)) if name else directory
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    self._watch_tree(path)
+                changed.add(path)
+        metrics.inc("watch_events", len(changed))
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """
+    Fallback watcher comparing (mtime, size) snapshots of the tree every interval.
+
+    Only stats files; nothing is re-standardized unless a snapshot differs.
+    """
+
+    def __init__(self, root, interval=2.0):
+        self.root = os.path.abspath(root)
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        stack = [self.root]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            st = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        snapshot[entry.path] = (st.st_mtime_ns, st.st_size)
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+            except OSError:
+                continue
+        return snapshot
+
+    def poll(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        snapshot = self._scan()
+        previous, self._snapshot = self._snapshot, snapshot
+        changed = {path for path, state in snapshot.items() if previous.get(path) != state}
+        changed.update(path for path in previous if path not in snapshot)
+        return changed
+
+    def close(self):
+        pass
+
+def open_watcher(root, poll_interval=2.0, use_inotify=True):
+    """An InotifyWatcher where available, else a PollingWatcher."""
+    if use_inotify and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError) as e:
+            logger.warning(f"inotify unavailable ({e}); polling every {poll_interval}s instead")
+    return PollingWatcher(root, poll_interval)
+
+def next_batch(watcher, settle=1.0, max_latency=10.0, stop=None):
+    """
+    Block until something changes, then keep collecting until the tree has
+    been quiet for `settle` seconds (or `max_latency` has passed).
+
+    Returns the set of changed paths, or an empty set if stop was set.
+    """
+    changed = set()
+    while not changed:
+        if stop is not None and stop.is_set():
+            return set()
+        changed = _relevant(watcher.poll(settle))
+
+    first = time.monotonic()
+    while time.monotonic() - first < max_latency:
+        more = _relevant(watcher.poll(settle))
+        if not more:
+            break
+        changed |= more
+    return changed
+
+def _relevant(paths):
+    return {
+        path for path in paths
+        if not os.path.basename(path).startswith(".") and not path.endswith(IGNORED_SUFFIXES)
+    }
+
+def group_changes(root, paths):
+    """
+    Map changed paths under crawled_data/ to the courses to rebuild.
+
+    Returns {(source, course path or crawl JSON): set of changed item paths
+    relative to the course ("module/lesson/item"; empty if the course
+    itself changed)}. Paths outside a known layout are ignored.
+    """
+    root = os.path.abspath(root)
+    courses = {}
+
+    def add(key, item=None):
+        items = courses.setdefault(key, set())
+        if item:
+            items.add(item)
+
+    for path in paths:
+        parts = os.path.relpath(path, root).split(os.sep)
+        if parts[0] == os.pardir:
+            continue
+        if parts[0] == ".":
+            # Everything may have changed (e.g. an inotify overflow)
+            for key in _all_courses(root):
+                add(key)
+            continue
+
+        source = parts[0]
+        if source == "manual_upload" and len(parts) >= 2:
+            provider_path = os.path.join(root, source, parts[1])
+            if len(parts) == 2:
+                for course_path in _subdirectories(provider_path):
+                    add((source, course_path))
+            elif os.path.isdir(os.path.join(provider_path, parts[2])):
+                add((source, os.path.join(provider_path, parts[2])), os.sep.join(parts[3:6]))
+        elif source == "dl_coursera" and len(parts) >= 2:
+            slug = parts[1][:-len(".crawl.json")] if parts[1].endswith(".crawl.json") else parts[1]
+            json_file = os.path.join(root, source, f"{slug}.crawl.json")
+            if os.path.exists(json_file):
+                add((source, json_file), os.sep.join(parts[2:5]))
+    return courses
+
+def _subdirectories(path):
+    try:
+        with os.scandir(path) as entries:
+            return sorted(entry.path for entry in entries if entry.is_dir())
+    except OSError:
+        return []
+
+def _all_courses(root):
+    for provider_path in _subdirectories(os.path.join(root, "manual_upload")):
+        for course_path in _subdirectories(provider_path):
+            yield ("manual_upload", course_path)
+    dl_path = os.path.join(root, "dl_coursera")
+    for name in sorted(os.listdir(dl_path)) if os.path.isdir(dl_path) else []:
+        if name.endswith(".crawl.json"):
+            yield ("dl_coursera", os.path.join(dl_path, name))
+
+def _rescan_paths(source, target, items):
+    """Absolute directories to rescan for a group_changes entry (the whole course if no items)."""
+    if source == "manual_upload":
+        course_path = target
+    else:
+        course_path = os.path.join(os.path.dirname(target), os.path.basename(target)[:-len(".crawl.json")])
+    if not items:
+        return [course_path]
+    return [os.path.join(course_path, item) for item in sorted(items)]
+
+def process_changes(courses, metadata_dir, transcripts_dir, incremental=True, **options):
+    """
+    Re-run the fused pipeline for each changed course.
+
+    With incremental, only the changed items (or the whole course, if no
+    items are known) are rescanned; the rest of the metadata is reused
+    from the previous run. A failing course is logged and does not stop
+    the others. Returns {(source, course): summary or None if it failed}.
+    """
+    results = {}
+    for (source, target), items in sorted(courses.items()):
+        changed = f"{len(items)} changed items" if items else "course changed"
+        logger.info(f"Updating {source} course {target} ({changed})")
+        for item in sorted(items):
+            logger.debug(f"  changed: {item}")
+        output_base_dir = os.path.join(transcripts_dir, source)
+        rescan = _rescan_paths(source, target, items) if incremental else None
+        try:
+            with metrics.timer("watch_update_course"):
+                if source == "manual_upload":
+                    results[(source, target)] = run_manual_upload(
+                        target, metadata_dir, output_base_dir,
+                        incremental=incremental, rescan=rescan, **options
+                    )
+                else:
+                    metadata_file = os.path.join(
+                        metadata_dir, source, os.path.basename(target).replace(".crawl.json", ".json")
+                    )
+                    results[(source, target)] = run_dl_coursera(
+                        target, metadata_file, output_base_dir,
+                        incremental=incremental, rescan=rescan, **options
+                    )
+        except Exception as e:
+            logger.exception(f"Failed to update {target}: {e}")
+            results[(source, target)] = None
+    return results
+
+def watch_crawled_data(root, metadata_dir, transcripts_dir, settle=1.0, max_latency=10.0, poll_interval=2.0,
+                       use_inotify=True, initial_run=False, stop=None, **options):
+    """
+    Watch root (crawled_data/) and rebuild the courses whose files change.
+
+    Events are batched until the tree has been quiet for `settle` seconds,
+    mapped to courses and items with group_changes and handed to the fused
+    pipeline (see pipeline.py; options are passed through, e.g. workers).
+    Transcript formatting stays incremental through each course's manifest
+    and standardization through its scan state (see scan_state.py). If the
+    watcher fails (say inotify runs out of watches), watching continues
+    with a PollingWatcher after one full pass over the tree. Runs until
+    stop (a threading.Event) is set.
+    """
+    watcher = open_watcher(root, poll_interval, use_inotify)
+    logger.info(f"Watching {os.path.abspath(root)} with {type(watcher).__name__}")
+    slides_filename = options.get("slides_filename", "slides.pdf")
+    try:
+        if initial_run:
+            process_changes(group_changes(root, [os.path.abspath(root)]), metadata_dir, transcripts_dir, **options)
+        while stop is None or not stop.is_set():
+            try:
+                changed = next_batch(watcher, settle, max_latency, stop)
+            except OSError as e:
+                # e.g. the inotify watch limit reached on a new directory; its events are lost
+                logger.error(f"{type(watcher).__name__} failed ({e}); polling every {poll_interval}s instead")
+                watcher.close()
+                watcher = PollingWatcher(root, poll_interval)
+                changed = {os.path.abspath(root)}
+            if options.get("split_slides"):
+                # Our own slide splitting writes into the watched tree
+                changed = {path for path in changed if os.path.basename(path) != slides_filename}
+            courses = group_changes(root, changed)
+            if courses:
+                process_changes(courses, metadata_dir, transcripts_dir, **options)
+    finally:
+        watcher.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-standardize and re-format courses as crawl output lands.")
+    parser.add_argument(
+        'crawled_data',
+        type=str,
+        nargs='?',
+        default='crawled_data',
+        help="Directory holding manual_upload/ and dl_coursera/ crawl output (default: crawled_data)."
+    )
+    parser.add_argument(
+        '--metadata_dir',
+        type=str,
+        default='crawled_metadata',
+        help="Where course metadata JSON files are written (default: crawled_metadata)."
+    )
+    parser.add_argument(
+        '--transcripts_dir',
+        type=str,
+        default='outputs/structured_transcripts',
+        help="Base directory for structured transcripts, per source (default: outputs/structured_transcripts)."
+    )
+    parser.add_argument(
+        '--settle',
+        type=float,
+        default=1.0,
+        help="Seconds without new events before a batch is processed (default: 1.0)."
+    )
+    parser.add_argument(
+        '--poll_interval',
+        type=float,
+        default=2.0,
+        help="Snapshot interval when inotify is unavailable (default: 2.0)."
+    )
+    parser.add_argument(
+        '--polling',
+        action='store_true',
+        help="Poll instead of using inotify."
+    )
+    parser.add_argument(
+        '--initial_run',
+        action='store_true',
+        help="Bring every course up to date once before watching."
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help="Worker processes for transcript formatting and slide splitting (default: 1)."
+    )
+    parser.add_argument(
+        '--split_slides',
+        action='store_true',
+        help="Split week PDFs according to their split_instructions.json (requires PyPDF2)."
+    )
+    metrics.add_cli_arguments(parser)
+
+    args = parser.parse_args()
+    metrics.enable_from_args(args)
+
+    try:
+        watch_crawled_data(
+            args.crawled_data, args.metadata_dir, args.transcripts_dir,
+            settle=args.settle, poll_interval=args.poll_interval, use_inotify=not args.polling,
+            initial_run=args.initial_run, workers=args.workers, split_slides=args.split_slides
+        )
+    except KeyboardInterrupt:
+        logger.info("Stopped watching.")
+    except Exception as e:
+        logger.exception(f"An unexpected error occurred: {e}")
+    finally:
+        metrics.write_from_args(args)
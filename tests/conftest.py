@@ -0,0 +1,102 @@
+from pathlib import Path
+from typing import Callable, Sequence
+import json
+
+import pytest
+
+
+_SRT = "1\n00:00:01,000 --> 00:00:02,000\nFirst line\n\n2\n00:00:02,000 --> 00:00:03,000\nSecond line\n"
+_TXT = "0:01 First line\n1:02 Second line\n"
+
+
+def _write_metadata(tmp_path: Path) -> Path:
+    """Build a one-lesson course with an SRT, a TXT and a missing transcript."""
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.srt").write_text(_SRT, encoding="utf-8")
+    (src / "b.txt").write_text(_TXT, encoding="utf-8")
+
+    def item(slug, file_name):
+        return {
+            "name": slug,
+            "slug": slug,
+            "transformed_slug": slug,
+            "path": str(src),
+            "content": [{
+                "content_type": "transcript",
+                "file_name": file_name,
+                "path": str(src / file_name),
+                "size": 0,
+                "extension": Path(file_name).suffix,
+            }],
+        }
+
+    metadata = {
+        "course_slug": "course",
+        "course_name": "Course",
+        "modules": [{
+            "module_name": "Module",
+            "module_slug": "01@module",
+            "lessons": [{
+                "lesson_name": "Lesson",
+                "lesson_slug": "01@lesson",
+                "items": [
+                    item("01@srt-item", "a.srt"),
+                    item("02@missing-item", "missing.txt"),
+                    item("03@txt-item", "b.txt"),
+                ],
+            }],
+        }],
+    }
+    metadata_file = tmp_path / "course.json"
+    metadata_file.write_text(json.dumps(metadata), encoding="utf-8")
+    return metadata_file
+
+
+@pytest.fixture
+def srt_text() -> str:
+    """The SRT transcript written by the metadata_file fixture (src/a.srt)."""
+    return _SRT
+
+
+@pytest.fixture
+def txt_text() -> str:
+    """The TXT transcript written by the metadata_file fixture (src/b.txt)."""
+    return _TXT
+
+
+@pytest.fixture
+def metadata_file(tmp_path: Path) -> Path:
+    """Metadata of a one-lesson course with an SRT, a TXT and a missing transcript under tmp_path/src."""
+    return _write_metadata(tmp_path)
+
+
+def _write_pdf(path: Path, texts: Sequence[str]) -> Path:
+    """Write a PDF with one page per entry of texts, each showing that text."""
+    from PyPDF2 import PageObject, PdfWriter
+    from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+    font = DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    })
+    writer = PdfWriter()
+    for text in texts:
+        page = PageObject.create_blank_page(width=200, height=200)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})
+        })
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 12 Tf 20 100 Td ({text}) Tj ET".encode("ascii"))
+        page[NameObject("/Contents")] = content
+        writer.add_page(page)
+    with open(path, "wb") as f:
+        writer.write(f)
+    return path
+
+
+@pytest.fixture
+def make_pdf() -> Callable[[Path, Sequence[str]], Path]:
+    """Write a PDF with one page per text, each page showing its text; needs PyPDF2."""
+    return _write_pdf
@@ -0,0 +1,40 @@
+from pathlib import Path
+
+from benchmarks.run_benchmarks import compare, main
+from benchmarks.synthetic import TreeSize, make_dl_coursera_course, make_manual_upload_course
+from crawlers.dl_coursera.standardize_metadata import parse_and_standardize
+from crawlers.manual_upload.standardize_metadata import parse_course
+
+
+def test_synthetic_trees_match_both_layouts(tmp_path: Path):
+    size = TreeSize(modules=2, lessons_per_module=2, items_per_lesson=3, cues_per_transcript=5)
+
+    crawl = make_dl_coursera_course(str(tmp_path / "dl"), "bench-course", size)
+    report = {}
+    course = parse_and_standardize(crawl, str(tmp_path / "dl"), match_report=report)
+    assert report == {"unmatched": [], "ambiguous": []}
+    assert sum(len(l["items"]) for m in course["modules"] for l in m["lessons"]) == 12
+
+    course_path = make_manual_upload_course(str(tmp_path / "manual" / "provider"), "bench-course", size)
+    metadata = parse_course(course_path)
+    items = [i for m in metadata["modules"] for l in m["lessons"] for i in l["items"]]
+    assert len(items) == 12
+    assert {c["content_type"] for i in items for c in i["content"]} == {"transcript", "video", "extra-notes"}
+
+
+def test_compare_ignores_benchmarks_below_the_floor():
+    baseline = {"results": {"tiny": {"median_s": 0.0002}, "slow": {"median_s": 2.0}}}
+    current = {"results": {"tiny": {"median_s": 0.0009}, "slow": {"median_s": 3.0}, "new": {"median_s": 1.0}}}
+
+    assert compare(current, baseline, 0.25, min_seconds=0.01) == ["slow: x1.50 slower than baseline"]
+    assert compare(current, baseline, 0.25) == ["tiny: x4.50 slower than baseline", "slow: x1.50 slower than baseline"]
+
+
+def test_benchmarks_pass_against_their_own_baseline(tmp_path: Path):
+    tiny = ["--modules", "1", "--lessons", "1", "--items", "2", "--cues", "5",
+            "--split-items", "2", "--pages-per-item", "2", "--repeat", "1"]
+    baseline = str(tmp_path / "baseline.json")
+
+    assert main(tiny + ["--save", baseline]) == 0
+    # Every stage of a tree this small runs in milliseconds, all noise
+    assert main(tiny + ["--compare", baseline, "--min-seconds", "1"]) == 0
@@ -0,0 +1,84 @@
+from pathlib import Path
+import json
+
+import pytest
+
+from benchmarks.synthetic import TreeSize, make_manual_upload_course
+from crawlers.catalog import CourseCatalog
+from crawlers.manual_upload.standardize_metadata import standardize_course
+
+
+def test_catalog_upserts_and_answers_cross_course_queries(tmp_path: Path):
+    provider = tmp_path / "provider"
+    metadata_dir = tmp_path / "metadata" / "provider"
+    course_a = make_manual_upload_course(str(provider), "course-a", TreeSize(2, 2, 3, 2))
+    course_b = make_manual_upload_course(str(provider), "course-b", TreeSize(1, 1, 2, 2))
+    file_a, _ = standardize_course(course_a, str(metadata_dir))
+    file_b, _ = standardize_course(course_b, str(metadata_dir))
+    (tmp_path / "metadata" / "provider" / "broken.json").write_text("{", encoding="utf-8")
+
+    with CourseCatalog(str(tmp_path / "catalog.sqlite")) as catalog:
+        summary = catalog.update([file_a, file_b, str(metadata_dir / "broken.json")], batch_rows=10)
+        assert (summary["updated"], summary["unchanged"], len(summary["failed"])) == (2, 0, 1)
+        assert [(c["course_slug"], c["items"]) for c in catalog.courses()] == [("course-a", 12), ("course-b", 2)]
+        assert {(c["source"], c["provider"]) for c in catalog.courses()} == {("manual_upload", "provider")}
+
+        transcripts = catalog.find_content(content_type="transcript", min_size=1)
+        assert len(transcripts) == 14
+        assert transcripts == sorted(transcripts, key=lambda c: (-c["size"], c["path"]))
+        largest = transcripts[0]["size"]
+        assert [c["size"] for c in catalog.find_content(content_type="transcript", min_size=largest)] == \
+            [c["size"] for c in transcripts if c["size"] >= largest]
+
+        # No item has slides yet
+        assert len(catalog.items_missing("slides")) == 14
+        assert len(catalog.items_missing("slides", course_slug="course-b")) == 2
+
+        # Add slides to one item and drop a module from course-a
+        with open(file_a, encoding="utf-8") as f:
+            course = json.load(f)
+        item = course["modules"][0]["lessons"][0]["items"][0]
+        item["content"].append({
+            "content_type": "slides", "file_name": "slides.pdf", "path": item["path"] + "/slides.pdf",
+            "size": 10, "extension": ".pdf",
+        })
+        del course["modules"][1]
+        with open(file_a, "w", encoding="utf-8") as f:
+            json.dump(course, f, indent=4)
+
+        summary = catalog.update([file_a, file_b])
+        assert (summary["updated"], summary["unchanged"]) == (1, 1)
+        assert [(c["course_slug"], c["items"]) for c in catalog.courses()] == [("course-a", 6), ("course-b", 2)]
+        missing = catalog.items_missing("slides", course_slug="course-a")
+        assert len(missing) == 5 and item["path"] not in [m["item_path"] for m in missing]
+        assert catalog.totals(course_slug="course-a")["slides"] == {"files": 1, "bytes": 10}
+
+        Path(file_b).unlink()
+        assert catalog.remove_missing() == 1
+        assert [c["course_slug"] for c in catalog.courses()] == ["course-a"]
+        assert catalog.conn.execute("SELECT COUNT(*) FROM content WHERE course_id NOT IN "
+                                    "(SELECT id FROM courses)").fetchone()[0] == 0
+
+
+def test_catalog_records_the_source_and_provider(tmp_path: Path):
+    header = {"course_slug": "course", "course_name": "Course", "modules": []}
+    files = [tmp_path / "metadata" / "dl_coursera" / "course.json", tmp_path / "metadata" / "uol" / "course.json",
+             tmp_path / "elsewhere" / "course.json"]
+    for path in files:
+        path.parent.mkdir(parents=True)
+        path.write_text(json.dumps(header), encoding="utf-8")
+
+    with CourseCatalog(str(tmp_path / "catalog.sqlite")) as catalog:
+        catalog.update([str(path) for path in files[:2]])
+        catalog.update([str(files[2])], source="dl_coursera")
+        assert [(c["source"], c["provider"]) for c in catalog.courses()] == [
+            ("dl_coursera", None), ("dl_coursera", None), ("manual_upload", "uol")
+        ]
+        with pytest.raises(ValueError):
+            catalog.update([str(files[1])], source="coursera")
+
+    # A catalog from before the provider column is rebuilt
+    with CourseCatalog(str(tmp_path / "catalog.sqlite")) as catalog:
+        catalog.conn.execute("PRAGMA user_version = 1")
+    with CourseCatalog(str(tmp_path / "catalog.sqlite")) as catalog:
+        assert catalog.courses() == []
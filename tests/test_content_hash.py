@@ -0,0 +1,43 @@
+from pathlib import Path
+import json
+import os
+
+from crawlers.content_hash import HashCache, find_duplicates, hardlink_duplicates
+from crawlers.manual_upload.standardize_metadata import standardize_course
+
+
+def build_course(provider: Path, slug: str, video: bytes) -> Path:
+    item = provider / slug / "01@module" / "01@lesson" / "01@item"
+    item.mkdir(parents=True)
+    (item / "video.mp4").write_bytes(video)
+    (item / "1. Item.txt").write_text(f"0:01 {slug}", encoding="utf-8")
+    return provider / slug
+
+
+def test_duplicates_are_reported_and_hardlinked(tmp_path: Path):
+    video = os.urandom(4096)
+    courses = [
+        build_course(tmp_path / "data" / "provider-a", "course-a", video),
+        build_course(tmp_path / "data" / "provider-b", "course-b", video),
+    ]
+    cache_path = tmp_path / "hashes.json"
+
+    cache = HashCache(str(cache_path))
+    metadata_files = [
+        standardize_course(str(course), str(tmp_path / "metadata"), hash_cache=cache)[0] for course in courses
+    ]
+    cache.save()
+    assert (cache.hits, cache.misses) == (0, 4)
+
+    item = json.loads(Path(metadata_files[0]).read_text())["modules"][0]["lessons"][0]["items"][0]
+    assert all(len(content["sha256"]) == 64 for content in item["content"])
+
+    report = find_duplicates(metadata_files, HashCache(str(cache_path)))
+    assert len(report["groups"]) == 1
+    assert report["groups"][0]["paths"][0].endswith("provider-a/course-a/01@module/01@lesson/01@item/video.mp4")
+    assert report["reclaimable_bytes"] == 4096
+
+    assert hardlink_duplicates(report) == (1, 4096)
+    first, second = (os.stat(path) for path in report["groups"][0]["paths"])
+    assert first.st_ino == second.st_ino
+    assert find_duplicates(metadata_files, HashCache(str(cache_path)))["reclaimable_bytes"] == 0
@@ -0,0 +1,59 @@
+from pathlib import Path
+import os
+
+import pytest
+
+pytest.importorskip("PyPDF2")
+
+from PyPDF2 import PdfReader
+
+from crawlers import metrics
+from crawlers.slide_text import iter_page_text, read_sidecar_header
+from utils.extract_slide_text import extract_page_texts, extract_slide_text, find_slide_pdfs
+
+
+def test_extract_page_texts_reads_a_page_range(tmp_path: Path, make_pdf):
+    pdf = make_pdf(tmp_path / "week.pdf", ["Intro", "Threats", "Summary"])
+    reader = PdfReader(str(pdf))
+
+    assert extract_page_texts(reader) == ["Intro", "Threats", "Summary"]
+    assert extract_page_texts(reader, 2, 3) == ["Threats", "Summary"]
+
+
+def test_extract_slide_text_reuses_a_current_sidecar(tmp_path: Path, make_pdf):
+    pdf = make_pdf(tmp_path / "slides.pdf", ["Intro", "Summary"])
+    metrics.reset()
+    metrics.enable()
+    try:
+        first = extract_slide_text(str(pdf))
+        assert (first.pages, first.cached) == (2, False)
+        assert list(iter_page_text(str(pdf))) == [(1, "Intro"), (2, "Summary")]
+
+        second = extract_slide_text(str(pdf))
+        assert (second.pages, second.cached) == (2, True)
+        assert metrics.snapshot()["counters"]["pages_extracted"] == 2
+
+        forced = extract_slide_text(str(pdf), force=True)
+        assert not forced.cached
+        assert metrics.snapshot()["counters"]["pages_extracted"] == 4
+    finally:
+        metrics.reset()
+
+    # A new PDF in place of the old one is extracted again
+    make_pdf(pdf, ["Replaced"])
+    assert not extract_slide_text(str(pdf)).cached
+    assert read_sidecar_header(str(pdf))["pages"] == 1
+
+
+def test_find_slide_pdfs_matches_patterns_case_insensitively(tmp_path: Path):
+    for name in ("01@item/slides.pdf", "02@item/Slides.PDF", "02@item/notes.pdf", "03@item/week-1.pdf"):
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_bytes(b"%PDF")
+
+    def found(*patterns):
+        return [os.path.relpath(path, tmp_path) for path in find_slide_pdfs(str(tmp_path), *patterns)]
+
+    assert found() == [os.path.join("01@item", "slides.pdf"), os.path.join("02@item", "Slides.PDF")]
+    assert found(["week-*.pdf", "notes.pdf"]) == [
+        os.path.join("02@item", "notes.pdf"), os.path.join("03@item", "week-1.pdf")
+    ]
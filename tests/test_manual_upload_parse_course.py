@@ -0,0 +1,57 @@
+from pathlib import Path
+import json
+
+from crawlers.manual_upload.standardize_metadata import parse_course, parse_provider
+
+
+def build_course(root: Path) -> Path:
+    course = root / "intro-course"
+    item = course / "01@topic01-basics" / "01@lesson01-welcome" / "01@welcome"
+    (item / "extra-notes").mkdir(parents=True)
+    (item / "1. Welcome.txt").write_text("0:01 Hello", encoding="utf-8")
+    (item / "video.mp4").write_bytes(b"\0" * 16)
+    (item / "slides.pdf").write_bytes(b"%PDF")
+    (item / "ignored.html").write_text("<html></html>", encoding="utf-8")
+    (item / "extra-notes" / "notes.md").write_text("# Notes", encoding="utf-8")
+    (course / "01@topic01-basics" / "README.txt").write_text("not a lesson", encoding="utf-8")
+    return course
+
+
+def test_parse_course_collects_hierarchy_and_content(tmp_path: Path):
+    course = build_course(tmp_path)
+
+    metadata = parse_course(str(course))
+
+    assert metadata["course_slug"] == "intro-course"
+    assert metadata["course_name"] == "Intro Course"
+    module = metadata["modules"][0]
+    assert module["module_slug"] == "01@topic01-basics"
+    lesson = module["lessons"][0]
+    assert lesson["lesson_name"] == "Lesson 01 Lesson01 Welcome"
+    item = lesson["items"][0]
+    assert item["transformed_slug"] == "01@welcome"
+    assert [(c["content_type"], c["file_name"], c["size"]) for c in item["content"]] == [
+        ("transcript", "1. Welcome.txt", 10),
+        ("slides", "slides.pdf", 4),
+        ("video", "video.mp4", 16),
+        ("extra-notes", "notes.md", 7),
+    ]
+
+
+def test_parse_provider_standardizes_courses_concurrently(tmp_path: Path):
+    provider = tmp_path / "input" / "provider"
+    provider.mkdir(parents=True)
+    build_course(provider)
+    second = build_course(tmp_path)
+    second.rename(provider / "second-course")
+
+    summary = parse_provider(str(provider), str(tmp_path / "out"), workers=2)
+
+    assert (summary["provider"], summary["courses"], summary["items"], summary["failed"]) == (
+        "provider", 2, 2, 0
+    )
+    saved = json.loads((tmp_path / "out" / "provider" / "second-course.json").read_text())
+    assert saved == parse_course(str(provider / "second-course"))
+    assert sorted(p.name for p in (tmp_path / "out" / "provider").iterdir()) == [
+        "intro-course.json", "second-course.json"
+    ]
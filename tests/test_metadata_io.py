@@ -0,0 +1,48 @@
+from pathlib import Path
+import json
+
+import pytest
+
+from crawlers.metadata_io import load_course_metadata, open_course_metadata, write_course_metadata
+
+
+COURSE = {
+    "course_slug": "sample-course",
+    "course_name": "Sample Coursé",
+    "modules": [
+        {
+            "module_name": "Module %d" % m,
+            "module_slug": "%02d@module-%d" % (m, m),
+            "lessons": [
+                {
+                    "lesson_name": "Lesson",
+                    "lesson_slug": "01@lesson",
+                    "items": [{"name": "Item", "size": 12345678901234, "content": []}],
+                }
+            ],
+        }
+        for m in range(1, 4)
+    ],
+}
+
+
+def test_indented_output_matches_json_dump(tmp_path: Path):
+    for course in (COURSE, {**COURSE, "modules": []}):
+        output_file = tmp_path / "course.json"
+        header = {k: v for k, v in course.items() if k != "modules"}
+
+        assert write_course_metadata(header, iter(course["modules"]), str(output_file)) == len(course["modules"])
+        assert output_file.read_text(encoding="utf-8") == json.dumps(course, indent=4)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_streaming_reader_round_trips(tmp_path: Path, compact: bool):
+    output_file = tmp_path / "course.json"
+    header = {k: v for k, v in COURSE.items() if k != "modules"}
+    write_course_metadata(header, COURSE["modules"], str(output_file), compact=compact)
+
+    # A tiny chunk size forces values to straddle buffer refills
+    read_header, modules = open_course_metadata(str(output_file), chunk_size=7)
+    assert read_header == header
+    assert list(modules) == COURSE["modules"]
+    assert load_course_metadata(str(output_file)) == COURSE
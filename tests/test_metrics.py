@@ -0,0 +1,59 @@
+from pathlib import Path
+import json
+
+import pytest
+
+from crawlers import metrics
+from crawlers.process_all_transcripts import process_all_transcripts
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_metrics_are_noops_until_enabled():
+    metrics.inc("files_statted")
+    with metrics.timer("stage"):
+        pass
+    assert metrics.snapshot() == {"counters": {}, "timers": {}}
+
+
+def test_counters_timers_and_exports(tmp_path: Path):
+    metrics.enable()
+    before = metrics.snapshot()
+    metrics.inc("files_statted", 3)
+    with metrics.timer("stage"):
+        pass
+    delta = metrics.diff(metrics.snapshot(), before)
+    metrics.merge(delta)
+
+    assert metrics.snapshot()["counters"] == {"files_statted": 6}
+    assert metrics.snapshot()["timers"]["stage"][0] == 2
+
+    metrics.write_json(str(tmp_path / "metrics.json"))
+    data = json.loads((tmp_path / "metrics.json").read_text())
+    assert data["counters"] == {"files_statted": 6}
+    assert data["timers"]["stage"]["count"] == 2
+
+    text = metrics.to_prometheus()
+    assert "course_crawler_files_statted_total 6" in text
+    assert 'course_crawler_stage_seconds_count{stage="stage"} 2' in text
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_process_all_transcripts_reports_metrics(
+    tmp_path: Path, workers: int, metadata_file: Path, srt_text: str, txt_text: str
+):
+    metrics.enable()
+
+    process_all_transcripts(str(metadata_file), str(tmp_path / "out"), workers=workers)
+
+    counters = metrics.snapshot()["counters"]
+    assert counters["transcripts_parsed"] == 2
+    assert counters["segments_emitted"] == 4
+    # Each transcript is read once to hash it and once to parse it
+    assert counters["bytes_read"] == 2 * (len(srt_text.encode()) + len(txt_text.encode()))
+    assert counters["bytes_written"] > 0
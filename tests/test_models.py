@@ -0,0 +1,65 @@
+from pathlib import Path
+import gc
+import json
+import tracemalloc
+
+from benchmarks.synthetic import TreeSize, make_manual_upload_course
+from crawlers.manual_upload.standardize_metadata import build_course, parse_course, standardize_course
+from crawlers.models import Content, Item, load_course
+
+
+def test_model_loads_lazily_and_serializes_to_the_current_schema(tmp_path: Path):
+    size = TreeSize(modules=2, lessons_per_module=2, items_per_lesson=3, cues_per_transcript=2)
+    course_path = make_manual_upload_course(str(tmp_path / "provider"), "course", size)
+
+    course = build_course(course_path)
+    items = list(course.iter_items())
+    assert len(items) == 12
+    assert not any(item.content_loaded for item in items)
+
+    assert [c.content_type for c in items[0].content] == ["transcript", "video", "extra-notes"]
+    assert items[0].content_loaded and not items[1].content_loaded
+    items[0].release_content()
+    assert not items[0].content_loaded
+
+    assert course.to_dict() == parse_course(course_path)
+
+    metadata_file, _ = standardize_course(course_path, str(tmp_path / "metadata"))
+    loaded = load_course(metadata_file)
+    assert loaded.to_dict() == course.to_dict()
+    loaded.save(str(tmp_path / "copy.json"))
+    assert (tmp_path / "copy.json").read_bytes() == Path(metadata_file).read_bytes()
+
+
+def test_item_without_loader_has_empty_content():
+    item = Item(name="Item", slug="item", transformed_slug="01@item", path="/missing")
+    assert item.content == []
+    item.content = [Content("video", "v.mp4", "/missing/v.mp4", 1, ".mp4", sha256="ab")]
+    assert item.to_dict()["content"][0]["sha256"] == "ab"
+
+
+def retained_bytes(load, *args):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        loaded = load(*args)
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0], loaded
+    finally:
+        tracemalloc.stop()
+
+
+def test_loaded_course_is_smaller_than_its_json(tmp_path: Path):
+    size = TreeSize(modules=4, lessons_per_module=5, items_per_lesson=20, cues_per_transcript=1)
+    course_path = make_manual_upload_course(str(tmp_path / "provider"), "course", size)
+    metadata_file, _ = standardize_course(course_path, str(tmp_path / "metadata"))
+
+    def load_json(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    json_bytes, _ = retained_bytes(load_json, metadata_file)
+    model_bytes, course = retained_bytes(load_course, metadata_file)
+    # Content is converted to slotted instances up front, not kept as dicts alongside them
+    assert all(item.content_loaded and item.content_loader is None for item in course.iter_items())
+    assert model_bytes < json_bytes * 0.8
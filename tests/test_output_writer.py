@@ -0,0 +1,45 @@
+from pathlib import Path
+
+from crawlers.output_writer import OutputWriter
+
+
+def test_output_writer_creates_directories_and_collects_errors(tmp_path: Path):
+    blocker = tmp_path / "blocker"
+    blocker.write_text("a file, not a directory", encoding="utf-8")
+    staging = tmp_path / "staging"
+    staging.mkdir()
+
+    def staged(name, text):
+        path = staging / name
+        path.write_text(text, encoding="utf-8")
+        return str(path)
+
+    with OutputWriter(workers=2, max_pending=2) as writer:
+        for i in range(10):
+            writer.submit(
+                str(tmp_path / "course" / "module" / f"item-{i}"), {"a.txt": staged(f"{i}.tmp", f"text {i}")}, tag=i
+            )
+        writer.submit(str(blocker / "item"), {"a.txt": staged("bad.tmp", "lost")}, tag="bad")
+
+    for i in range(10):
+        assert (tmp_path / "course" / "module" / f"item-{i}" / "a.txt").read_text(encoding="utf-8") == f"text {i}"
+    assert not list(staging.iterdir())
+    assert [tag for tag, _ in writer.errors] == ["bad"]
+
+
+def test_output_writer_keeps_the_last_submission_to_a_directory_whole(tmp_path: Path):
+    staging = tmp_path / "staging"
+    staging.mkdir()
+    item = tmp_path / "course" / "item"
+
+    with OutputWriter(workers=4, max_pending=8) as writer:
+        for i in range(50):
+            files = {}
+            for name in ("transcript.json", "transcript.txt"):
+                files[name] = str(staging / f"{i}-{name}.tmp")
+                Path(files[name]).write_text(f"source {i}", encoding="utf-8")
+            writer.submit(str(item), files)
+            writer.submit(str(tmp_path / "course" / f"other-{i}"), {})
+
+    assert (item / "transcript.json").read_text(encoding="utf-8") == "source 49"
+    assert (item / "transcript.txt").read_text(encoding="utf-8") == "source 49"
@@ -0,0 +1,82 @@
+from pathlib import Path
+import threading
+
+import pytest
+
+from benchmarks.synthetic import TreeSize, make_manual_upload_course
+from crawlers.manual_upload.standardize_metadata import standardize_course
+from crawlers import pipeline
+from crawlers.pipeline import run_manual_upload
+from crawlers.process_all_transcripts import process_all_transcripts
+
+
+def tree_files(root: Path) -> dict:
+    return {
+        str(path.relative_to(root)): path.read_bytes()
+        for path in sorted(root.rglob("*")) if path.is_file()
+    }
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_pipeline_matches_separate_steps(tmp_path: Path, workers: int):
+    size = TreeSize(modules=3, lessons_per_module=2, items_per_lesson=3, cues_per_transcript=5)
+    course_path = make_manual_upload_course(str(tmp_path / "data" / "provider"), "course", size)
+
+    metadata_file, _ = standardize_course(course_path, str(tmp_path / "separate" / "metadata" / "provider"))
+    separate = process_all_transcripts(metadata_file, str(tmp_path / "separate" / "transcripts"))
+
+    fused = run_manual_upload(
+        course_path, str(tmp_path / "fused" / "metadata"), str(tmp_path / "fused" / "transcripts"),
+        workers=workers
+    )
+
+    assert fused["processed"] == separate["processed"] == 18
+    assert fused["failed"] == [] and fused["slides"] == []
+    assert tree_files(tmp_path / "fused") == tree_files(tmp_path / "separate")
+
+
+def test_pipeline_propagates_a_failing_transcript_stage(tmp_path: Path, monkeypatch):
+    def failing_stage(course_slug, modules, output_base_dir, **options):
+        next(iter(modules))
+        raise RuntimeError("transcript stage failed")
+
+    monkeypatch.setattr(pipeline, "process_course_transcripts", failing_stage)
+    header = {"course_slug": "course", "course_name": "Course"}
+    many_modules = lambda before_module: (
+        {"module_name": f"M{i}", "module_slug": f"{i:02d}@m", "lessons": []} for i in range(20)
+    )
+    outcome = []
+
+    def run():
+        try:
+            pipeline.run_pipeline(header, many_modules, str(tmp_path / "course.json"), str(tmp_path / "out"))
+        except RuntimeError as e:
+            outcome.append(e)
+
+    runner = threading.Thread(target=run, daemon=True)
+    runner.start()
+    runner.join(timeout=10)
+    assert not runner.is_alive()
+    assert [str(e) for e in outcome] == ["transcript stage failed"]
+
+
+def test_pipeline_keeps_previous_outputs_when_standardizing_fails(tmp_path: Path, monkeypatch):
+    size = TreeSize(modules=3, lessons_per_module=1, items_per_lesson=2, cues_per_transcript=2)
+    course_path = make_manual_upload_course(str(tmp_path / "data" / "provider"), "course", size)
+    metadata_dir, transcripts_dir = tmp_path / "metadata", tmp_path / "transcripts"
+    options = dict(archive=True, binary_store=True)
+    run_manual_upload(course_path, str(metadata_dir), str(transcripts_dir), **options)
+    before = tree_files(tmp_path)
+
+    iter_course_modules = pipeline.manual_upload.iter_course_modules
+
+    def failing_modules(*args):
+        for i, module in enumerate(iter_course_modules(*args)):
+            if i == 1:
+                raise OSError("crawl directory vanished")
+            yield module
+
+    monkeypatch.setattr(pipeline.manual_upload, "iter_course_modules", failing_modules)
+    with pytest.raises(OSError, match="vanished"):
+        run_manual_upload(course_path, str(metadata_dir), str(transcripts_dir), force=True, **options)
+    assert tree_files(tmp_path) == before
@@ -0,0 +1,85 @@
+from pathlib import Path
+import json
+
+import pytest
+
+from crawlers.process_all_transcripts import process_all_transcripts
+from crawlers.transcript_search import TranscriptIndex
+from crawlers.transcript_store import TranscriptStore
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_process_all_transcripts_isolates_failures(tmp_path: Path, workers: int, metadata_file: Path):
+    out = tmp_path / "out"
+
+    summary = process_all_transcripts(str(metadata_file), str(out), workers=workers)
+
+    assert summary["processed"] == 2
+    assert [Path(p).name for p, _ in summary["failed"]] == ["missing.txt"]
+
+    lesson_out = out / "course" / "01@module" / "01@lesson"
+    srt_json = json.loads((lesson_out / "01@srt-item" / "transcript.json").read_text())
+    assert [s["text"] for s in srt_json["segments"]] == ["First line", "Second line"]
+    assert (lesson_out / "03@txt-item" / "transcript.txt").read_text() == "First line\nSecond line"
+    # Outputs are staged on disk and renamed into place; nothing is left behind
+    assert not list((out / "course").glob(".staging-*"))
+    assert not list(out.rglob("*.tmp"))
+
+
+def test_process_all_transcripts_skips_unchanged_items(
+    tmp_path: Path, metadata_file: Path, srt_text: str, txt_text: str
+):
+    out = tmp_path / "out"
+
+    first = process_all_transcripts(str(metadata_file), str(out))
+    assert (first["processed"], first["skipped"]) == (2, 0)
+
+    second = process_all_transcripts(str(metadata_file), str(out))
+    assert (second["processed"], second["skipped"]) == (0, 2)
+
+    # Touching a file without changing it is caught by the content hash
+    srt = tmp_path / "src" / "a.srt"
+    srt.write_text(srt_text, encoding="utf-8")
+    (tmp_path / "src" / "b.txt").write_text(txt_text + "2:03 Third line\n", encoding="utf-8")
+    third = process_all_transcripts(str(metadata_file), str(out))
+    assert (third["processed"], third["skipped"]) == (1, 1)
+
+    forced = process_all_transcripts(str(metadata_file), str(out), force=True)
+    assert (forced["processed"], forced["skipped"]) == (2, 0)
+    assert len(forced["failed"]) == 1
+
+
+def test_process_all_transcripts_builds_binary_store(tmp_path: Path, metadata_file: Path):
+    out = tmp_path / "out"
+
+    process_all_transcripts(str(metadata_file), str(out), binary_store=True)
+
+    with TranscriptStore(str(out / "course" / "transcripts.bin")) as store:
+        assert store.item_segments("01@module/01@lesson/01@srt-item")[1] == {
+            "start_ms": 2000, "end_ms": 3000, "text": "Second line"
+        }
+        assert [s["text"] for s in store.item_segments("01@module/01@lesson/03@txt-item")] == [
+            "First line", "Second line"
+        ]
+        assert "01@module/01@lesson/02@missing-item" not in store.keys()
+
+
+def test_search_index_is_updated_incrementally(tmp_path: Path, metadata_file: Path):
+    out = tmp_path / "out"
+    index_file = tmp_path / "index.sqlite"
+
+    process_all_transcripts(str(metadata_file), str(out), search_index=str(index_file))
+
+    with TranscriptIndex(str(index_file)) as index:
+        hits = index.search("second LINE")
+        assert [(h["item_slug"], h["segment"], h["start_ms"]) for h in hits] == [
+            ("01@srt-item", 1, 2000),
+            ("03@txt-item", 1, None),
+        ]
+        assert index.search("missing-term") == []
+
+        (tmp_path / "src" / "b.txt").write_text("0:01 Brand new words\n", encoding="utf-8")
+        process_all_transcripts(str(metadata_file), str(out))
+        assert index.update_course(str(out), "course") == (1, 1, 0)
+        assert [h["item_slug"] for h in index.search("brand")] == ["03@txt-item"]
+        assert [h["item_slug"] for h in index.search("second")] == ["01@srt-item"]
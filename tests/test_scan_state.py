@@ -0,0 +1,103 @@
+from pathlib import Path
+import os
+import time
+
+import pytest
+
+from benchmarks.synthetic import TreeSize, make_dl_coursera_course, make_manual_upload_course
+from crawlers import metrics
+from crawlers.dl_coursera.standardize_metadata import iter_standardized_modules
+from crawlers.manual_upload.standardize_metadata import standardize_course
+from crawlers.metadata_io import write_course_metadata
+from crawlers.scan_state import ScanState
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics.reset()
+    metrics.enable()
+    yield
+    metrics.reset()
+
+
+def backdate(root: Path, seconds: float = 3600):
+    """Move file and directory mtimes out of the racy window of the next scan."""
+    past = time.time() - seconds
+    for path, _, files in os.walk(root):
+        for name in files:
+            os.utime(os.path.join(path, name), (past, past))
+        os.utime(path, (past, past))
+
+
+def nth_dir(path: Path, index: int) -> Path:
+    return sorted(child for child in path.iterdir() if child.is_dir())[index]
+
+
+def test_incremental_standardize_matches_a_full_rebuild(tmp_path: Path):
+    course_path = Path(make_manual_upload_course(str(tmp_path / "provider"), "course", TreeSize(2, 2, 3, 2)))
+    backdate(course_path)
+    incremental_dir, full_dir = tmp_path / "incremental", tmp_path / "full"
+    standardize_course(str(course_path), str(incremental_dir), incremental=True)
+
+    metrics.reset()
+    metrics.enable()
+    standardize_course(str(course_path), str(incremental_dir), incremental=True)
+    assert metrics.snapshot()["counters"].get("directories_scanned", 0) == 0
+    assert metrics.snapshot()["counters"]["directories_reused"] > 0
+
+    new_item = nth_dir(nth_dir(course_path, 0), 1) / "04@item-4"
+    new_item.mkdir()
+    (new_item / "4. Item.srt").write_text("1\n00:00:00,000 --> 00:00:01,000\nHi\n")
+    (nth_dir(nth_dir(nth_dir(course_path, 1), 0), 1) / "slides.pdf").write_bytes(b"%PDF")
+
+    output_file, item_count = standardize_course(str(course_path), str(incremental_dir), incremental=True)
+    full_file, full_count = standardize_course(str(course_path), str(full_dir))
+    assert item_count == full_count == 13
+    assert Path(output_file).read_bytes() == Path(full_file).read_bytes()
+
+
+def test_in_place_rewrites_match_a_full_rebuild(tmp_path: Path):
+    course_path = Path(make_manual_upload_course(str(tmp_path / "provider"), "course", TreeSize(1, 1, 2, 2)))
+    video = nth_dir(nth_dir(nth_dir(course_path, 0), 0), 0) / "video.mp4"
+    backdate(course_path)
+    output_file, _ = standardize_course(str(course_path), str(tmp_path / "out"), incremental=True)
+
+    # Rewriting a file in place leaves its directory's mtime untouched
+    directory_mtime = video.parent.stat().st_mtime_ns
+    video.write_bytes(b"\0" * 10)
+    past = time.time() - 1800
+    os.utime(video, (past, past))
+    os.utime(video.parent, ns=(directory_mtime, directory_mtime))
+    standardize_course(str(course_path), str(tmp_path / "out"), incremental=True)
+    full_file, _ = standardize_course(str(course_path), str(tmp_path / "full"))
+    assert b'"size": 10' in Path(output_file).read_bytes()
+    assert Path(output_file).read_bytes() == Path(full_file).read_bytes()
+
+    # A change that keeps both size and mtime is only seen when its directory is rescanned
+    mtime = video.stat().st_mtime_ns
+    video.write_bytes(b"\1" * 10)
+    os.utime(video, ns=(mtime, mtime))
+    os.utime(video.parent, ns=(directory_mtime, directory_mtime))
+    metrics.reset()
+    metrics.enable()
+    standardize_course(str(course_path), str(tmp_path / "out"), incremental=True, rescan=[str(video.parent)])
+    assert metrics.snapshot()["counters"]["directories_scanned"] > 0
+
+
+def test_dl_coursera_state_reuses_lesson_and_item_scans(tmp_path: Path):
+    crawl = make_dl_coursera_course(str(tmp_path), "course", TreeSize(1, 2, 2, 2))
+    output_file = str(tmp_path / "course.json")
+
+    def standardize():
+        state = ScanState.load(output_file)
+        write_course_metadata({"course_slug": "course", "course_name": "Course"},
+                              iter_standardized_modules(crawl, tmp_path, state=state), output_file)
+        state.save(output_file)
+        return Path(output_file).read_bytes()
+
+    backdate(tmp_path / "course")
+    first = standardize()
+    metrics.reset()
+    metrics.enable()
+    assert standardize() == first
+    assert metrics.snapshot()["counters"].get("directories_scanned", 0) == 0
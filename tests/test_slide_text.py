@@ -0,0 +1,50 @@
+from pathlib import Path
+import os
+
+import pytest
+
+from benchmarks.synthetic import TreeSize, make_manual_upload_course
+from crawlers.content_hash import hash_content_file
+from crawlers.manual_upload.standardize_metadata import collect_item_content
+from crawlers.slide_text import (
+    iter_page_text,
+    load_page_text,
+    read_sidecar_header,
+    sidecar_is_current,
+    sidecar_path,
+    write_page_text,
+)
+
+
+def test_sidecar_round_trip_and_freshness(tmp_path: Path):
+    pdf = tmp_path / "slides.pdf"
+    pdf.write_bytes(b"%PDF-1.4 three pages")
+    write_page_text(str(pdf), ["Intro", "", "Summary"])
+
+    header = read_sidecar_header(str(pdf))
+    assert header["pages"] == 3
+    assert header["source_sha256"] == hash_content_file(str(pdf))
+    assert sidecar_is_current(str(pdf))
+    assert list(iter_page_text(str(pdf))) == [(1, "Intro"), (2, ""), (3, "Summary")]
+    assert load_page_text(str(pdf), 3) == "Summary"
+    with pytest.raises(IndexError):
+        load_page_text(str(pdf), 4)
+
+    # Same bytes with a new mtime is still current; new bytes are not
+    os.utime(pdf, ns=(0, 0))
+    assert sidecar_is_current(str(pdf))
+    pdf.write_bytes(b"%PDF-1.4 other slides")
+    assert not sidecar_is_current(str(pdf))
+
+
+def test_standardized_metadata_references_the_sidecar(tmp_path: Path):
+    course_path = make_manual_upload_course(str(tmp_path / "provider"), "course", TreeSize(1, 1, 1, 2))
+    item_path = next(path for path, dirs, _ in os.walk(course_path) if not dirs or dirs == ["extra-notes"])
+    pdf = Path(item_path) / "slides.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+    write_page_text(str(pdf), ["Only page"])
+
+    content = collect_item_content(item_path)
+    slide_text = [c for c in content if c.content_type == "slide-text"]
+    assert [c.path for c in slide_text] == [sidecar_path(str(pdf))]
+    assert slide_text[0].extension == ".jsonl"
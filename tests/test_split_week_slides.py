@@ -0,0 +1,122 @@
+from pathlib import Path
+import json
+
+import pytest
+
+pytest.importorskip("PyPDF2")
+
+from PyPDF2 import PdfReader
+
+from crawlers.slide_text import iter_page_text, read_sidecar_header
+from utils.split_week_slides import (
+    ItemRange,
+    find_week_jobs,
+    split_course_slides,
+    split_week_slides,
+    validate_item_ranges,
+)
+
+
+def write_instructions(path: Path, items) -> Path:
+    path.write_text(json.dumps({"items": items}), encoding="utf-8")
+    return path
+
+
+def test_split_week_slides_writes_item_pdfs_and_page_text(tmp_path: Path, make_pdf):
+    make_pdf(tmp_path / "week.pdf", ["Intro", "Threats", "Attacks", "Summary"])
+    instructions = write_instructions(tmp_path / "split.json", [
+        {"item_dir": "01@intro", "pages": "1-1"},
+        {"item_dir": "02@threats", "start": 2, "end": 4},
+    ])
+
+    written = split_week_slides(str(tmp_path), "week.pdf", str(instructions), extract_text=True)
+
+    item_pdf = tmp_path / "02@threats" / "slides.pdf"
+    assert written == [str(tmp_path / "01@intro" / "slides.pdf"), str(item_pdf)]
+    assert [page.extract_text() for page in PdfReader(str(item_pdf)).pages] == ["Threats", "Attacks", "Summary"]
+    # Sidecar pages are numbered within the item's PDF, not the week's
+    assert list(iter_page_text(str(item_pdf))) == [(1, "Threats"), (2, "Attacks"), (3, "Summary")]
+    assert read_sidecar_header(str(item_pdf))["source_size"] == item_pdf.stat().st_size
+    assert list(iter_page_text(str(tmp_path / "01@intro" / "slides.pdf"))) == [(1, "Intro")]
+
+
+def range_problems(ranges, total_pages=10):
+    items = [ItemRange(name, start, end) for name, start, end in ranges]
+    with pytest.raises(ValueError) as excinfo:
+        validate_item_ranges(items, total_pages, "week.pdf")
+    return str(excinfo.value).splitlines()[1:]
+
+
+def test_validate_item_ranges_reports_every_problem():
+    validate_item_ranges([ItemRange("a", 1, 4), ItemRange("b", 5, 10)], 10, "week.pdf")
+
+    problems = range_problems([("a", 0, 2), ("b", 5, 3), ("c", 8, 12)])
+    assert len(problems) == 3
+    assert "a: page numbers must be 1-based" in problems[0]
+    assert "b: start page must be <= end page" in problems[1]
+    assert "c: end page 12 exceeds total pages 10" in problems[2]
+
+
+def test_validate_item_ranges_finds_ranges_nested_in_an_earlier_one():
+    problems = range_problems([("a", 1, 10), ("b", 2, 3), ("c", 4, 5)])
+    assert [problem.strip() for problem in problems] == [
+        "b (2-3) overlaps a (1-10)",
+        "c (4-5) overlaps a (1-10)",
+    ]
+
+
+def test_split_week_slides_writes_nothing_for_invalid_instructions(tmp_path: Path, make_pdf):
+    make_pdf(tmp_path / "week.pdf", ["Intro", "Threats", "Summary"])
+    instructions = write_instructions(tmp_path / "split.json", [
+        {"item_dir": "01@intro", "pages": "1-2"},
+        {"item_dir": "02@threats", "pages": "2-4"},
+    ])
+
+    with pytest.raises(ValueError, match="overlaps"):
+        split_week_slides(str(tmp_path), "week.pdf", str(instructions))
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["split.json", "week.pdf"]
+
+
+def test_find_week_jobs_reports_weeks_it_cannot_split(tmp_path: Path):
+    (tmp_path / "01@week").mkdir()
+    (tmp_path / "01@week" / "week-1.pdf").write_bytes(b"%PDF")
+    write_instructions(tmp_path / "01@week" / "split_instructions.json", [])
+    (tmp_path / "02@week").mkdir()
+    (tmp_path / "02@week" / "split_instructions.json").write_text("{not json", encoding="utf-8")
+    (tmp_path / "03@week").mkdir()
+    for name in ("a.pdf", "b.pdf"):
+        (tmp_path / "03@week" / name).write_bytes(b"%PDF")
+    write_instructions(tmp_path / "03@week" / "split_instructions.json", [])
+    (tmp_path / "04@week").mkdir()
+    (tmp_path / "04@week" / "split_instructions.json").write_text(
+        json.dumps({"week_pdf": "named.pdf", "items": []}), encoding="utf-8"
+    )
+    (tmp_path / "05@no-instructions").mkdir()
+    (tmp_path / "05@no-instructions" / "week-5.pdf").write_bytes(b"%PDF")
+
+    jobs = {Path(job.week_dir_path).name: job for job in find_week_jobs(str(tmp_path))}
+
+    assert sorted(jobs) == ["01@week", "02@week", "03@week", "04@week"]
+    assert (jobs["01@week"].week_pdf_filename, jobs["01@week"].error) == ("week-1.pdf", None)
+    assert jobs["02@week"].error.startswith("Unreadable instructions")
+    assert "found 2" in jobs["03@week"].error
+    assert (jobs["04@week"].week_pdf_filename, jobs["04@week"].error) == ("named.pdf", None)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_split_course_slides_isolates_a_failing_week(tmp_path: Path, workers: int, make_pdf):
+    for week in ("01@week", "02@week", "03@week"):
+        (tmp_path / week).mkdir()
+        make_pdf(tmp_path / week / "week.pdf", ["One", "Two"])
+        write_instructions(tmp_path / week / "split_instructions.json", [{"item_dir": "01@item", "pages": "1-2"}])
+    # The second week asks for a page its PDF does not have
+    write_instructions(tmp_path / "02@week" / "split_instructions.json", [{"item_dir": "01@item", "pages": "1-3"}])
+
+    results = split_course_slides(str(tmp_path), workers=workers)
+
+    assert [Path(result.job.week_dir_path).name for result in results] == ["01@week", "02@week", "03@week"]
+    assert [result.error is None for result in results] == [True, False, True]
+    assert "exceeds total pages" in results[1].error
+    assert [result.pages for result in results] == [2, 0, 2]
+    assert (tmp_path / "03@week" / "01@item" / "slides.pdf").exists()
+    assert not (tmp_path / "02@week" / "01@item").exists()
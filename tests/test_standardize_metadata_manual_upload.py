@@ -52,3 +52,29 @@ def test_parse_and_standardize_manual_upload(tmp_path: Path):
     assert expected.issubset(got)
 
 
+def test_parse_and_standardize_reports_unmatched_and_ambiguous(tmp_path: Path):
+    fixtures_root = Path(__file__).parent / "data" / "manual_upload"
+    with open(fixtures_root / "input.json", "r") as f:
+        data = json.load(f)
+
+    items = data["modules"][0]["lessons"][0]["items"]
+    items.append({"slug": "no-such-item", "name": "No Such Item"})
+    items.append({"slug": "demo", "name": "Demo"})
+
+    base_path = tmp_path / "crawled_data" / "dl_coursera"
+    shutil.copytree(fixtures_root / "fs", base_path, dirs_exist_ok=True)
+    lesson_path = base_path / "sample-course" / "01@intro-module" / "01@lesson-one"
+    # An exact folder name wins outright; only partial matches can be ambiguous
+    (lesson_path / "01@getting-started-extra").mkdir()
+    (lesson_path / "03@demo-part-1").mkdir()
+    (lesson_path / "03@demo-part-2").mkdir()
+
+    report = {}
+    result = parse_and_standardize(data, str(base_path), match_report=report)
+
+    resolved = result["modules"][0]["lessons"][0]["items"]
+    assert resolved[0]["path"] == str(lesson_path / "01@getting-started")
+    assert resolved[1]["path"] == "File not found for: 02@no-such-item"
+    assert report["unmatched"] == [(str(lesson_path), "02@no-such-item")]
+    assert resolved[2]["path"] in (str(lesson_path / "03@demo-part-1"), str(lesson_path / "03@demo-part-2"))
+    assert report["ambiguous"] == [(str(lesson_path), "03@demo")]
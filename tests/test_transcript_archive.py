@@ -0,0 +1,55 @@
+from pathlib import Path
+
+from crawlers.process_all_transcripts import process_all_transcripts
+from crawlers.transcript_archive import TranscriptArchive
+
+
+def test_archive_mode_packs_the_same_outputs(tmp_path: Path, metadata_file: Path):
+    files_out, archive_out = tmp_path / "files", tmp_path / "archive"
+    process_all_transcripts(str(metadata_file), str(files_out))
+
+    summary = process_all_transcripts(str(metadata_file), str(archive_out), archive=True)
+    assert summary["processed"] == 2
+    assert not (archive_out / "course" / "01@module").exists()
+
+    lesson_out = files_out / "course" / "01@module" / "01@lesson"
+    with TranscriptArchive(str(archive_out / "course" / "transcripts.pack")) as archive:
+        assert list(archive.keys()) == ["01@module/01@lesson/01@srt-item", "01@module/01@lesson/03@txt-item"]
+        for item in ("01@srt-item", "03@txt-item"):
+            key = f"01@module/01@lesson/{item}"
+            assert archive.read(key, "transcript.json") == (lesson_out / item / "transcript.json").read_bytes()
+            assert archive.read_text(key) == (lesson_out / item / "transcript.txt").read_text()
+        assert archive.load_json("01@module/01@lesson/01@srt-item")["segments"][0]["text"] == "First line"
+
+
+def test_archive_keeps_unchanged_items_across_runs(tmp_path: Path, metadata_file: Path, txt_text: str):
+    out = tmp_path / "out"
+    archive_path = out / "course" / "transcripts.pack"
+
+    process_all_transcripts(str(metadata_file), str(out), archive=True)
+    second = process_all_transcripts(str(metadata_file), str(out), archive=True)
+    assert (second["processed"], second["skipped"]) == (0, 2)
+
+    (tmp_path / "src" / "b.txt").write_text(txt_text + "2:03 Third line\n", encoding="utf-8")
+    third = process_all_transcripts(str(metadata_file), str(out), archive=True)
+    assert (third["processed"], third["skipped"]) == (1, 1)
+    with TranscriptArchive(str(archive_path)) as archive:
+        assert archive.read_text("01@module/01@lesson/03@txt-item").endswith("Third line")
+        assert archive.read_text("01@module/01@lesson/01@srt-item") == "First line\nSecond line"
+
+    # Per-item files are missing, so switching modes rebuilds everything
+    switched = process_all_transcripts(str(metadata_file), str(out))
+    assert (switched["processed"], switched["skipped"]) == (2, 0)
+
+
+def test_archive_keeps_the_last_good_outputs_of_failed_items(tmp_path: Path, metadata_file: Path):
+    out = tmp_path / "out"
+    process_all_transcripts(str(metadata_file), str(out), archive=True)
+
+    # Not valid UTF-8, so the second run fails to parse it
+    (tmp_path / "src" / "b.txt").write_bytes(b"\xff\xfe0:01 \x80broken\n")
+    summary = process_all_transcripts(str(metadata_file), str(out), archive=True)
+    assert sorted(Path(p).name for p, _ in summary["failed"]) == ["b.txt", "missing.txt"]
+    with TranscriptArchive(str(out / "course" / "transcripts.pack")) as archive:
+        assert list(archive.keys()) == ["01@module/01@lesson/01@srt-item", "01@module/01@lesson/03@txt-item"]
+        assert archive.read_text("01@module/01@lesson/03@txt-item") == "First line\nSecond line"
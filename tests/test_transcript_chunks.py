@@ -0,0 +1,66 @@
+from pathlib import Path
+
+from crawlers.process_all_transcripts import process_all_transcripts
+from crawlers.transcript_chunks import CHUNK_FILE_NAME, TranscriptChunker, iter_chunk_file
+
+
+def segments(texts):
+    return [
+        {"text": text, "start_ms": i * 1000, "end_ms": i * 1000 + 900,
+         "start_time": f"t{i}", "end_time": f"e{i}"}
+        for i, text in enumerate(texts)
+    ]
+
+
+def chunk_all(chunker, segs):
+    chunks = [chunk for segment in segs for chunk in chunker.add(segment)]
+    return chunks + chunker.finish()
+
+
+def test_chunker_windows_overlap_and_timings():
+    chunker = TranscriptChunker(size=11, overlap=3, ids={"item_slug": "item"})
+    chunks = chunk_all(chunker, segments(["aaaa", "bbbb", "cccc", "dddddddddddddd", "ee"]))
+
+    # The oversized segment is a chunk on its own; no overlap fits next to it
+    assert [c["text"] for c in chunks] == ["aaaa bbbb", "bbbb cccc", "dddddddddddddd", "ee"]
+    assert [(c["first_segment"], c["last_segment"]) for c in chunks] == [(0, 1), (1, 2), (3, 3), (4, 4)]
+    assert (chunks[0]["start_ms"], chunks[0]["end_ms"], chunks[0]["end_time"]) == (0, 1900, "e1")
+    assert all(c["item_slug"] == "item" for c in chunks)
+    assert [c["chunk"] for c in chunks] == [0, 1, 2, 3]
+
+
+def test_chunker_overlap_never_pushes_a_chunk_past_its_size():
+    texts = ["aaaa", "bbbb", "cccccccc", "d", "eeeeeeeee", "ff", "gg", "hhhhhhh", "i"]
+    for size in range(9, 16):
+        for overlap in range(1, size):
+            chunks = chunk_all(TranscriptChunker(size=size, overlap=overlap), segments(texts))
+            assert all(len(c["text"]) <= size for c in chunks), (size, overlap)
+            covered = [i for c in chunks for i in range(c["first_segment"], c["last_segment"] + 1)]
+            assert sorted(set(covered)) == list(range(len(texts)))
+
+    chunks = chunk_all(TranscriptChunker(size=10, overlap=5), segments(["aaaa", "bbbb", "cccccccc"]))
+    assert [c["text"] for c in chunks] == ["aaaa bbbb", "cccccccc"]
+
+
+def test_chunker_counts_tokens():
+    chunker = TranscriptChunker(size=4, unit="tokens")
+    chunks = chunk_all(chunker, segments(["one two", "three four", "five"]))
+    assert [c["text"] for c in chunks] == ["one two three four", "five"]
+
+
+def test_process_all_transcripts_writes_chunk_files(tmp_path: Path, metadata_file: Path):
+    output_dir = tmp_path / "out"
+    chunking = {"size": 15, "overlap": 0, "unit": "chars"}
+
+    first = process_all_transcripts(str(metadata_file), str(output_dir), chunking=chunking)
+    chunk_file = output_dir / "course" / "01@module" / "01@lesson" / "01@srt-item" / CHUNK_FILE_NAME
+    chunks = list(iter_chunk_file(chunk_file))
+    assert [(c["text"], c["start_ms"], c["end_ms"]) for c in chunks] == [
+        ("First line", 1000, 2000), ("Second line", 2000, 3000)
+    ]
+    assert chunks[0]["course_slug"] == "course" and chunks[0]["item_slug"] == "01@srt-item"
+
+    assert process_all_transcripts(str(metadata_file), str(output_dir), chunking=chunking)["processed"] == 0
+    rebuilt = process_all_transcripts(str(metadata_file), str(output_dir), chunking={**chunking, "size": 40})
+    assert rebuilt["processed"] == first["processed"] == 2
+    assert [c["text"] for c in iter_chunk_file(chunk_file)] == ["First line Second line"]
@@ -0,0 +1,115 @@
+from pathlib import Path
+import json
+
+import pytest
+
+from crawlers.transcript_formatter import (
+    iter_srt_segments,
+    iter_transcript_segments,
+    sniff_transcript_format,
+    parse_srt,
+    generate_json_format,
+    generate_txt_format,
+    generate_all_formats,
+)
+
+
+SAMPLE_SRT = """1
+00:00:01,000 --> 00:00:02,500
+Hello and welcome
+
+2
+00:00:03,000 --> 00:00:05,000
+to the course,
+everyone.
+3
+00:00:05,500 --> 00:00:07,000
+This cue had no blank line before it.
+
+garbage without timing
+
+00:00:08,000 --> 00:00:09,000
+Missing sequence number.
+"""
+
+
+def test_iter_srt_segments_recovers_broken_cues(tmp_path: Path):
+    srt_path = tmp_path / "sample.srt"
+    srt_path.write_text(SAMPLE_SRT, encoding="utf-8")
+
+    segments = list(iter_srt_segments(srt_path))
+
+    assert [s["sequence"] for s in segments] == [1, 2, 3, 4]
+    assert segments[1]["text"] == "to the course, everyone."
+    assert segments[2]["start_time"] == "00:00:05,500"
+    assert (segments[2]["start_ms"], segments[2]["end_ms"]) == (5500, 7000)
+    assert segments[2]["text"] == "This cue had no blank line before it."
+    assert segments[3]["end_time"] == "00:00:09,000"
+    assert parse_srt(srt_path) == segments
+
+
+def test_parse_srt_missing_file_returns_empty(tmp_path: Path):
+    assert parse_srt(tmp_path / "missing.srt") == []
+
+
+def test_streaming_writers_match_json_dump(tmp_path: Path):
+    srt_path = tmp_path / "sample.srt"
+    srt_path.write_text(SAMPLE_SRT, encoding="utf-8")
+    segments = parse_srt(srt_path)
+
+    for segs in (segments, []):
+        json_path, txt_path = tmp_path / "t.json", tmp_path / "t.txt"
+        generate_json_format(iter(segs), json_path)
+        generate_txt_format(iter(segs), txt_path)
+
+        expected_json = json.dumps({"language": "en", "segments": segs}, indent=4)
+        expected_txt = "\n".join(s["text"] for s in segs)
+        assert json_path.read_text(encoding="utf-8") == expected_json
+        assert txt_path.read_text(encoding="utf-8") == expected_txt
+
+        json_path2, txt_path2 = tmp_path / "t2.json", tmp_path / "t2.txt"
+        assert generate_all_formats(iter(segs), json_path2, txt_path2) == len(segs)
+        assert json_path2.read_text(encoding="utf-8") == expected_json
+        assert txt_path2.read_text(encoding="utf-8") == expected_txt
+
+
+SAMPLE_VTT = """WEBVTT
+Kind: captions
+
+NOTE this block is a comment
+
+intro
+00:01.000 --> 00:02.500 align:start
+<v Speaker>Hello &amp; welcome</v>
+
+01:00:03.000 --> 01:00:05.000
+to the <c.loud>course</c>,
+everyone.
+"""
+
+
+def test_registry_sniffs_format_from_content(tmp_path: Path):
+    vtt_path = tmp_path / "captions.dat"
+    vtt_path.write_text(SAMPLE_VTT, encoding="utf-8")
+    srt_as_txt = tmp_path / "transcript.txt"
+    srt_as_txt.write_text(SAMPLE_SRT, encoding="utf-8")
+    txt_path = tmp_path / "plain.txt"
+    txt_path.write_text("0:01 First line\n12:02 Second line\n", encoding="utf-8")
+    unknown = tmp_path / "notes.bin"
+    unknown.write_text("no timings here", encoding="utf-8")
+
+    assert sniff_transcript_format(vtt_path) == "webvtt"
+    assert sniff_transcript_format(srt_as_txt) == "srt"
+    assert sniff_transcript_format(txt_path) == "txt"
+    assert sniff_transcript_format(unknown) is None
+
+    segments = list(iter_transcript_segments(vtt_path))
+    assert [(s["sequence"], s["start_time"], s["end_ms"]) for s in segments] == [
+        (1, "00:00:01,000", 2500),
+        (2, "01:00:03,000", 3605000),
+    ]
+    assert [s["text"] for s in segments] == ["Hello & welcome", "to the course, everyone."]
+    assert list(iter_transcript_segments(srt_as_txt)) == parse_srt(srt_as_txt)
+    assert [s["text"] for s in iter_transcript_segments(txt_path)] == ["First line", "Second line"]
+    with pytest.raises(ValueError):
+        iter_transcript_segments(unknown)
@@ -0,0 +1,24 @@
+from pathlib import Path
+
+from crawlers.transcript_store import TranscriptStore, TranscriptStoreWriter
+
+
+def test_store_round_trips_segments_by_item_and_index(tmp_path: Path):
+    store_path = tmp_path / "course" / "transcripts.bin"
+    with TranscriptStoreWriter(str(store_path)) as writer:
+        writer.add_item("01@m/01@l/01@timed", [
+            {"start_ms": 1000, "end_ms": 2500, "text": "Hello"},
+            {"start_ms": 3000, "end_ms": 5000, "text": "wörld"},
+        ])
+        writer.add_item("01@m/01@l/02@untimed", [{"text": "plain"}])
+        writer.add_item("01@m/01@l/03@empty", [])
+
+    with TranscriptStore(str(store_path)) as store:
+        assert len(store) == 3
+        assert list(store.keys()) == ["01@m/01@l/01@timed", "01@m/01@l/02@untimed", "01@m/01@l/03@empty"]
+        assert store.item_segments("01@m/01@l/01@timed") == [
+            {"start_ms": 1000, "end_ms": 2500, "text": "Hello"},
+            {"start_ms": 3000, "end_ms": 5000, "text": "wörld"},
+        ]
+        assert store.segment(2) == {"start_ms": None, "end_ms": None, "text": "plain"}
+        assert store.item_segments("01@m/01@l/03@empty") == []
@@ -0,0 +1,30 @@
+from crawlers.transcript_timeline import TranscriptTimeline
+
+
+def seg(start_ms, end_ms, text):
+    return {"start_ms": start_ms, "end_ms": end_ms, "text": text}
+
+
+def test_overlapping_returns_segments_in_window():
+    timeline = TranscriptTimeline([
+        seg(0, 1000, "a"),
+        seg(1000, 2000, "b"),
+        seg(2000, 3000, "c"),
+        {"text": "untimed"},
+    ])
+
+    assert len(timeline) == 3
+    assert [s["text"] for s in timeline.overlapping(500, 2000)] == ["a", "b"]
+    assert [s["text"] for s in timeline.at(2000)] == ["c"]
+    assert timeline.overlapping(3000, 4000) == []
+
+
+def test_overlapping_handles_long_and_unordered_cues():
+    timeline = TranscriptTimeline([
+        seg(5000, 6000, "late"),
+        seg(0, 10000, "long"),
+        seg(1000, 1500, "short"),
+    ])
+
+    assert [s["text"] for s in timeline.at(5500)] == ["long", "late"]
+    assert [s["text"] for s in timeline.overlapping(1200, 1300)] == ["long", "short"]
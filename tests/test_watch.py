@@ -0,0 +1,99 @@
+from pathlib import Path
+import os
+import threading
+import time
+
+import pytest
+
+from benchmarks.synthetic import TreeSize, make_manual_upload_course
+from crawlers import watch
+from crawlers.watch import group_changes, watch_crawled_data
+
+
+def test_group_changes_maps_paths_to_courses_and_items(tmp_path: Path):
+    root = tmp_path / "crawled_data"
+    course = root / "manual_upload" / "provider" / "course"
+    (course / "01@m" / "01@l" / "01@i").mkdir(parents=True)
+    (root / "dl_coursera" / "crawled" / "01@m").mkdir(parents=True)
+    (root / "dl_coursera" / "crawled.crawl.json").write_text("{}")
+
+    courses = group_changes(str(root), [
+        str(course / "01@m" / "01@l" / "01@i" / "1. Item.srt"),
+        str(course / "01@m" / "01@l" / "01@i" / "video.mp4"),
+        str(root / "dl_coursera" / "crawled" / "01@m" / "01@l"),
+        str(root / "dl_coursera" / "unknown" / "file.txt"),
+        str(tmp_path / "elsewhere.txt"),
+    ])
+
+    assert courses == {
+        ("manual_upload", str(course)): {os.path.join("01@m", "01@l", "01@i")},
+        ("dl_coursera", str(root / "dl_coursera" / "crawled.crawl.json")): {os.path.join("01@m", "01@l")},
+    }
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_watch_processes_a_new_course(tmp_path: Path, use_inotify: bool):
+    root = tmp_path / "crawled_data"
+    (root / "manual_upload").mkdir(parents=True)
+    stop = threading.Event()
+    watcher = threading.Thread(target=watch_crawled_data, kwargs=dict(
+        root=str(root), metadata_dir=str(tmp_path / "metadata"), transcripts_dir=str(tmp_path / "outputs"),
+        settle=0.2, poll_interval=0.1, use_inotify=use_inotify, stop=stop,
+    ))
+    watcher.start()
+    try:
+        time.sleep(0.3)
+        make_manual_upload_course(str(root / "manual_upload" / "provider"), "course", TreeSize(1, 1, 2, 2))
+
+        manifest = tmp_path / "outputs" / "manual_upload" / "course" / "transcripts.manifest.json"
+        deadline = time.monotonic() + 10
+        while not manifest.exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        stop.set()
+        watcher.join(timeout=10)
+
+    assert (tmp_path / "metadata" / "provider" / "course.json").exists()
+    assert manifest.exists()
+
+
+class FailingWatcher:
+    closed = False
+
+    def poll(self, timeout):
+        raise OSError(28, "inotify watch limit reached (fs.inotify.max_user_watches)")
+
+    def close(self):
+        self.closed = True
+
+
+def test_watch_falls_back_to_polling_when_the_watcher_fails(tmp_path: Path, monkeypatch):
+    root = tmp_path / "crawled_data"
+    # Already on disk before the watcher fails, so only the fallback's full pass can find it
+    make_manual_upload_course(str(root / "manual_upload" / "provider"), "course", TreeSize(1, 1, 2, 2))
+    failing = FailingWatcher()
+    monkeypatch.setattr(watch, "open_watcher", lambda *args: failing)
+    stop = threading.Event()
+    watcher = threading.Thread(target=watch_crawled_data, kwargs=dict(
+        root=str(root), metadata_dir=str(tmp_path / "metadata"), transcripts_dir=str(tmp_path / "outputs"),
+        settle=0.2, poll_interval=0.1, stop=stop,
+    ))
+    watcher.start()
+    try:
+        manifest = tmp_path / "outputs" / "manual_upload" / "course" / "transcripts.manifest.json"
+        deadline = time.monotonic() + 10
+        while not manifest.exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        # Still watching: a second course is picked up by polling
+        make_manual_upload_course(str(root / "manual_upload" / "provider"), "other", TreeSize(1, 1, 1, 1))
+        other = tmp_path / "outputs" / "manual_upload" / "other" / "transcripts.manifest.json"
+        while not other.exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        stop.set()
+        watcher.join(timeout=10)
+
+    assert not watcher.is_alive()
+    assert failing.closed
+    assert manifest.exists() and other.exists()
@@ -0,0 +1,188 @@
+import argparse
+import fnmatch
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from PyPDF2 import PdfReader
+
+try:
+    from crawlers import metrics
+    from crawlers.slide_text import read_sidecar_header, sidecar_is_current, write_page_text
+except ImportError:  # executed as a script: python utils/extract_slide_text.py
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from crawlers import metrics
+    from crawlers.slide_text import read_sidecar_header, sidecar_is_current, write_page_text
+
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ExtractResult:
+    pdf_path: str
+    pages: int
+    cached: bool = False
+    error: Optional[str] = None
+    metrics: Optional[dict] = None
+
+
+def extract_page_texts(
+    reader: PdfReader, start_page_inclusive: int = 1, end_page_inclusive: Optional[int] = None
+) -> List[str]:
+    """Return the text of pages start..end (1-based) of an open PdfReader."""
+    if end_page_inclusive is None:
+        end_page_inclusive = len(reader.pages)
+    texts = [
+        reader.pages[page_index].extract_text() or ""
+        for page_index in range(start_page_inclusive - 1, end_page_inclusive)
+    ]
+    metrics.inc("pages_extracted", len(texts))
+    return texts
+
+
+def extract_slide_text(pdf_path: str, force: bool = False) -> ExtractResult:
+    """Extract the page text of one PDF into its sidecar, unless the sidecar is current."""
+    header = read_sidecar_header(pdf_path)
+    if not force and header is not None and sidecar_is_current(pdf_path, header):
+        return ExtractResult(pdf_path=pdf_path, pages=header["pages"], cached=True)
+
+    reader = PdfReader(pdf_path)
+    metrics.inc("bytes_read", os.path.getsize(pdf_path))
+    texts = extract_page_texts(reader)
+    write_page_text(pdf_path, texts)
+    return ExtractResult(pdf_path=pdf_path, pages=len(texts))
+
+
+def find_slide_pdfs(root: str, patterns: Sequence[str] = ("slides.pdf",)) -> List[str]:
+    """Every PDF under root whose file name matches one of patterns (fnmatch, case-insensitive)."""
+    pdf_paths: List[str] = []
+    for dir_path, dirs, files in os.walk(os.path.abspath(root)):
+        dirs.sort()
+        for name in sorted(files):
+            lower_name = name.lower()
+            if any(fnmatch.fnmatch(lower_name, pattern.lower()) for pattern in patterns):
+                pdf_paths.append(os.path.join(dir_path, name))
+    return pdf_paths
+
+
+def _extract_job(pdf_path: str, force: bool, collect_metrics: bool = False) -> ExtractResult:
+    """Run extract_slide_text for one PDF, capturing any failure in the result.
+
+    With collect_metrics (set for worker processes), the metrics recorded
+    for this PDF are attached to the result for the parent to merge.
+    """
+    if collect_metrics:
+        metrics.enable()
+    before = metrics.snapshot()
+    try:
+        result = extract_slide_text(pdf_path, force)
+    except Exception as e:
+        result = ExtractResult(pdf_path=pdf_path, pages=0, error=f"{type(e).__name__}: {e}")
+    if collect_metrics:
+        result.metrics = metrics.diff(metrics.snapshot(), before)
+    return result
+
+
+def extract_all_slide_text(
+    root: str,
+    patterns: Sequence[str] = ("slides.pdf",),
+    workers: Optional[int] = None,
+    force: bool = False,
+) -> List[ExtractResult]:
+    """Extract the page text of every matching PDF under root, in parallel across PDFs.
+
+    PDFs whose sidecar is current are skipped. A failing PDF does not stop
+    the others; failures are logged in the summary at the end.
+    """
+    pdf_paths = find_slide_pdfs(root, patterns)
+    logger.info("Found %d PDFs under %s", len(pdf_paths), root)
+
+    started = time.perf_counter()
+    if workers == 1 or len(pdf_paths) <= 1:
+        results = [_extract_job(pdf_path, force) for pdf_path in pdf_paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(
+                executor.map(
+                    _extract_job,
+                    pdf_paths,
+                    [force] * len(pdf_paths),
+                    [metrics.enabled()] * len(pdf_paths),
+                    chunksize=8,
+                )
+            )
+        for result in results:
+            metrics.merge(result.metrics)
+    elapsed = time.perf_counter() - started
+
+    failed = [result for result in results if result.error is not None]
+    cached = [result for result in results if result.cached]
+    logger.info(
+        "Extracted %d PDFs (%d pages), %d already current, %d failed in %.2fs",
+        len(results) - len(failed) - len(cached),
+        sum(result.pages for result in results if not result.cached),
+        len(cached),
+        len(failed),
+        elapsed,
+    )
+    for result in failed:
+        logger.error("  FAILED %s: %s", result.pdf_path, result.error)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Extract the text of every page of the slide PDFs under a directory once, into a "
+            "<pdf>.pages.jsonl sidecar next to each PDF. Sidecars that match their PDF are kept."
+        )
+    )
+    parser.add_argument("root", help="Directory to search, e.g. crawled_data/manual_upload")
+    parser.add_argument(
+        "--pattern",
+        action="append",
+        default=None,
+        help="PDF file name pattern to extract; may be repeated (default: slides.pdf)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Extract again even if a sidecar matches its PDF",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        dest="metrics_file",
+        help="Collect run metrics and write them as JSON to this path",
+    )
+    parser.add_argument(
+        "--prometheus-file",
+        dest="prometheus_file",
+        help="Collect run metrics and write them in Prometheus text format to this path",
+    )
+
+    args = parser.parse_args()
+    metrics.enable_from_args(args)
+    try:
+        results = extract_all_slide_text(
+            args.root, patterns=args.pattern or ["slides.pdf"], workers=args.workers, force=args.force
+        )
+        if any(result.error is not None for result in results):
+            raise SystemExit(1)
+    finally:
+        metrics.write_from_args(args)
+
+
+if __name__ == "__main__":
+    main()
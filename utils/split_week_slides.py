@@ -2,11 +2,24 @@ import argparse
 import json
 import logging
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Union
 
 from PyPDF2 import PdfReader, PdfWriter
 
+try:
+    from crawlers import metrics
+    from crawlers.slide_text import write_page_text
+    from utils.extract_slide_text import extract_page_texts
+except ImportError:  # executed as a script: python utils/split_week_slides.py
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from crawlers import metrics
+    from crawlers.slide_text import write_page_text
+    from utils.extract_slide_text import extract_page_texts
+
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger(__name__)
@@ -53,24 +66,70 @@ def load_instructions(instructions_path: str) -> List[ItemRange]:
     return items
 
 
-def write_pdf_subset(
-    source_pdf_path: str,
-    output_pdf_path: str,
-    start_page_inclusive: int,
-    end_page_inclusive: int,
+def validate_item_ranges(
+    items: List[ItemRange], total_pages: int, source_pdf_path: str
 ) -> None:
-    reader = PdfReader(source_pdf_path)
-    total_pages = len(reader.pages)
+    """Check every range against the source PDF before anything is written.
+
+    Raises a single ValueError listing all invalid, out-of-range and
+    overlapping ranges.
+    """
+    problems: List[str] = []
+    for item in items:
+        start, end = item.start_page_inclusive, item.end_page_inclusive
+        if start < 1 or end < 1:
+            problems.append(f"{item.item_dir_name}: page numbers must be 1-based and positive ({start}-{end})")
+        elif start > end:
+            problems.append(f"{item.item_dir_name}: start page must be <= end page ({start}-{end})")
+        elif end > total_pages:
+            problems.append(
+                f"{item.item_dir_name}: end page {end} exceeds total pages {total_pages}"
+            )
+
+    # Compare each range with the one reaching furthest so far, which a range
+    # nested inside an earlier, longer one would otherwise slip past
+    ordered = sorted(items, key=lambda i: (i.start_page_inclusive, i.end_page_inclusive))
+    furthest: Optional[ItemRange] = None
+    for current in ordered:
+        if furthest is not None and current.start_page_inclusive <= furthest.end_page_inclusive:
+            problems.append(
+                f"{current.item_dir_name} ({current.start_page_inclusive}-{current.end_page_inclusive}) "
+                f"overlaps {furthest.item_dir_name} "
+                f"({furthest.start_page_inclusive}-{furthest.end_page_inclusive})"
+            )
+        if furthest is None or current.end_page_inclusive > furthest.end_page_inclusive:
+            furthest = current
 
-    if start_page_inclusive < 1 or end_page_inclusive < 1:
-        raise ValueError("Page numbers must be 1-based and positive")
-    if start_page_inclusive > end_page_inclusive:
-        raise ValueError("Start page must be <= end page")
-    if end_page_inclusive > total_pages:
+    if problems:
         raise ValueError(
-            f"End page {end_page_inclusive} exceeds total pages {total_pages} for {source_pdf_path}"
+            f"Invalid instructions for {source_pdf_path}:\n  " + "\n  ".join(problems)
         )
 
+
+def write_pdf_subset(
+    source_pdf: Union[str, PdfReader],
+    output_pdf_path: str,
+    start_page_inclusive: int,
+    end_page_inclusive: int,
+) -> int:
+    """Write pages start..end of source_pdf to output_pdf_path.
+
+    source_pdf may be a path or an already-open PdfReader, so callers
+    splitting one PDF into many subsets only parse it once. Returns the
+    number of pages written.
+    """
+    if isinstance(source_pdf, PdfReader):
+        reader = source_pdf
+        source_name = "source PDF"
+    else:
+        reader = PdfReader(source_pdf)
+        source_name = source_pdf
+    validate_item_ranges(
+        [ItemRange(os.path.basename(os.path.dirname(output_pdf_path)), start_page_inclusive, end_page_inclusive)],
+        len(reader.pages),
+        source_name,
+    )
+
     writer = PdfWriter()
     for page_index in range(start_page_inclusive - 1, end_page_inclusive):
         writer.add_page(reader.pages[page_index])
@@ -78,6 +137,10 @@ def write_pdf_subset(
     os.makedirs(os.path.dirname(output_pdf_path), exist_ok=True)
     with open(output_pdf_path, "wb") as out_f:
         writer.write(out_f)
+        metrics.inc("bytes_written", out_f.tell())
+    pages = end_page_inclusive - start_page_inclusive + 1
+    metrics.inc("pages_split", pages)
+    return pages
 
 
 def split_week_slides(
@@ -86,7 +149,14 @@ def split_week_slides(
     instructions_path: str,
     output_filename: str = "slides.pdf",
     dry_run: bool = False,
+    extract_text: bool = False,
 ) -> List[str]:
+    """Split a week PDF into the item directories named in its instructions.
+
+    With extract_text, the text of each item's pages is taken from the
+    already-open week PDF and written to a sidecar next to the item's PDF
+    (see crawlers/slide_text.py). Returns the paths written.
+    """
     week_dir_path = os.path.abspath(week_dir_path)
     source_pdf_path = os.path.join(week_dir_path, week_pdf_filename)
 
@@ -96,7 +166,14 @@ def split_week_slides(
     items = load_instructions(instructions_path)
     logger.info("Loaded %d instructions", len(items))
 
+    started = time.perf_counter()
+    # Parse the week PDF once and validate every range before writing anything
+    reader = PdfReader(source_pdf_path)
+    metrics.inc("bytes_read", os.path.getsize(source_pdf_path))
+    validate_item_ranges(items, len(reader.pages), source_pdf_path)
+
     written_paths: List[str] = []
+    pages_written = 0
     for item in items:
         item_dir = os.path.join(week_dir_path, item.item_dir_name)
         if not os.path.isdir(item_dir):
@@ -113,40 +190,244 @@ def split_week_slides(
         )
 
         if not dry_run:
-            write_pdf_subset(
-                source_pdf_path,
+            pages_written += write_pdf_subset(
+                reader,
                 output_pdf_path,
                 item.start_page_inclusive,
                 item.end_page_inclusive,
             )
             written_paths.append(output_pdf_path)
-
+            if extract_text:
+                write_page_text(
+                    output_pdf_path,
+                    extract_page_texts(reader, item.start_page_inclusive, item.end_page_inclusive),
+                )
+
+    elapsed = time.perf_counter() - started
+    metrics.observe("split_week", elapsed)
+    logger.info(
+        "Wrote %d pages to %d files from %s in %.2fs",
+        pages_written,
+        len(written_paths),
+        source_pdf_path,
+        elapsed,
+    )
     return written_paths
 
 
+@dataclass
+class WeekJob:
+    week_dir_path: str
+    week_pdf_filename: Optional[str]
+    instructions_path: str
+    error: Optional[str] = None
+
+
+@dataclass
+class WeekResult:
+    job: WeekJob
+    written_paths: List[str]
+    pages: int
+    error: Optional[str] = None
+    metrics: Optional[dict] = None
+
+
+def find_week_jobs(
+    course_dir_path: str,
+    instructions_name: str = "split_instructions.json",
+    output_filename: str = "slides.pdf",
+) -> List[WeekJob]:
+    """Find every week directory under a course that has an instructions file.
+
+    The week PDF is taken from a "week_pdf" key in the instructions, or else
+    must be the only PDF (other than output_filename) in the week directory.
+    """
+    jobs: List[WeekJob] = []
+    for root, dirs, files in os.walk(os.path.abspath(course_dir_path)):
+        dirs.sort()
+        if instructions_name not in files:
+            continue
+
+        instructions_path = os.path.join(root, instructions_name)
+        job = WeekJob(week_dir_path=root, week_pdf_filename=None, instructions_path=instructions_path)
+        try:
+            with open(instructions_path, "r") as f:
+                raw = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            job.error = f"Unreadable instructions: {e}"
+            jobs.append(job)
+            continue
+
+        if isinstance(raw, dict) and "week_pdf" in raw:
+            job.week_pdf_filename = raw["week_pdf"]
+        else:
+            pdfs = sorted(
+                name for name in files
+                if name.lower().endswith(".pdf") and name != output_filename
+            )
+            if len(pdfs) == 1:
+                job.week_pdf_filename = pdfs[0]
+            else:
+                job.error = (
+                    f"Expected exactly one week PDF in {root}, found {len(pdfs)}; "
+                    "set \"week_pdf\" in the instructions"
+                )
+        jobs.append(job)
+
+    return jobs
+
+
+def _split_week_job(
+    job: WeekJob, output_filename: str, dry_run: bool, collect_metrics: bool = False, extract_text: bool = False
+) -> WeekResult:
+    """Run split_week_slides for one week, capturing any failure in the result.
+
+    With collect_metrics (set for worker processes), the metrics recorded by
+    this week are attached to the result for the parent to merge.
+    """
+    if not collect_metrics:
+        return _split_week_job_unmetered(job, output_filename, dry_run, extract_text)
+    metrics.enable()
+    before = metrics.snapshot()
+    result = _split_week_job_unmetered(job, output_filename, dry_run, extract_text)
+    result.metrics = metrics.diff(metrics.snapshot(), before)
+    return result
+
+
+def _split_week_job_unmetered(
+    job: WeekJob, output_filename: str, dry_run: bool, extract_text: bool = False
+) -> WeekResult:
+    if job.error is not None:
+        return WeekResult(job=job, written_paths=[], pages=0, error=job.error)
+    try:
+        written_paths = split_week_slides(
+            week_dir_path=job.week_dir_path,
+            week_pdf_filename=job.week_pdf_filename,
+            instructions_path=job.instructions_path,
+            output_filename=output_filename,
+            dry_run=dry_run,
+            extract_text=extract_text,
+        )
+        pages = sum(
+            item.end_page_inclusive - item.start_page_inclusive + 1
+            for item in load_instructions(job.instructions_path)
+        )
+        return WeekResult(job=job, written_paths=written_paths, pages=pages)
+    except Exception as e:
+        return WeekResult(job=job, written_paths=[], pages=0, error=f"{type(e).__name__}: {e}")
+
+
+def split_course_slides(
+    course_dir_path: str,
+    instructions_name: str = "split_instructions.json",
+    output_filename: str = "slides.pdf",
+    dry_run: bool = False,
+    workers: Optional[int] = None,
+    extract_text: bool = False,
+) -> List[WeekResult]:
+    """Split every week PDF under a course in parallel, one week per task.
+
+    A failing week does not stop the others; every week gets a WeekResult
+    and a line in the summary logged at the end. In dry-run mode the
+    combined plan for all weeks is logged instead of writing files.
+    """
+    jobs = find_week_jobs(course_dir_path, instructions_name, output_filename)
+    logger.info("Found %d week instruction files under %s", len(jobs), course_dir_path)
+
+    started = time.perf_counter()
+    if workers == 1 or len(jobs) <= 1:
+        results = [_split_week_job(job, output_filename, dry_run, extract_text=extract_text) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(
+                executor.map(
+                    _split_week_job,
+                    jobs,
+                    [output_filename] * len(jobs),
+                    [dry_run] * len(jobs),
+                    [metrics.enabled()] * len(jobs),
+                    [extract_text] * len(jobs),
+                )
+            )
+        for result in results:
+            metrics.merge(result.metrics)
+    elapsed = time.perf_counter() - started
+
+    if dry_run:
+        logger.info("Dry-run plan:")
+        for result in results:
+            logger.info("  %s (%s)", result.job.week_dir_path, result.job.week_pdf_filename)
+            if result.error is not None:
+                continue
+            for item in load_instructions(result.job.instructions_path):
+                logger.info(
+                    "    pages %s-%s -> %s",
+                    item.start_page_inclusive,
+                    item.end_page_inclusive,
+                    os.path.join(item.item_dir_name, output_filename),
+                )
+
+    failed = [result for result in results if result.error is not None]
+    logger.info("Summary (%d weeks, %d failed, %.2fs):", len(results), len(failed), elapsed)
+    for result in results:
+        if result.error is None:
+            logger.info(
+                "  OK     %s: %d pages, %d files",
+                result.job.week_dir_path,
+                result.pages,
+                len(result.written_paths),
+            )
+        else:
+            logger.error("  FAILED %s: %s", result.job.week_dir_path, result.error)
+
+    return results
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(
         description=(
             "Split a week's lecture PDF into per-item PDFs based on JSON instructions. "
-            "Outputs each subset as slides.pdf into the corresponding item directory."
+            "Outputs each subset as slides.pdf into the corresponding item directory. "
+            "With --course, splits every week found under a course directory in parallel."
         )
     )
     parser.add_argument(
         "week_dir",
+        nargs="?",
         help="Path to the week directory containing the full lecture PDF and item subdirectories",
     )
     parser.add_argument(
         "week_pdf",
+        nargs="?",
         help="Filename of the full lecture PDF located inside the week directory",
     )
     parser.add_argument(
         "instructions",
+        nargs="?",
         help=(
             "Path to a JSON file describing items and page ranges.\n"
             "Accepted formats: {\"items\": [{\"item_dir\": \"01@foo\", \"start\": 1, \"end\": 5}, ...]} or "
             "[{\"item_dir\": \"01@foo\", \"pages\": \"1-5\"}, ...]"
         ),
     )
+    parser.add_argument(
+        "--course",
+        help=(
+            "Split every week under this course directory. Each week directory must contain "
+            "an instructions file (see --instructions-name) and its week PDF"
+        ),
+    )
+    parser.add_argument(
+        "--instructions-name",
+        default="split_instructions.json",
+        help="Instructions filename to look for in --course mode (default: split_instructions.json)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for --course mode (default: one per CPU)",
+    )
     parser.add_argument(
         "--output-name",
         default="slides.pdf",
@@ -157,8 +438,46 @@ def main() -> None:
         action="store_true",
         help="Print planned actions without writing files",
     )
+    parser.add_argument(
+        "--extract-text",
+        action="store_true",
+        help="Also write each item's page text to a <output-name>.pages.jsonl sidecar",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        dest="metrics_file",
+        help="Collect run metrics and write them as JSON to this path",
+    )
+    parser.add_argument(
+        "--prometheus-file",
+        dest="prometheus_file",
+        help="Collect run metrics and write them in Prometheus text format to this path",
+    )
 
     args = parser.parse_args()
+    metrics.enable_from_args(args)
+    try:
+        _run_cli(parser, args)
+    finally:
+        metrics.write_from_args(args)
+
+
+def _run_cli(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    if args.course:
+        results = split_course_slides(
+            course_dir_path=args.course,
+            instructions_name=args.instructions_name,
+            output_filename=args.output_name,
+            dry_run=args.dry_run,
+            workers=args.workers,
+            extract_text=args.extract_text,
+        )
+        if any(result.error is not None for result in results):
+            raise SystemExit(1)
+        return
+
+    if not (args.week_dir and args.week_pdf and args.instructions):
+        parser.error("week_dir, week_pdf and instructions are required unless --course is given")
 
     split_week_slides(
         week_dir_path=args.week_dir,
@@ -166,6 +485,7 @@ def main() -> None:
         instructions_path=args.instructions,
         output_filename=args.output_name,
         dry_run=args.dry_run,
+        extract_text=args.extract_text,
     )
 
 